@@ -0,0 +1,215 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+****************************************
+* Import
+****************************************
+'''
+import json
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+# EventManager modules
+from eventscheduler import EventBoundaryIndex
+# logging
+import logging
+
+'''
+****************************************
+* Constants
+****************************************
+'''
+# default time range of /boundaries: now until now + 7 days
+DEFAULT_BOUNDARY_RANGE = timedelta(days=7)
+# maximum number of cached responses per event list version
+RESPONSE_CACHE_SIZE = 128
+EVENT_CATEGORIES = ["all", "quests", "pokemon", "spawns"]
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger(__name__)
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+# Immutable view of one event list version with serialized, ETag tagged responses. Unfiltered responses (/events of
+# each category, /eventcache) are serialized once with the event list version, filtered responses are cached per
+# request (path and normalized query). All responses are dropped with the next event list version.
+class EventApiSnapshot():
+    def __init__(self, all_events = [], quest_events = [], pokemon_events = [], spawn_events = [], last_update = None):
+        self.last_update = last_update
+        self._events = {
+            "all": list(all_events),
+            "quests": list(quest_events),
+            "pokemon": list(pokemon_events),
+            "spawns": list(spawn_events)
+        }
+        self._boundary_index = EventBoundaryIndex(all_events)
+        self._static_responses = {("/events", category, None, None, None): helper_build_response(self._get_events(category, None, None, None)) for category in EVENT_CATEGORIES}
+        self._static_responses[("/eventcache",)] = helper_build_response(self._get_eventcache())
+        self._responses = {}
+        self._lock = threading.Lock()
+
+    def get_response(self, path, query, now):
+        # returns (status, body, etag)
+        try:
+            if path == "/events":
+                category = query.get("category", "all")
+                if category not in EVENT_CATEGORIES:
+                    raise ValueError(f"unknown category {category}")
+                etypes = helper_parse_types(query.get("type", None))
+                time_from = helper_parse_time(query.get("from", None))
+                time_to = helper_parse_time(query.get("to", None))
+                key = (path, category, etypes, time_from, time_to)
+                build = lambda: self._get_events(category, etypes, time_from, time_to)
+            elif path == "/boundaries":
+                etypes = helper_parse_types(query.get("type", None))
+                # default: upcoming boundaries (from current minute)
+                time_from = helper_parse_time(query.get("from", None)) or now.replace(second=0, microsecond=0)
+                time_to = helper_parse_time(query.get("to", None)) or time_from + DEFAULT_BOUNDARY_RANGE
+                key = (path, etypes, time_from, time_to)
+                build = lambda: self._get_boundaries(etypes, time_from, time_to)
+            elif path == "/eventcache":
+                key = (path,)
+                build = self._get_eventcache
+            else:
+                return 404, b'{"error": "not found"}', None
+        except ValueError as e:
+            return 400, json.dumps({"error": str(e)}).encode("utf8"), None
+        response = self._static_responses.get(key, None)
+        if response is not None:
+            return 200, response[0], response[1]
+        with self._lock:
+            response = self._responses.get(key, None)
+        if response is None:
+            response = helper_build_response(build())
+            with self._lock:
+                if len(self._responses) >= RESPONSE_CACHE_SIZE:
+                    self._responses.clear()
+                self._responses[key] = response
+        return 200, response[0], response[1]
+
+    def _get_events(self, category, etypes, time_from, time_to):
+        # events of category and types, which are active in time range
+        events = []
+        for event in self._events[category]:
+            if etypes is not None and event.etype not in etypes:
+                continue
+            if time_from is not None and event.end < time_from:
+                continue
+            if time_to is not None and event.start is not None and event.start > time_to:
+                continue
+            events.append(event.get_dict())
+        return {"last_update": self.last_update, "events": events}
+
+    def _get_boundaries(self, etypes, time_from, time_to):
+        boundaries = []
+        for boundary_time, event, kind in self._boundary_index.get_crossings(time_from, time_to):
+            if etypes is not None and event.etype not in etypes:
+                continue
+            boundaries.append({
+                "time": f"{boundary_time}",
+                "kind": kind,
+                "name": event.name,
+                "etype": event.etype,
+                "has_spawnpoints": event.has_spawnpoints,
+                "has_quests": event.has_quests,
+                "has_pokemon": event.has_pokemon
+            })
+        return {"last_update": self.last_update, "from": f"{time_from}", "to": f"{time_to}", "boundaries": boundaries}
+
+    def _get_eventcache(self):
+        # same structure as .eventcache file
+        return {
+            "last_update": self.last_update,
+            "events": [{"all": [event.get_dict() for event in self._events["all"]]}, {"quests": [event.get_dict() for event in self._events["quests"]]}]
+        }
+
+class EventApiRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        status, body, etag = self.server.event_api.get_snapshot().get_response(url.path.rstrip("/") or "/", query, self.server.event_api.get_now())
+        if etag is not None and self.headers.get("If-None-Match", None) == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(f"EventApiServer: {self.address_string()} {format % args}")
+
+# Optional local HTTP read API (GET /events, /boundaries, /eventcache) with current event list, running in a daemon thread
+class EventApiServer():
+    def __init__(self, host, port, now_function = datetime.now):
+        self._snapshot = EventApiSnapshot()
+        self._now_function = now_function
+        self._httpd = ThreadingHTTPServer((host, port), EventApiRequestHandler)
+        self._httpd.event_api = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="eventapi", daemon=True)
+
+    def update(self, all_events, quest_events, pokemon_events, spawn_events, last_update):
+        # new event list version: replace snapshot (and its response cache)
+        self._snapshot = EventApiSnapshot(all_events, quest_events, pokemon_events, spawn_events, last_update)
+
+    def get_snapshot(self):
+        return self._snapshot
+
+    def get_now(self):
+        return self._now_function()
+
+    def get_address(self):
+        return self._httpd.server_address
+
+    def start(self):
+        self._thread.start()
+        log.info(f"EventApiServer: serve event data on http://{self._httpd.server_address[0]}:{self._httpd.server_address[1]}/events")
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+'''
+****************************************
+* Module functions
+****************************************
+'''
+def helper_build_response(data):
+    # returns (JSON body, ETag)
+    body = json.dumps(data, separators=(",", ":")).encode("utf8")
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def helper_parse_types(types_str):
+    # comma separated event types -> sorted tuple, None: all types
+    if not types_str:
+        return None
+    return tuple(sorted(etype.strip() for etype in types_str.split(",") if etype.strip()))
+
+def helper_parse_time(time_str):
+    # ISO time (local time, e.g. 2024-01-01T10:00 or 2024-01-01 10:00). None: not set
+    if not time_str:
+        return None
+    try:
+        time = datetime.fromisoformat(time_str)
+    except ValueError:
+        raise ValueError(f"invalid time {time_str}")
+    # event times are local times without time zone
+    if time.tzinfo is not None:
+        raise ValueError(f"time zone not supported, use local time {time_str}")
+    return time
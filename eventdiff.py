@@ -0,0 +1,99 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+****************************************
+* Import
+****************************************
+'''
+# logging
+import logging
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger(__name__)
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+# Difference between two event list snapshots. Events are identified by (type, name, start, occurrence) and compared
+# by fingerprint of all event attributes. An event with changed start is reported as removed and added.
+class EventDiff():
+    def __init__(self, added = [], removed = [], changed = []):
+        # added/removed: list of PoGoEvent, changed: list of (old PoGoEvent, new PoGoEvent)
+        self.added = list(added)
+        self.removed = list(removed)
+        self.changed = list(changed)
+
+    def is_empty(self):
+        return not (self.added or self.removed or self.changed)
+
+    def get_affected_events(self):
+        # all added, removed and old and new version of changed events
+        return self.added + self.removed + [event for old_new in self.changed for event in old_new]
+
+    def has_spawn_changes(self):
+        return any(event.has_spawnpoints for event in self.get_affected_events())
+
+    def has_quest_changes(self):
+        return any(event.has_quests for event in self.get_affected_events())
+
+    def has_pokemon_changes(self):
+        return any(event.has_pokemon for event in self.get_affected_events())
+
+    def get_summary(self):
+        if self.is_empty():
+            return "no changes"
+        summary = f"added:{len(self.added)} removed:{len(self.removed)} changed:{len(self.changed)}"
+        names = [f"+{event.name}" for event in self.added] + [f"-{event.name}" for event in self.removed] + [f"~{new_event.name}" for old_event, new_event in self.changed]
+        if names:
+            summary += f" ({', '.join(names[:10])}{', ...' if len(names) > 10 else ''})"
+        return summary
+
+# Fingerprints of last event list, used to compute EventDiff of next event list
+class EventSnapshot():
+    def __init__(self, events = []):
+        # {event key: (fingerprint, PoGoEvent)}
+        self._events = get_event_fingerprints(events)
+
+    def __len__(self):
+        return len(self._events)
+
+    def get_diff(self, events):
+        # returns (EventDiff, EventSnapshot of events)
+        new_snapshot = EventSnapshot()
+        new_snapshot._events = get_event_fingerprints(events)
+        added = []
+        changed = []
+        for event_key, (fingerprint, event) in new_snapshot._events.items():
+            old_entry = self._events.get(event_key, None)
+            if old_entry is None:
+                added.append(event)
+            elif old_entry[0] != fingerprint:
+                changed.append((old_entry[1], event))
+        removed = [event for event_key, (fingerprint, event) in self._events.items() if event_key not in new_snapshot._events]
+        return EventDiff(added, removed, changed), new_snapshot
+
+'''
+****************************************
+* Module functions
+****************************************
+'''
+def get_event_fingerprint(event):
+    return (event.name, event.etype, event.start, event.end, event.has_spawnpoints, event.has_quests, event.has_pokemon, event.bonus_lure_duration, event.spawn_ids)
+
+def get_event_fingerprints(events):
+    # same event (type, name, start) can be listed more than once -> count occurrences
+    fingerprints = {}
+    occurrences = {}
+    for event in events:
+        event_id = (event.etype, event.name, event.start)
+        occurrence = occurrences.get(event_id, 0)
+        occurrences[event_id] = occurrence + 1
+        fingerprints[event_id + (occurrence,)] = (get_event_fingerprint(event), event)
+    return fingerprints
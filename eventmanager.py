@@ -6,16 +6,21 @@
 * Import
 ****************************************
 '''
+# time handling, start of module import for startup time report
+import time
+_import_start_time = time.perf_counter()
 # os functions (path, ...)
 import os
 import sys
+import importlib
 # url handling
 import requests
 # .ini and json parser
 import configparser
 import json
-# time handling
-import time
+import gzip
+import hashlib
+import codecs
 from datetime import datetime, timedelta
 # logging
 import logging
@@ -23,12 +28,17 @@ from logging.handlers import RotatingFileHandler
 # other
 import re
 from string import Template
+from functools import partial, lru_cache
+from array import array
+import itertools
+import threading
 
 # EventManager modules
-from simpletelegramapi import SimpleTelegramApi
-from scannerconnector import MadConnector
-from scannerconnector import RdmConnector
-from scannerconnector import GolbathybridConnector
+from eventscheduler import EventScheduler
+from eventscheduler import EventBoundaryIndex
+from eventdiff import EventSnapshot
+from httpclient import get_http_client, configure_http_client
+from metrics import get_metrics_registry, get_http_latency_lines, get_startup_timer
 
 '''
 ****************************************
@@ -37,6 +47,32 @@ from scannerconnector import GolbathybridConnector
 '''
 DEFAULT_LURE_DURATION = 30
 DEFAULT_TIME = datetime(2030, 1, 1, 0, 0, 0)
+# wake up shortly after event boundary to be sure boundary is inside checked timewindow
+SCHEDULER_WAKEUP_DELAY_S = 1
+SCHEDULER_MIN_SLEEP_S = 1
+POGOINFO_TIME_FORMAT = "%Y-%m-%d %H:%M"
+# same timestamps are used by many events (e.g. hourly events) -> memoize parsed timestamps
+POGOINFO_TIME_CACHE_SIZE = 4096
+# event feed is read and parsed in chunks of this size (characters)
+FEED_CHUNK_SIZE = 64 * 1024
+# quest reset strategies: 'all' (TRUNCATE / API), 'swap' (MAD: replace trs_quest by empty copy), 'filtered' (MAD: delete quests scanned before eventchange)
+QUEST_RESET_STRATEGIES = ["all", "swap", "filtered"]
+# pokemon reset strategies: 'all' (TRUNCATE), 'filtered' (chunked DELETE), 'adaptive' (choose by estimated affected rows)
+POKEMON_RESET_STRATEGIES = ["all", "filtered", "adaptive"]
+# imported on first use (module attribute or helper_lazy_import()): only modules of configured scanner, notifiers and enabled services are loaded
+LAZY_IMPORTS = {
+    "MadConnector": "scannerconnector",
+    "RdmConnector": "scannerconnector",
+    "GolbathybridConnector": "scannerconnector",
+    "SimpleTelegramApi": "simpletelegramapi",
+    "NotificationDispatcher": "notifier",
+    "send_telegram_message": "notifier",
+    "send_discord_webhook": "notifier",
+    "JobQueue": "jobqueue",
+    "StateStore": "statestore",
+    "EventApiServer": "eventapi",
+    "MetricsServer": "metricsserver"
+}
 
 '''
 ****************************************
@@ -44,14 +80,27 @@ DEFAULT_TIME = datetime(2030, 1, 1, 0, 0, 0)
 ****************************************
 '''
 log = logging.getLogger(__name__)
+# time source of helper_time_now() and helper_sleep(), replaceable by set_clock() (e.g. virtual clock of simulator)
+_clock = None
 
 '''
 ****************************************
 * Classes
 ****************************************
 '''
+# Wall clock: local time and real sleep
+class SystemClock():
+    def now(self):
+        return datetime.now()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
 class PoGoEvent():
-    def __init__(self, event_name, event_type, start_datetime, end_datetime, has_spawnpoints, has_quests, has_pokemon, bonus_lure_duration = None):
+    # no per instance __dict__: long event lists (e.g. replay of feed history) need less memory
+    __slots__ = ("name", "etype", "start", "end", "has_spawnpoints", "has_quests", "has_pokemon", "bonus_lure_duration", "spawn_ids")
+
+    def __init__(self, event_name, event_type, start_datetime, end_datetime, has_spawnpoints, has_quests, has_pokemon, bonus_lure_duration = None, spawn_ids = ()):
         self.name = event_name
         self.etype = event_type
         self.start = start_datetime
@@ -60,6 +109,8 @@ class PoGoEvent():
         self.has_quests = has_quests
         self.has_pokemon = has_pokemon
         self.bonus_lure_duration = bonus_lure_duration
+        # tuple of (pokemon id, form id or None) of event spawn pool
+        self.spawn_ids = spawn_ids
 
     def get_dict(self):
         event_as_dict = {
@@ -89,10 +140,10 @@ class PoGoEvent():
             # convert times to datetimes (pogoinfo provide local times)
             # handle unknown eventstart
             if raw_event["start"] is not None:
-                start = datetime.strptime(raw_event["start"], "%Y-%m-%d %H:%M")
+                start = helper_parse_pogoinfo_time(raw_event["start"])
             else:
                 start = None
-            end = datetime.strptime(raw_event["end"], "%Y-%m-%d %H:%M")
+            end = helper_parse_pogoinfo_time(raw_event["end"])
             if end is None:
                 return None
 
@@ -108,7 +159,9 @@ class PoGoEvent():
             # check for changed pokemon spawn pool
             if raw_event["type"] == 'spotlight-hour' or raw_event["type"] == 'community-day' or raw_event["spawns"]:
                 has_pokemon = True
-            return cls(raw_event["name"], event_type, start, end, raw_event["has_spawnpoints"], raw_event["has_quests"], has_pokemon, bonus_lure_duration)
+            # species and forms of spawn pool, used for species filtered pokemon reset
+            spawn_ids = tuple((spawn["id"], spawn.get("form", None)) for spawn in raw_event["spawns"] if isinstance(spawn, dict) and spawn.get("id", None) is not None)
+            return cls(raw_event["name"], event_type, start, end, raw_event["has_spawnpoints"], raw_event["has_quests"], has_pokemon, bonus_lure_duration, spawn_ids)
         except Exception as e:
             log.error("PoGoEvent.fromPogoinfo: error in creating new PoGoEvent object.")
             log.exception("Exception info:")
@@ -129,18 +182,189 @@ class PoGoEvent():
         else:
             return False
 
+# Read-only view of a sorted master event list by index. Category lists (spawn, quest, pokemon) share the
+# event objects and order of the master list instead of copying and sorting them again.
+class PoGoEventView():
+    __slots__ = ("_events", "_indices")
+
+    def __init__(self, events, indices):
+        self._events = events
+        self._indices = array("l", indices)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __iter__(self):
+        events = self._events
+        for index in self._indices:
+            yield events[index]
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._events[index] for index in self._indices[position]]
+        return self._events[self._indices[position]]
+
+# Download of the event feed failed while streaming (connection error or invalid JSON). Cached event list is kept
+class EventFeedInterruptedError(Exception):
+    pass
+
 class PogoInfoEventList():
-    def __init__(self, source_url = "https://raw.githubusercontent.com/ccev/pogoinfo/v2/active/events.json"):
+    def __init__(self, source_url = "https://raw.githubusercontent.com/ccev/pogoinfo/v2/active/events.json", cache_filepath = None, http_client = None):
         self._source_url = source_url
+        self._cache_filepath = cache_filepath
+        self._http_client = http_client if http_client is not None else get_http_client()
+        # HTTP validators of last successful download, used for conditional requests (ETag / If-Modified-Since)
+        self._etag = None
+        self._last_modified = None
+        # last good event list is kept as raw feed: in cache file or, without cache file, in memory
+        self._cache_available = False
+        self._cached_feed = None
+        self._cache_delivered = False
+        self._modified = True
+        self._load_cache()
+
+    def _load_cache(self):
+        # warm start: last good event list from disk can be used, if source is not reachable
+        # cache file: first line HTTP validators as JSON, followed by raw feed
+        if self._cache_filepath is None:
+            return
+        try:
+            with open(self._cache_filepath, "r", encoding="utf8") as f:
+                cache_info = json.loads(f.readline())
+            self._etag = cache_info.get("etag", None)
+            self._last_modified = cache_info.get("last_modified", None)
+            self._cache_available = True
+            log.info(f"PogoInfoEventList: cached event list {self._cache_filepath} available")
+        except FileNotFoundError:
+            log.debug(f"PogoInfoEventList: no cached event list {self._cache_filepath} available")
+        except Exception:
+            log.warning(f"PogoInfoEventList: failed loading cached event list {self._cache_filepath} -> ignore cache")
+            self._etag = None
+            self._last_modified = None
+            self._cache_available = False
+
+    def _iter_cached_feed(self):
+        if self._cache_filepath is None:
+            yield from helper_iter_chunks(self._cached_feed)
+            return
+        with open(self._cache_filepath, "r", encoding="utf8") as f:
+            # skip HTTP validators
+            f.readline()
+            yield from iter(partial(f.read, FEED_CHUNK_SIZE), "")
+
+    def _get_cached_json(self):
+        # cached event list is only reported as modified for first delivery (warm start)
+        self._modified = not self._cache_delivered
+        self._cache_delivered = True
+        return helper_iter_json_array(self._iter_cached_feed())
+
+    def get_cached_json(self):
+        # iterable of raw events of last good event list (None, if no cached event list available)
+        if not self._cache_available:
+            return None
+        return self._get_cached_json()
+
+    def _iter_response_feed(self, response, etag, last_modified):
+        # stream response and write raw feed to temporary cache file. Cache and HTTP validators are only replaced, if feed is complete
+        cache_file = None
+        tmp_filepath = None
+        feed_chunks = []
+        complete = False
+        try:
+            if self._cache_filepath is not None:
+                tmp_filepath = self._cache_filepath + ".tmp"
+                cache_file = open(tmp_filepath, "w", encoding="utf8")
+                cache_file.write(json.dumps({"etag": etag, "last_modified": last_modified}) + "\n")
+            decoder = codecs.getincrementaldecoder("utf8")()
+            for raw_chunk in response.iter_content(chunk_size = FEED_CHUNK_SIZE):
+                chunk = decoder.decode(raw_chunk)
+                if cache_file is not None:
+                    cache_file.write(chunk)
+                else:
+                    feed_chunks.append(chunk)
+                yield chunk
+            chunk = decoder.decode(b"", final=True)
+            if cache_file is not None:
+                cache_file.write(chunk)
+                cache_file.close()
+                os.replace(tmp_filepath, self._cache_filepath)
+            else:
+                feed_chunks.append(chunk)
+                self._cached_feed = "".join(feed_chunks)
+            yield chunk
+            complete = True
+            self._etag = etag
+            self._last_modified = last_modified
+            self._cache_available = True
+        finally:
+            response.close()
+            if cache_file is not None and not complete:
+                cache_file.close()
+                try:
+                    os.remove(tmp_filepath)
+                except OSError:
+                    pass
+
+    def _iter_response_events(self, response, etag, last_modified, cache_delivered):
+        # raw events of streamed response. Errors while streaming reset modified state, caller falls back to cached event list
+        try:
+            yield from helper_iter_json_array(self._iter_response_feed(response, etag, last_modified))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            log.warning(f"PogoInfoEventList: event list download interrupted: {e}")
+            self._modified = False
+            self._cache_delivered = cache_delivered
+            raise EventFeedInterruptedError(f"event list download interrupted: {e}") from e
+
+    def get_fallback_json(self):
+        # cached event list after interrupted download. Only reported as modified, if not delivered before
+        if not self._cache_available:
+            self._modified = False
+            return []
+        log.info("PogoInfoEventList: use cached event list")
+        return self._get_cached_json()
+
+    def is_modified(self):
+        return self._modified
+
+    async def get_json_async(self):
+        # asyncio is only imported by asyncio engine
+        import asyncio
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.get_json)
+
     def get_json(self):
-        json_list = {}
+        # returns iterable of raw events. Request is done immediately, feed is streamed while iterating
+        json_list = []
+        headers = {}
+        # only revalidate, if there is a cached event list to fall back to
+        if self._cache_available:
+            if self._etag is not None:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified is not None:
+                headers["If-Modified-Since"] = self._last_modified
         try:
-            result = requests.get(self._source_url)
-            json_list = result.json()
+            result = self._http_client.get(self._source_url, headers=headers, stream=True)
+            if result.status_code == 304:
+                log.debug("PogoInfoEventList: event list not modified since last request")
+                result.close()
+                return self._get_cached_json()
+            if not result.ok:
+                result.close()
+                result.raise_for_status()
+            cache_delivered = self._cache_delivered
+            self._cache_delivered = True
+            self._modified = True
+            json_list = self._iter_response_events(result, result.headers.get("ETag", None), result.headers.get("Last-Modified", None), cache_delivered)
         except requests.exceptions.RequestException:
             log.warning("Connection issues during get PogoInfoEventList(). Github down?")
+            if self._cache_available:
+                log.info("PogoInfoEventList: use cached event list")
+                json_list = self._get_cached_json()
         except Exception:
             log.exception("Unknown exception in PogoInfoEventList()")
+            if self._cache_available:
+                log.info("PogoInfoEventList: use cached event list")
+                json_list = self._get_cached_json()
         return json_list
 
 class EventManager():
@@ -170,21 +394,68 @@ class EventManager():
         self._last_pokemon_reset_check = helper_time_now()
         self._last_quest_reset_check = helper_time_now()
         self._last_event_update = datetime(2000, 1, 1, 0, 0, 0)
+        self._all_events = []
+        self._spawn_events = []
+        self._quest_events = []
+        self._pokemon_events = []
+        self._scheduler = EventScheduler()
+        self._quest_boundary_index = EventBoundaryIndex()
+        self._pokemon_boundary_index = EventBoundaryIndex()
+        # event lists, boundary indexes and scheduler are replaced by event update, which runs in background on warm start
+        self._event_lock = threading.Lock()
+        # fingerprints of current event list and diff of last event update
+        self._event_snapshot = EventSnapshot()
+        self._last_event_diff = None
+        # scanner event entries need to be written (initially, after spawn event changes and after failed sync)
+        self._scanner_sync_pending = True
+        # content hash of last written .eventcache (without last_update)
+        self._eventcache_hash = None
 
-        self.tz_offset = round((helper_time_now() - datetime.utcnow()).total_seconds() / 3600)
-        self._load_config_parameter()
+        # offset of local time zone (real clock, also for virtual clocks)
+        self.tz_offset = round((datetime.now() - datetime.utcnow()).total_seconds() / 3600)
+        with get_startup_timer().phase("load config"):
+            self._load_config_parameter()
+        self._http_client = get_http_client()
+        self._metrics = get_metrics_registry()
+        self._metrics.set_collector("http", partial(get_http_latency_lines, self._http_client))
+        self._metrics.set_collector("startup", get_startup_timer().get_prometheus_lines)
+        self._metrics_server = None
+        # optional background worker queue for scanner operations
+        self._jobqueue = None
+        # optional durable state (reset check times, performed resets) and event update running in background on warm start
+        self._state_store = None
+        self._background_event_update = None
+        # {reset: {reset key: boundary time}} of detected, not yet successful resets (failed or queued)
+        self._pending_resets = {"pokemon": {}, "quests": {}}
+        self._state_lock = threading.Lock()
+        # optional local HTTP read API for current event data
+        self._event_api = None
+        self._pogo_info_event_list = PogoInfoEventList(cache_filepath = self.__eventcache_path + ".pogoinfocache", http_client = self._http_client)
 
     def _load_config_parameter(self):
         # section [general]: general settings
         self.__sleep = self._config.getint("general", "sleep", fallback=3600)
-        self.__sleep_mainloop_in_s = 60
         self.__delete_events = self._config.getboolean("general", "delete_events", fallback=False)
         self.__language = self._config.get("general", "language", fallback="en").strip()
         self.__eventcache_path = self._config.get("general", "custom_eventcache_path", fallback="").strip()
+        self.__eventcache_gzip = self._config.getboolean("general", "eventcache_gzip", fallback=False)
+        http_connect_timeout = self._config.getfloat("general", "http_connect_timeout", fallback=5)
+        http_read_timeout = self._config.getfloat("general", "http_read_timeout", fallback=30)
+        configure_http_client(http_connect_timeout, http_read_timeout)
         # pokemon reset configuration parameter
         self.__reset_pokemon_enable = self._config.getboolean("general", "reset_pokemon_enable", fallback=False)
         self.__reset_pokemon_strategy = self._config.get("general", "reset_pokemon_strategy", fallback="filtered").strip()
+        if self.__reset_pokemon_strategy not in POKEMON_RESET_STRATEGIES:
+            error_str = f"EventManager: Error while read parameter 'reset_pokemon_strategy' from config.ini. Please check value: {self.__reset_pokemon_strategy} (valid: {', '.join(POKEMON_RESET_STRATEGIES)})"
+            log.error(error_str)
+            raise ValueError(error_str)
+        self.__reset_pokemon_adaptive_truncate_rows = self._config.getint("general", "reset_pokemon_adaptive_truncate_rows", fallback=0)
+        self.__reset_pokemon_adaptive_skip_rows = self._config.getint("general", "reset_pokemon_adaptive_skip_rows", fallback=0)
         self.__reset_pokemon_restart_app = self._config.getboolean("general", "reset_pokemon_restart_app", fallback=False)
+        self.__reset_pokemon_species_filter = self._config.getboolean("general", "reset_pokemon_species_filter", fallback=False)
+        self.__reset_pokemon_chunk_size = self._config.getint("general", "reset_pokemon_chunk_size", fallback=1000)
+        self.__reset_pokemon_chunk_pause = self._config.getfloat("general", "reset_pokemon_chunk_pause", fallback=0.5)
+        self.__reset_pokemon_max_threads_running = self._config.getint("general", "reset_pokemon_max_threads_running", fallback=0)
         # quest reset configuration parameter
         self.__reset_quests_enable = self._config.getboolean("general", "reset_quests_enable", fallback=False)
         reset_for = self._config.get("general", "reset_quests_event_type", fallback="event")
@@ -211,14 +482,32 @@ class EventManager():
             raise ValueError(error_str)
         self.__quest_timewindow_start_h = timewindow_list[0]
         self.__quest_timewindow_end_h = timewindow_list[1]
+        self.__reset_quests_strategy = self._config.get("general", "reset_quests_strategy", fallback="all").strip()
+        if self.__reset_quests_strategy not in QUEST_RESET_STRATEGIES:
+            error_str = f"EventManager: Error while read parameter 'reset_quests_strategy' from config.ini. Please check value: {self.__reset_quests_strategy} (valid: {', '.join(QUEST_RESET_STRATEGIES)})"
+            log.error(error_str)
+            raise ValueError(error_str)
         quests_reset_excludes_str = self._config.get("general", "reset_quests_exclude_events", fallback=None)
         if quests_reset_excludes_str is None:
-            self.__quests_reset_excludes_list = None
+            self.__quests_reset_excludes_regex = None
         else:
-            self.__quests_reset_excludes_list = [quests_reset_exclude.strip() for quests_reset_exclude in quests_reset_excludes_str.split(',')]
+            # all exclude strings in one case insensitive matcher
+            quests_reset_excludes_list = [quests_reset_exclude.strip() for quests_reset_exclude in quests_reset_excludes_str.split(',')]
+            self.__quests_reset_excludes_regex = re.compile("|".join(re.escape(quests_reset_exclude) for quests_reset_exclude in quests_reset_excludes_list), re.IGNORECASE)
 
         # section [scanner]: scanner settings
         self.__cfg_scanner = self._config.get("scanner", "scanner", fallback="mad")
+        if self.__cfg_scanner in ["rdm", "golbathybrid"] and self.__reset_quests_strategy in ["swap", "filtered"]:
+            log.warning(f"EventManager: reset_quests_strategy '{self.__reset_quests_strategy}' is only supported for MAD -> use 'all'")
+            self.__reset_quests_strategy = "all"
+        self.__cfg_db_host = self._config.get("scanner", "db_host", fallback="localhost")
+        self.__cfg_db_port = self._config.getint("scanner", "db_port", fallback=3306)
+        self.__cfg_db_name = self._config.get("scanner", "db_name", fallback=None)
+        self.__cfg_db_user = self._config.get("scanner", "db_user", fallback=None)
+        self.__cfg_db_password = self._config.get("scanner", "db_password", fallback=None)
+        self.__cfg_db_pool_size = self._config.getint("scanner", "db_pool_size", fallback=2)
+        if self.__cfg_scanner in ["rdm", "golbathybrid"] and self.__reset_pokemon_enable and not self.__cfg_db_name:
+            log.warning(f"EventManager: reset_pokemon_enable needs scanner database 'db_name' for scanner '{self.__cfg_scanner}' -> pokemon resets are skipped")
         if self.__cfg_scanner == "rdm":
             self.__cfg_rdm_api_url = self._config.get("scanner", "rdm_api_url", fallback=None)
             self.__cfg_rdm_api_user = self._config.get("scanner", "rdm_api_user", fallback=None)
@@ -234,11 +523,6 @@ class EventManager():
             self.__cfg_golbat_api_secret = self._config.get("scanner", "golbat_api_secret", fallback="")
             #@TODO check parameters for None and raise exception
         else:
-            self.__cfg_db_host = self._config.get("scanner", "db_host", fallback="localhost")
-            self.__cfg_db_port = self._config.getint("scanner", "db_port", fallback=3306)
-            self.__cfg_db_name = self._config.get("scanner", "db_name", fallback=None)
-            self.__cfg_db_user = self._config.get("scanner", "db_user", fallback=None)
-            self.__cfg_db_password = self._config.get("scanner", "db_password", fallback=None)
             #@TODO check parameters for None and raise exception
             mad_reload_ports_str = self._config.get("scanner", "rescan_trigger_madmin_ports", fallback=None)
             if mad_reload_ports_str is None:
@@ -248,6 +532,10 @@ class EventManager():
                 self.__cfg_mad_reload_ports = [mad_reload_port.strip() for mad_reload_port in mad_reload_ports_str.split(',')]
         self.__cfg_scanner_rescan_trigger_cmd = self._config.get("scanner", "rescan_trigger_cmd", fallback=None)
 
+        # parallel Telegram and Discord notifications
+        self.__notification_max_parallel = self._config.getint("general", "notification_max_parallel", fallback=5)
+        self.__notification_max_retries = self._config.getint("general", "notification_max_retries", fallback=2)
+
         # section [telegram]: telegram feature settings
         self.__tg_info_enable = self._config.getboolean("telegram", "tg_info_enable", fallback=False)
         if self.__tg_info_enable:
@@ -276,29 +564,53 @@ class EventManager():
             self.__dc_webook_username = self._config.get("discord", "dc_webhook_username", fallback="PoGo Event Bot")
             self.__dc_webhook_embedTitle = self._config.get("discord", "dc_webhook_embedTitle", fallback="Event Quest notification")
 
+        # section [metrics]: optional prometheus metrics endpoint
+        self.__metrics_enable = self._config.getboolean("metrics", "metrics_enable", fallback=False)
+        self.__metrics_host = self._config.get("metrics", "metrics_host", fallback="127.0.0.1").strip()
+        self.__metrics_port = self._config.getint("metrics", "metrics_port", fallback=9120)
+
+        # section [jobs]: optional background worker queue for scanner operations
+        self.__jobs_enable = self._config.getboolean("jobs", "jobs_enable", fallback=False)
+        self.__jobs_max_workers = self._config.getint("jobs", "jobs_max_workers", fallback=2)
+        self.__jobs_timeout = self._config.getint("jobs", "jobs_timeout", fallback=900)
+        self.__jobs_queue_path = self._config.get("jobs", "jobs_queue_path", fallback=".jobqueue").strip()
+
+        # section [state]: optional durable state for restarts
+        self.__state_enable = self._config.getboolean("state", "state_enable", fallback=False)
+        self.__state_path = self._config.get("state", "state_path", fallback=".eventmanagerstate").strip()
+        self.__state_max_catchup = self._config.getfloat("state", "state_max_catchup", fallback=24)
+
+        # section [eventapi]: optional local HTTP read API
+        self.__eventapi_enable = self._config.getboolean("eventapi", "eventapi_enable", fallback=False)
+        self.__eventapi_host = self._config.get("eventapi", "eventapi_host", fallback="127.0.0.1").strip()
+        self.__eventapi_port = self._config.getint("eventapi", "eventapi_port", fallback=9121)
+
     def _update_event_cache(self):
+        # returns True, if .eventcache was written. Unchanged content is not written again
+        filepath = self.__eventcache_path + ".eventcache"
         try:
             log.debug(f"Eventcache: update .eventcache ...")
-            filepath = self.__eventcache_path + ".eventcache"
-            f = open(filepath, "w")
+            events = []
+            events.append({"all" : [event.get_dict() for event in self._all_events]})
+            events.append({"quests" : [event.get_dict() for event in self._quest_events]})
+            eventcache_hash = hashlib.sha256(json.dumps(events, sort_keys=True).encode("utf8")).hexdigest()
+            if eventcache_hash == self._eventcache_hash and os.path.isfile(filepath):
+                log.debug(f"Eventcache: {filepath} unchanged -> skip update")
+                return False
             eventcache_json = {}
             eventcache_json["last_update"] = f"{helper_time_now().strftime('%Y-%m-%d %H:%M:%S')}"
-            eventcache_json["events"] = []
-            event_list = []
-            for event in self._all_events:
-                event_list.append(event.get_dict())
-            eventcache_json["events"].append({"all" : event_list})
-            event_list = []
-            for event in self._quest_events:
-                event_list.append(event.get_dict())
-            eventcache_json["events"].append({"quests" : event_list})
-            
-            json.dump(eventcache_json, f)
+            eventcache_json["events"] = events
+            # readers (e.g. MAD EventManagerViewerPlugin) always see a complete file
+            helper_write_file_atomic(filepath, json.dumps(eventcache_json).encode("utf8"))
+            if self.__eventcache_gzip:
+                helper_write_file_atomic(filepath + ".gz", gzip.compress(json.dumps(eventcache_json, separators=(",", ":")).encode("utf8")))
+            self._eventcache_hash = eventcache_hash
             log.debug(f"Eventcache: update {filepath}: {eventcache_json}")
-            f.close()
+            return True
         except Exception as e:
             log.error(f"Eventcache: error in update {filepath}")
             log.exception("Exception info:")
+            return False
 
     def _get_timewindow_from_string(self, timewindow_str):
         try:
@@ -341,19 +653,18 @@ class EventManager():
             rescan_str = self._local['tg_questrescan_outside'][self.__language]
         return rescan_str
 
-    def _send_tg_info_questreset(self, event_name, event_change_str, is_request_timewindow):
+    def _get_tg_info_questreset(self, event_name, event_change_str, is_request_timewindow):
+        notifications = []
         if self.__tg_info_enable:
             rescan_str = self._get_local_tg_rescan_msg(is_request_timewindow)
             event_trigger = self._local[event_change_str][self.__language]
             info_msg = Template(self._local['tg_questreset_tmpl'][self.__language]).safe_substitute(event_trigger=event_trigger, event_name=event_name, rescan_str=rescan_str)
             for chat_id in self.__tg_chat_id_list:
-                result = self._api.send_message(chat_id, info_msg)
-                if result["ok"]:
-                    log.info(f"send Telegram info message:{info_msg} result:{result}")
-                else:
-                    log.error(f"send Telegram info message failed with result:{result}")
+                notifications.append((f"Telegram chat:{chat_id}", partial(helper_lazy_import("send_telegram_message"), self._api, chat_id, info_msg)))
+        return notifications
 
-    def _send_dc_info_questreset(self, event_name, event_change_str):
+    def _get_dc_info_questreset(self, event_name, event_change_str):
+        notifications = []
         if self.__dc_info_enable:
             embedUsername = self.__dc_webook_username
             data = {
@@ -368,19 +679,229 @@ class EventManager():
                 "title" : embedTitle
             }]
             for url in self.__dc_webhook_url_list:
-                try:
-                    result = requests.post(url, json = data)
-                    result.raise_for_status()
-                except requests.exceptions.HTTPError as err:
-                    log.error(f"unable to sent Discord info message to url:{url} result:{result.status_code}")
-                else:
-                    log.info(f"send Discord info message:{embedDescription} to url:{url} result:{result.status_code}")
+                notifications.append((f"Discord url:{url}", partial(helper_lazy_import("send_discord_webhook"), self._http_client, url, data)))
+        return notifications
 
-    def _reset_pokemon(self, eventchange_datetime_UTC):
+    def _send_info_questreset(self, crossings, is_request_timewindow):
+        # send Telegram and Discord notifications for all events to all targets in parallel
+        notifications = []
+        for boundary_time, event, kind in crossings:
+            notifications += self._get_tg_info_questreset(event.name, kind, is_request_timewindow)
+            notifications += self._get_dc_info_questreset(event.name, kind)
+        if not notifications:
+            return []
+        with self._metrics.time_stage("notifications"):
+            results = self._notification_dispatcher.dispatch(notifications)
+        for result in results:
+            self._metrics.notifications.inc(result="delivered" if result.delivered else "failed")
+            if result.delivered:
+                log.info(f"send info message to {result.target} result:{result.info} attempts:{result.attempts}")
+            else:
+                log.error(f"send info message to {result.target} failed with result:{result.info} attempts:{result.attempts}")
+        return results
+
+    def _get_reset_pokemon_ids(self, crossings):
+        # species of ended spawn pools. None: reset all species (disabled, event start or spawn pool unknown, e.g. community day without spawn list)
+        # event start: stale pokemon are the replaced non-event species -> no species filter
+        if not self.__reset_pokemon_species_filter:
+            return None
+        pokemon_ids = set()
+        for boundary_time, event, kind in crossings:
+            if kind != "end":
+                return None
+            if not event.spawn_ids:
+                log.info(f"EventManager: no spawn list for event {event.name} ({event.etype}) -> reset pokemon of all species")
+                return None
+            pokemon_ids.update(pokemon_id for pokemon_id, form in event.spawn_ids)
+        return sorted(pokemon_ids)
+
+    def _reset_pokemon(self, eventchange_datetime_UTC, pokemon_ids = None):
+        # returns True, if reset is successful
+        if self.__reset_pokemon_strategy == "filtered":
+            with self._metrics.time_connector_call(self.__cfg_scanner, "reset_filtered_pokemon"):
+                result = self._scannerconnector.reset_filtered_pokemon(eventchange_datetime_UTC, pokemon_ids = pokemon_ids)
+        elif self.__reset_pokemon_strategy == "adaptive":
+            with self._metrics.time_connector_call(self.__cfg_scanner, "reset_adaptive_pokemon"):
+                result = self._scannerconnector.reset_adaptive_pokemon(eventchange_datetime_UTC, pokemon_ids = pokemon_ids, truncate_min_rows = self.__reset_pokemon_adaptive_truncate_rows, skip_max_rows = self.__reset_pokemon_adaptive_skip_rows)
+        else:
+            with self._metrics.time_connector_call(self.__cfg_scanner, "reset_all_pokemon"):
+                result = self._scannerconnector.reset_all_pokemon()
+        return helper_is_reset_successful(result)
+
+    async def _reset_pokemon_async(self, eventchange_datetime_UTC, pokemon_ids = None):
         if self.__reset_pokemon_strategy == "filtered":
-            self._scannerconnector.reset_filtered_pokemon(eventchange_datetime_UTC)
+            with self._metrics.time_connector_call(self.__cfg_scanner, "reset_filtered_pokemon"):
+                result = await self._scannerconnector.reset_filtered_pokemon_async(eventchange_datetime_UTC, pokemon_ids = pokemon_ids)
+        elif self.__reset_pokemon_strategy == "adaptive":
+            with self._metrics.time_connector_call(self.__cfg_scanner, "reset_adaptive_pokemon"):
+                result = await self._scannerconnector.reset_adaptive_pokemon_async(eventchange_datetime_UTC, pokemon_ids = pokemon_ids, truncate_min_rows = self.__reset_pokemon_adaptive_truncate_rows, skip_max_rows = self.__reset_pokemon_adaptive_skip_rows)
         else:
-            self._scannerconnector.reset_all_pokemon()
+            with self._metrics.time_connector_call(self.__cfg_scanner, "reset_all_pokemon"):
+                result = await self._scannerconnector.reset_all_pokemon_async()
+        return helper_is_reset_successful(result)
+
+    def _reset_quests(self, eventchange_datetime_UTC):
+        # returns True, if reset is successful
+        if self.__reset_quests_strategy == "filtered":
+            with self._metrics.time_connector_call(self.__cfg_scanner, "reset_filtered_quests"):
+                result = self._scannerconnector.reset_filtered_quests(eventchange_datetime_UTC)
+        else:
+            with self._metrics.time_connector_call(self.__cfg_scanner, "reset_all_quests"):
+                result = self._scannerconnector.reset_all_quests()
+        return helper_is_reset_successful(result)
+
+    async def _reset_quests_async(self, eventchange_datetime_UTC):
+        if self.__reset_quests_strategy == "filtered":
+            with self._metrics.time_connector_call(self.__cfg_scanner, "reset_filtered_quests"):
+                result = await self._scannerconnector.reset_filtered_quests_async(eventchange_datetime_UTC)
+        else:
+            with self._metrics.time_connector_call(self.__cfg_scanner, "reset_all_quests"):
+                result = await self._scannerconnector.reset_all_quests_async()
+        return helper_is_reset_successful(result)
+
+    def _perform_pokemon_reset(self, eventchange_datetime_UTC, pokemon_ids, boundary_time):
+        with self._metrics.time_stage("reset_pokemon"):
+            successful = self._reset_pokemon(eventchange_datetime_UTC, pokemon_ids = pokemon_ids)
+        self._observe_reset("pokemon", boundary_time, successful)
+        return successful
+
+    def _perform_quest_reset(self, eventchange_datetime_UTC, boundary_time, trigger_rescan):
+        with self._metrics.time_stage("reset_quests"):
+            successful = self._reset_quests(eventchange_datetime_UTC)
+        self._observe_reset("quests", boundary_time, successful)
+        if trigger_rescan:
+            with self._metrics.time_stage("trigger_rescan"), self._metrics.time_connector_call(self.__cfg_scanner, "trigger_rescan"):
+                self._scannerconnector.trigger_rescan()
+        return successful
+
+    def _job_reset_pokemon(self, eventchange, pokemon_ids, boundary, resets = None):
+        # job handler: datetimes as ISO strings (persisted job queue). Failed reset -> job failed, not stored as performed
+        if self._is_reset_performed("pokemon", resets):
+            log.info(f"EventManager: pokemon reset for eventchange {eventchange} UTC already performed -> skip")
+            return
+        if not self._perform_pokemon_reset(datetime.fromisoformat(eventchange), pokemon_ids, datetime.fromisoformat(boundary)):
+            raise RuntimeError(f"pokemon reset for eventchange {eventchange} UTC failed")
+        self._record_resets("pokemon", resets or [])
+
+    def _job_reset_quests(self, eventchange, boundary, trigger_rescan, resets = None):
+        if self._is_reset_performed("quests", resets):
+            log.info(f"EventManager: quest reset for eventchange {eventchange} UTC already performed -> skip")
+            return
+        if not self._perform_quest_reset(datetime.fromisoformat(eventchange), datetime.fromisoformat(boundary), trigger_rescan):
+            raise RuntimeError(f"quest reset for eventchange {eventchange} UTC failed")
+        self._record_resets("quests", resets or [])
+
+    def _job_update_spawn_events(self):
+        self._update_spawn_events_in_scanner()
+
+    def _start_jobqueue(self):
+        self._jobqueue = helper_lazy_import("JobQueue")(max_workers = self.__jobs_max_workers, timeout_s = self.__jobs_timeout, persist_path = self.__jobs_queue_path or None)
+        self._jobqueue.register("reset_pokemon", self._job_reset_pokemon)
+        self._jobqueue.register("reset_quests", self._job_reset_quests)
+        self._jobqueue.register("update_spawn_events", self._job_update_spawn_events)
+        self._metrics.set_collector("jobs", self._jobqueue.get_prometheus_lines)
+        self._jobqueue.start()
+
+    def get_job_status(self):
+        # number of pending, running and finished jobs of background worker queue (None, if disabled)
+        if self._jobqueue is None:
+            return None
+        return self._jobqueue.get_status()
+
+    def _update_spawn_events(self):
+        # scanner update in background worker queue, if enabled and needed
+        if self._jobqueue is not None and self._scanner_sync_pending:
+            self._jobqueue.submit("update_spawn_events")
+        else:
+            self._update_spawn_events_in_scanner()
+
+    def _observe_reset(self, reset, boundary_time, successful):
+        # failed reset: stage error. Successful reset: lag between first detected event boundary and completed reset
+        if not successful:
+            self._metrics.stage_errors.inc(stage=f"reset_{reset}")
+            self._metrics.resets.inc(reset=reset, result="failed")
+            return
+        lag_s = (helper_time_now() - boundary_time).total_seconds()
+        self._metrics.reset_lag.observe(max(lag_s, 0), reset=reset)
+        self._metrics.resets.inc(reset=reset, result="successful")
+        log.debug(f"EventManager: {reset} reset completed {lag_s:.1f}s after event boundary")
+
+    def _load_state(self):
+        # resume reset checks from last stored check time, so boundaries during a restart are caught up (limited to state_max_catchup)
+        self._state_store = helper_lazy_import("StateStore")(self.__state_path)
+        now = helper_time_now()
+        catchup_limit = now - timedelta(hours=self.__state_max_catchup)
+        last_check = self._state_store.get_datetime("last_pokemon_reset_check")
+        if last_check is not None:
+            self._last_pokemon_reset_check = min(max(last_check, catchup_limit), now)
+            log.info(f"EventManager: resume pokemon reset check from {self._last_pokemon_reset_check}")
+        last_check = self._state_store.get_datetime("last_quest_reset_check")
+        if last_check is not None:
+            self._last_quest_reset_check = min(max(last_check, catchup_limit), now)
+            log.info(f"EventManager: resume quest reset check from {self._last_quest_reset_check}")
+
+    def _add_pending_resets(self, reset, resets):
+        # detected resets, stored check time stays before their boundary until they are successful
+        if self._state_store is None:
+            return
+        with self._state_lock:
+            for boundary, event_name, kind in resets:
+                self._pending_resets[reset][(boundary, event_name, kind)] = datetime.fromisoformat(boundary)
+
+    def _record_resets(self, reset, resets):
+        # store successful resets. resets: [boundary time (ISO), event name, kind] of reset boundaries
+        if self._state_store is None:
+            return
+        with self._state_lock:
+            for boundary, event_name, kind in resets:
+                self._pending_resets[reset].pop((boundary, event_name, kind), None)
+                self._state_store.add_reset(reset, datetime.fromisoformat(boundary), event_name, kind)
+        self._save_state()
+
+    def _is_reset_performed(self, reset, resets):
+        # all boundaries of reset job are already reset (e.g. persisted job and catch up after restart)
+        if self._state_store is None or not resets:
+            return False
+        return all(self._state_store.is_reset_performed(reset, datetime.fromisoformat(boundary), event_name, kind) for boundary, event_name, kind in resets)
+
+    def _get_stored_reset_check(self, reset, last_check):
+        # stored check time only passes a boundary after its reset was successful: failed and queued resets are caught up after restart
+        with self._state_lock:
+            pending_boundaries = list(self._pending_resets[reset].values())
+        if not pending_boundaries:
+            return last_check
+        return min(last_check, min(pending_boundaries) - timedelta(microseconds=1))
+
+    def _save_state(self):
+        # store check times
+        if self._state_store is None:
+            return
+        self._state_store.set_datetime("last_pokemon_reset_check", self._get_stored_reset_check("pokemon", self._last_pokemon_reset_check))
+        self._state_store.set_datetime("last_quest_reset_check", self._get_stored_reset_check("quests", self._last_quest_reset_check))
+        self._state_store.save()
+
+    def _filter_performed_resets(self, reset, crossings):
+        # boundaries, which are already reset before restart, are not reset again
+        if self._state_store is None:
+            return crossings
+        return [(boundary_time, event, kind) for boundary_time, event, kind in crossings if not self._state_store.is_reset_performed(reset, boundary_time, event.name, kind)]
+
+    def _get_expired_events_limit(self, now):
+        # events ended before this time are sorted out. Resumed from durable state: keep events ended since last reset check,
+        # so their end boundary is caught up
+        if self._state_store is None:
+            return now
+        last_checks = [now]
+        if self.__reset_pokemon_enable:
+            last_checks.append(self._last_pokemon_reset_check)
+        if self.__reset_quests_enable:
+            last_checks.append(self._last_quest_reset_check)
+        return min(last_checks)
+
+    def _get_pokemon_reset_crossings(self, now):
+        with self._event_lock:
+            boundary_index = self._pokemon_boundary_index
+        return self._filter_performed_resets("pokemon", boundary_index.get_crossings(self._last_pokemon_reset_check, now))
 
     def _check_pokemon_resets(self):
         log.info("check pokemon changing events")
@@ -388,180 +909,386 @@ class EventManager():
             #get current time to check for event start and event end
             now = helper_time_now()
 
-            # check, if one of the pokemon event is just started or ended
-            for event in self._pokemon_events:
-                # event start during last check?
-                if event.check_event_start(self._last_pokemon_reset_check, now):
-                    log.info(f'EventManager: event start detected for event {event.name} ({event.etype}) -> reset pokemon')
-                    # remove pokemon from MAD DB, which are scanned before event start and needs to be rescanned, adapt time from local to UTC time
-                    self._reset_pokemon(event.start - timedelta(hours=self.tz_offset))
-                    break
-                # event end during last check?
-                if event.check_event_end(self._last_pokemon_reset_check, now):
-                    log.info(f'EventManager: event end detected for event {event.name} ({event.etype}) -> reset pokemon')
-                    # remove pokemon from MAD DB, which are scanned before event end and needs to be rescanned, adapt time from local to UTC time
-                    self._reset_pokemon(event.end - timedelta(hours=self.tz_offset))
-                    break
+            # get all pokemon events, which started or ended since last check
+            crossings = self._get_pokemon_reset_crossings(now)
+            if crossings:
+                for boundary_time, event, kind in crossings:
+                    log.info(f'EventManager: event {kind} detected for event {event.name} ({event.etype}) -> reset pokemon')
+                # one reset for all events: remove pokemon from MAD DB, which are scanned before latest event change and needs to be rescanned, adapt time from local to UTC time
+                eventchange_datetime_UTC = crossings[-1][0] - timedelta(hours=self.tz_offset)
+                pokemon_ids = self._get_reset_pokemon_ids(crossings)
+                resets = helper_get_reset_keys(crossings)
+                self._add_pending_resets("pokemon", resets)
+                if self._jobqueue is not None:
+                    self._jobqueue.submit("reset_pokemon", eventchange = eventchange_datetime_UTC.isoformat(), pokemon_ids = pokemon_ids, boundary = crossings[0][0].isoformat(), resets = resets)
+                elif self._perform_pokemon_reset(eventchange_datetime_UTC, pokemon_ids, crossings[0][0]):
+                    self._record_resets("pokemon", resets)
             self._last_pokemon_reset_check = now
+            self._save_state()
         except Exception as e:
                     log.error("Error while checking Pokemon Resets.")
                     log.exception("Exception info:")
 
+    async def _check_pokemon_resets_async(self):
+        log.info("check pokemon changing events")
+        try:
+            now = helper_time_now()
+            crossings = self._get_pokemon_reset_crossings(now)
+            if crossings:
+                for boundary_time, event, kind in crossings:
+                    log.info(f'EventManager: event {kind} detected for event {event.name} ({event.etype}) -> reset pokemon')
+                eventchange_datetime_UTC = crossings[-1][0] - timedelta(hours=self.tz_offset)
+                pokemon_ids = self._get_reset_pokemon_ids(crossings)
+                resets = helper_get_reset_keys(crossings)
+                self._add_pending_resets("pokemon", resets)
+                if self._jobqueue is not None:
+                    self._jobqueue.submit("reset_pokemon", eventchange = eventchange_datetime_UTC.isoformat(), pokemon_ids = pokemon_ids, boundary = crossings[0][0].isoformat(), resets = resets)
+                else:
+                    with self._metrics.time_stage("reset_pokemon"):
+                        successful = await self._reset_pokemon_async(eventchange_datetime_UTC, pokemon_ids = pokemon_ids)
+                    self._observe_reset("pokemon", crossings[0][0], successful)
+                    if successful:
+                        self._record_resets("pokemon", resets)
+            self._last_pokemon_reset_check = now
+            self._save_state()
+        except Exception as e:
+            log.error("Error while checking Pokemon Resets.")
+            log.exception("Exception info:")
+
+    def _get_quest_reset_crossings(self, now):
+        # only event types and boundaries (start/end), which are configurated for quest reset
+        crossings = []
+        with self._event_lock:
+            boundary_index = self._quest_boundary_index
+        for boundary_time, event, kind in boundary_index.get_crossings(self._last_quest_reset_check, now):
+            if kind in self.__quests_reset_types.get(event.etype, []):
+                crossings.append((boundary_time, event, kind))
+        return self._filter_performed_resets("quests", crossings)
+
     def _check_quest_resets(self):
         log.info("check quest changing events")
         try:
             #get current time to check for event start and event end
             now = helper_time_now()
 
-            # check, if one of the pokemon event is just started or ended
-            for event in self._quest_events:
-                # event starts during last check?
-                if "start" in self.__quests_reset_types.get(event.etype, []):
-                    if event.check_event_start(self._last_quest_reset_check, now):
-                        log.info(f'EventManager: event start detected for event {event.name} ({event.etype}) -> reset quests')
-                        # remove all quests from MAD DB
-                        self._scannerconnector.reset_all_quests()
-                        is_request_timewindow = self._is_inside_request_timewindow()
-                        if is_request_timewindow:
-                            self._scannerconnector.trigger_rescan()
-                        self._send_tg_info_questreset(event.name, "start", is_request_timewindow)
-                        self._send_dc_info_questreset(event.name, "start",)
-                        break
-                # event end during last check?
-                if "end" in self.__quests_reset_types.get(event.etype, []):
-                    if event.check_event_end(self._last_quest_reset_check, now):
-                        log.info(f'EventManager: event end detected for event {event.name} ({event.etype}) -> reset quests')
-                        # remove all quests from MAD DB
-                        self._scannerconnector.reset_all_quests()
-                        is_request_timewindow = self._is_inside_request_timewindow()
-                        if is_request_timewindow:
-                            self._scannerconnector.trigger_rescan()
-                        self._send_tg_info_questreset(event.name, "end", is_request_timewindow)
-                        self._send_dc_info_questreset(event.name, "end")
-                        break
+            # get all quest events, which started or ended since last check
+            crossings = self._get_quest_reset_crossings(now)
+            if crossings:
+                for boundary_time, event, kind in crossings:
+                    log.info(f'EventManager: event {kind} detected for event {event.name} ({event.etype}) -> reset quests')
+                # one reset and rescan for all events: remove quests from MAD DB (all or scanned before latest event change), adapt time from local to UTC time
+                eventchange_datetime_UTC = crossings[-1][0] - timedelta(hours=self.tz_offset)
+                is_request_timewindow = self._is_inside_request_timewindow()
+                resets = helper_get_reset_keys(crossings)
+                self._add_pending_resets("quests", resets)
+                if self._jobqueue is not None:
+                    self._jobqueue.submit("reset_quests", eventchange = eventchange_datetime_UTC.isoformat(), boundary = crossings[0][0].isoformat(), trigger_rescan = is_request_timewindow, resets = resets)
+                elif self._perform_quest_reset(eventchange_datetime_UTC, crossings[0][0], is_request_timewindow):
+                    self._record_resets("quests", resets)
+                self._send_info_questreset(crossings, is_request_timewindow)
+            self._last_quest_reset_check = now
+            self._save_state()
+        except Exception as e:
+            log.error("Error while checking Quest Resets.")
+            log.exception("Exception info:")
+
+    async def _send_info_questreset_async(self, crossings, is_request_timewindow):
+        notifications = []
+        for boundary_time, event, kind in crossings:
+            notifications += self._get_tg_info_questreset(event.name, kind, is_request_timewindow)
+            notifications += self._get_dc_info_questreset(event.name, kind)
+        if not notifications:
+            return []
+        with self._metrics.time_stage("notifications"):
+            results = await self._notification_dispatcher.dispatch_async(notifications)
+        for result in results:
+            self._metrics.notifications.inc(result="delivered" if result.delivered else "failed")
+            if result.delivered:
+                log.info(f"send info message to {result.target} result:{result.info} attempts:{result.attempts}")
+            else:
+                log.error(f"send info message to {result.target} failed with result:{result.info} attempts:{result.attempts}")
+        return results
+
+    async def _check_quest_resets_async(self):
+        import asyncio
+        log.info("check quest changing events")
+        try:
+            now = helper_time_now()
+            crossings = self._get_quest_reset_crossings(now)
+            if crossings:
+                for boundary_time, event, kind in crossings:
+                    log.info(f'EventManager: event {kind} detected for event {event.name} ({event.etype}) -> reset quests')
+                eventchange_datetime_UTC = crossings[-1][0] - timedelta(hours=self.tz_offset)
+                is_request_timewindow = self._is_inside_request_timewindow()
+                resets = helper_get_reset_keys(crossings)
+                self._add_pending_resets("quests", resets)
+                if self._jobqueue is not None:
+                    self._jobqueue.submit("reset_quests", eventchange = eventchange_datetime_UTC.isoformat(), boundary = crossings[0][0].isoformat(), trigger_rescan = is_request_timewindow, resets = resets)
+                    await self._send_info_questreset_async(crossings, is_request_timewindow)
+                else:
+                    with self._metrics.time_stage("reset_quests"):
+                        successful = await self._reset_quests_async(eventchange_datetime_UTC)
+                    self._observe_reset("quests", crossings[0][0], successful)
+                    if successful:
+                        self._record_resets("quests", resets)
+                    # rescan trigger and notifications are independent -> run in parallel
+                    tasks = [self._send_info_questreset_async(crossings, is_request_timewindow)]
+                    if is_request_timewindow:
+                        tasks.append(self._trigger_rescan_async())
+                    await asyncio.gather(*tasks)
             self._last_quest_reset_check = now
+            self._save_state()
         except Exception as e:
             log.error("Error while checking Quest Resets.")
             log.exception("Exception info:")
 
+    async def _trigger_rescan_async(self):
+        with self._metrics.time_stage("trigger_rescan"), self._metrics.time_connector_call(self.__cfg_scanner, "trigger_rescan"):
+            await self._scannerconnector.trigger_rescan_async()
+
+    def _get_scanner_events(self):
+        # go through all events that boost spawns and get wanted scanner db entry for each event type
+        events = []
+        updated_mad_events = []
+        for event in self._spawn_events:
+            if event.etype not in updated_mad_events:
+                #handle unknown eventstart
+                if event.start is None:
+                    continue
+                event_start = event.start.strftime('%Y-%m-%d %H:%M:%S')
+                event_end = event.end.strftime('%Y-%m-%d %H:%M:%S')
+                event_lure_duration = event.bonus_lure_duration if event.bonus_lure_duration is not None else DEFAULT_LURE_DURATION
+                event_name = self.type_to_name.get(event.etype, "Others")
+                events.append((event_name, event_start, event_end, event_lure_duration))
+                updated_mad_events.append(event.etype)
+
+        # missing event entries in the db are created with default values
+        event_names = [event[0] for event in events]
+        default_events = []
+        for event_type_name in self.type_to_name.values():
+            if event_type_name not in event_names:
+                default_events.append((event_type_name, DEFAULT_TIME, DEFAULT_TIME, DEFAULT_LURE_DURATION))
+
+        return events, default_events
+
     def _update_spawn_events_in_scanner(self):
         log.info("Check spawnpoint changing events")
+        if not self._scanner_sync_pending:
+            log.info("Spawn events not changed since last scanner update -> skip scanner update")
+            return True
         try:
-            # read current event entries from scanner db
-            db_events = self._scannerconnector.get_events()
-            events_in_db = {}
-            for db_event in db_events:
-                events_in_db[db_event["event_name"]] = {
-                    "event_start": db_event["event_start"],
-                    "event_end": db_event["event_end"]
-                }
-
-            # check if there are missing event entries in the db and if so, create them
-            for event_type_name in self.type_to_name.values():
-                if event_type_name not in events_in_db.keys():
-                    self._scannerconnector.insert_event(event_type_name, DEFAULT_TIME, DEFAULT_TIME, DEFAULT_LURE_DURATION)
-                    events_in_db[event_type_name] = {
-                        "event_start": DEFAULT_TIME,
-                        "event_end": DEFAULT_TIME
-                    }
-
-            # go through all events that boost spawns, check if their times differ from the event in the db
-            # and if so, update the db accordingly
-            updated_mad_events = []
-            for event in self._spawn_events:
-                if event.etype not in updated_mad_events:
-                    type_name = self.type_to_name.get(event.etype, "Others")
-                    db_entry = events_in_db[type_name]
-                    #handle unknown eventstart
-                    if event.start is None:
-                        continue
-                    if db_entry["event_start"] != event.start or db_entry["event_end"] != event.end:
-                        event_start = event.start.strftime('%Y-%m-%d %H:%M:%S')
-                        event_end = event.end.strftime('%Y-%m-%d %H:%M:%S')
-                        event_lure_duration = event.bonus_lure_duration if event.bonus_lure_duration is not None else DEFAULT_LURE_DURATION
-                        event_name = self.type_to_name.get(event.etype, "Others")
-                        self._scannerconnector.update_event(event_name, event_start, event_end, event_lure_duration)
-
-                    updated_mad_events.append(event.etype)
-
-            # just deletes all events that aren't part of EventManager
-            if self.__delete_events:
-                for db_event_name in events_in_db:
-                    if not db_event_name in self.type_to_name.values():
-                        self._scannerconnector.delete_event(db_event_name)
+            events, default_events = self._get_scanner_events()
+            # write all entries at once, delete events that aren't part of EventManager, if enabled
+            with self._metrics.time_stage("update_spawn_events_in_scanner"), self._metrics.time_connector_call(self.__cfg_scanner, "sync_events"):
+                result = self._scannerconnector.sync_events(events, default_events, delete_others=self.__delete_events)
+            # failed sync is repeated with next event update
+            self._scanner_sync_pending = not result
+            if not result:
+                self._metrics.stage_errors.inc(stage="update_spawn_events_in_scanner")
+            return result
+        except Exception as e:
+            log.error("Error while checking Spawn Events.")
+            log.exception("Exception info:")
+            return False
 
+    async def _update_spawn_events_in_scanner_async(self):
+        log.info("Check spawnpoint changing events")
+        if not self._scanner_sync_pending:
+            log.info("Spawn events not changed since last scanner update -> skip scanner update")
+            return True
+        try:
+            events, default_events = self._get_scanner_events()
+            with self._metrics.time_stage("update_spawn_events_in_scanner"), self._metrics.time_connector_call(self.__cfg_scanner, "sync_events"):
+                result = await self._scannerconnector.sync_events_async(events, default_events, delete_others=self.__delete_events)
+            self._scanner_sync_pending = not result
+            if not result:
+                self._metrics.stage_errors.inc(stage="update_spawn_events_in_scanner")
+            return result
         except Exception as e:
             log.error("Error while checking Spawn Events.")
             log.exception("Exception info:")
+            return False
+
+    def get_last_event_diff(self):
+        # EventDiff of last processed event list (None, if no event list was processed yet)
+        return self._last_event_diff
 
     def _get_events(self):
         log.info("Update event list from external")
         try:
             # get the event list from github
-            pogo_info_event_list = PogoInfoEventList()
-            raw_events = pogo_info_event_list.get_json()
-            self._all_events = []
-            self._spawn_events = []
-            self._quest_events = []
-            self._pokemon_events = []
-
-            # sort out events that have ended, bring them into a format that's easier to work with
-            # and put them into seperate lists depending if they boost spawns or reset quests
-            # then sort those after their start time
-            for raw_event in raw_events:
-                log.debug(f"_get_events: handling new raw_event:{raw_event}")
-                new_event = PoGoEvent.fromPogoinfo(raw_event)
-                # sort out invalid or outdated events
-                if new_event is None:
-                    continue
-                if new_event.end < helper_time_now():
-                    continue
-                # store valid events
-                self._all_events.append(new_event)
-                # get events with changed spawnpoints
-                # TBD: check how to handle events with just bonus_lure_duration. Hint: MAD ignores lure_duration setting for event 'DEFAULT' (see function _extract_args_single_stop)
-                if new_event.has_spawnpoints:
-                    self._spawn_events.append(new_event)
-                # get events with changed quests
-                if new_event.has_quests:
-                    exclude_event = False
-                    if self.__quests_reset_excludes_list is not None:
-                        #exclude events according exclude strings from configuration
-                        for quests_reset_excludes in self.__quests_reset_excludes_list:
-                            if new_event.name.lower().find(quests_reset_excludes.lower()) != -1:
-                                log.info(f"skipped quest event {new_event.name}, because matching exclude string '{quests_reset_excludes}'")
-                                exclude_event = True
-                                break
-                    if not exclude_event:
-                        self._quest_events.append(new_event)
-                # get events which has changed pokemon pool
-                if new_event.has_pokemon:
-                    self._pokemon_events.append(new_event)
-
-            #sort pokemon lists
-            self._quest_events = sorted(self._quest_events, key=lambda e: (e.start is None, e.start))
-            self._spawn_events = sorted(self._spawn_events, key=lambda e: (e.start is None, e.start))
-            self._pokemon_events = sorted(self._pokemon_events, key=lambda e: (e.start is None, e.start))
-            self._all_events = sorted(self._all_events, key=lambda e: (e.start is None, e.start))
-            self._update_event_cache()
+            with self._metrics.time_stage("get_events"):
+                raw_events = self._pogo_info_event_list.get_json()
+                self._process_raw_events(raw_events)
         except Exception as e:
             log.error("Error while getting events.")
             log.exception("Exception info:")
 
+    async def _get_events_async(self):
+        import asyncio
+        log.info("Update event list from external")
+        try:
+            with self._metrics.time_stage("get_events"):
+                raw_events = await self._pogo_info_event_list.get_json_async()
+                # event feed is streamed while processing -> don't block event loop
+                await asyncio.get_event_loop().run_in_executor(None, self._process_raw_events, raw_events)
+        except Exception as e:
+            log.error("Error while getting events.")
+            log.exception("Exception info:")
+
+    def _parse_raw_events(self, raw_events):
+        # pipeline stage: bring raw events into a format that's easier to work with, sort out invalid events
+        # formatting every raw event is expensive for long feeds -> only if debug logging is enabled
+        log_raw_events = log.isEnabledFor(logging.DEBUG)
+        for raw_event in raw_events:
+            if log_raw_events:
+                log.debug(f"_get_events: handling new raw_event:{raw_event}")
+            new_event = PoGoEvent.fromPogoinfo(raw_event)
+            if new_event is not None:
+                yield new_event
+
+    def _filter_expired_events(self, events, now):
+        # pipeline stage: sort out events that have ended
+        for event in events:
+            if event.end >= now:
+                yield event
+
+    def _is_quest_reset_excluded(self, event):
+        #exclude events according exclude strings from configuration
+        if self.__quests_reset_excludes_regex is None:
+            return False
+        match = self.__quests_reset_excludes_regex.search(event.name)
+        if match is None:
+            return False
+        log.info(f"skipped quest event {event.name}, because matching exclude string '{match.group(0)}'")
+        return True
+
+    def load_events_from_file(self, filepath):
+        # process archived event feed (JSON array, optional gzip compressed) instead of event feed from github
+        self._process_raw_events(helper_iter_json_array_file(filepath), check_modified = False)
+
+    def _process_raw_events(self, raw_events, check_modified = True):
+        if check_modified and not self._pogo_info_event_list.is_modified():
+            log.info("Event list not modified since last update -> skip event update")
+            return
+        spawn_indices = []
+        quest_indices = []
+        pokemon_indices = []
+
+        # streaming pipeline: raw events are parsed and filtered one by one, only valid events are kept
+        # then sort them after their start time
+        now = helper_time_now()
+        expired_limit = self._get_expired_events_limit(now)
+        try:
+            all_events = list(self._filter_expired_events(self._parse_raw_events(raw_events), expired_limit))
+        except EventFeedInterruptedError:
+            raw_events = self._pogo_info_event_list.get_fallback_json()
+            if not self._pogo_info_event_list.is_modified():
+                log.info("Event list download interrupted, cached event list not modified -> skip event update")
+                return
+            all_events = list(self._filter_expired_events(self._parse_raw_events(raw_events), expired_limit))
+        all_events.sort(key=lambda e: (e.start is None, e.start))
+
+        # compare with last event list: only changed parts are updated
+        event_diff, self._event_snapshot = self._event_snapshot.get_diff(all_events)
+        self._last_event_diff = event_diff
+        log.info(f"Event list update: {event_diff.get_summary()}")
+        if event_diff.is_empty():
+            return
+
+        # put them into seperate index views depending if they boost spawns or reset quests
+        for index, new_event in enumerate(all_events):
+            # get events with changed spawnpoints
+            # TBD: check how to handle events with just bonus_lure_duration. Hint: MAD ignores lure_duration setting for event 'DEFAULT' (see function _extract_args_single_stop)
+            # ended events (kept for reset catch up) are not synced to scanner
+            if new_event.has_spawnpoints and new_event.end >= now:
+                spawn_indices.append(index)
+            # get events with changed quests
+            if new_event.has_quests and not self._is_quest_reset_excluded(new_event):
+                quest_indices.append(index)
+            # get events which has changed pokemon pool
+            if new_event.has_pokemon:
+                pokemon_indices.append(index)
+
+        spawn_events = PoGoEventView(all_events, spawn_indices)
+        quest_events = PoGoEventView(all_events, quest_indices)
+        pokemon_events = PoGoEventView(all_events, pokemon_indices)
+        quest_boundary_index = EventBoundaryIndex(quest_events) if event_diff.has_quest_changes() else None
+        pokemon_boundary_index = EventBoundaryIndex(pokemon_events) if event_diff.has_pokemon_changes() else None
+        # replace event lists, boundary indexes and scheduler boundaries together: reset checks see old or new event list
+        with self._event_lock:
+            self._all_events = all_events
+            self._spawn_events = spawn_events
+            self._quest_events = quest_events
+            self._pokemon_events = pokemon_events
+            if quest_boundary_index is not None:
+                self._quest_boundary_index = quest_boundary_index
+            if pokemon_boundary_index is not None:
+                self._pokemon_boundary_index = pokemon_boundary_index
+            if event_diff.has_spawn_changes():
+                self._scanner_sync_pending = True
+            if event_diff.has_quest_changes() or event_diff.has_pokemon_changes() or event_diff.has_spawn_changes():
+                self._scheduler.update(itertools.chain(quest_events, pokemon_events, spawn_events))
+        self._update_event_cache()
+        if self._event_api is not None:
+            self._event_api.update(self._all_events, self._quest_events, self._pokemon_events, self._spawn_events, helper_time_now().strftime('%Y-%m-%d %H:%M:%S'))
+
+    def _warm_start(self):
+        # use cached event list and update event list in background. Returns False, if no cached event list available
+        cached_events = self._pogo_info_event_list.get_cached_json()
+        if cached_events is None:
+            return False
+        log.info("EventManager: warm start with cached event list, update event list in background")
+        self._process_raw_events(cached_events, check_modified = False)
+        self._background_event_update = threading.Thread(target = self._update_events_and_scanner, name = "event-update", daemon = True)
+        self._background_event_update.start()
+        return True
+
+    def _update_events_and_scanner(self):
+        self._get_events()
+        self._update_spawn_events()
+
+    def _is_event_update_running(self):
+        return self._background_event_update is not None and self._background_event_update.is_alive()
+
     def connect(self):
+        startup_timer = get_startup_timer()
+        with startup_timer.phase("init scanner connector"):
+            self._init_scanner_connector()
+        with startup_timer.phase("init notifications and services"):
+            self._init_services()
+        # load events initally and update scanner event DB entries. Restart with durable state: don't wait for event source
+        with startup_timer.phase("load events"):
+            if self._state_store is None or not self._warm_start():
+                self._get_events()
+                self._update_spawn_events_in_scanner()
+        self._last_event_update = helper_time_now()
+        log.info(f"EventManager: startup time: {startup_timer.get_report()}")
+
+    def _init_scanner_connector(self):
         if self.__cfg_scanner == "rdm":
-            self._scannerconnector = RdmConnector(self.__cfg_rdm_api_url, self.__cfg_rdm_api_user, self.__cfg_rdm_api_password, self.__cfg_rdm_assignment_group, rescan_trigger_command = self.__cfg_scanner_rescan_trigger_cmd)
+            self._scannerconnector = helper_lazy_import("RdmConnector")(self.__cfg_rdm_api_url, self.__cfg_rdm_api_user, self.__cfg_rdm_api_password, self.__cfg_rdm_assignment_group, rescan_trigger_command = self.__cfg_scanner_rescan_trigger_cmd, db_host = self.__cfg_db_host, db_port = self.__cfg_db_port, db_name = self.__cfg_db_name, db_username = self.__cfg_db_user, db_password = self.__cfg_db_password, db_pool_size = self.__cfg_db_pool_size, delete_chunk_size = self.__reset_pokemon_chunk_size, delete_chunk_pause_s = self.__reset_pokemon_chunk_pause, delete_max_threads_running = self.__reset_pokemon_max_threads_running)
         elif self.__cfg_scanner == "golbathybrid":
-            self._scannerconnector = GolbathybridConnector(self.__cfg_rdm_api_url, self.__cfg_rdm_api_user, self.__cfg_rdm_api_password, self.__cfg_rdm_assignment_group, self.__cfg_golbat_api_url, self.__cfg_golbat_api_secret, rescan_trigger_command = self.__cfg_scanner_rescan_trigger_cmd)
+            self._scannerconnector = helper_lazy_import("GolbathybridConnector")(self.__cfg_rdm_api_url, self.__cfg_rdm_api_user, self.__cfg_rdm_api_password, self.__cfg_rdm_assignment_group, self.__cfg_golbat_api_url, self.__cfg_golbat_api_secret, rescan_trigger_command = self.__cfg_scanner_rescan_trigger_cmd, db_host = self.__cfg_db_host, db_port = self.__cfg_db_port, db_name = self.__cfg_db_name, db_username = self.__cfg_db_user, db_password = self.__cfg_db_password, db_pool_size = self.__cfg_db_pool_size, delete_chunk_size = self.__reset_pokemon_chunk_size, delete_chunk_pause_s = self.__reset_pokemon_chunk_pause, delete_max_threads_running = self.__reset_pokemon_max_threads_running)
         else:
-            self._scannerconnector = MadConnector(self.__cfg_db_host, self.__cfg_db_port, self.__cfg_db_name, self.__cfg_db_user, self.__cfg_db_password, reload_port_list = self.__cfg_mad_reload_ports, rescan_trigger_command = self.__cfg_scanner_rescan_trigger_cmd)
-        if(self.__tg_info_enable):
-            self._api = SimpleTelegramApi(self.__token)
+            self._scannerconnector = helper_lazy_import("MadConnector")(self.__cfg_db_host, self.__cfg_db_port, self.__cfg_db_name, self.__cfg_db_user, self.__cfg_db_password, reload_port_list = self.__cfg_mad_reload_ports, rescan_trigger_command = self.__cfg_scanner_rescan_trigger_cmd, delete_chunk_size = self.__reset_pokemon_chunk_size, delete_chunk_pause_s = self.__reset_pokemon_chunk_pause, delete_max_threads_running = self.__reset_pokemon_max_threads_running, db_pool_size = self.__cfg_db_pool_size, quest_reset_strategy = self.__reset_quests_strategy)
 
-        # load events initally and update scanner event DB entries
-        self._get_events()
-        self._update_spawn_events_in_scanner()
-        self._last_event_update = helper_time_now()
+    def _init_services(self):
+        if(self.__tg_info_enable):
+            self._api = helper_lazy_import("SimpleTelegramApi")(self.__token, http_client = self._http_client)
+        if self.__tg_info_enable or self.__dc_info_enable:
+            self._notification_dispatcher = helper_lazy_import("NotificationDispatcher")(max_parallel = self.__notification_max_parallel, max_retries = self.__notification_max_retries)
+        if self.__metrics_enable and self._metrics_server is None:
+            self._metrics_server = helper_lazy_import("MetricsServer")(self.__metrics_host, self.__metrics_port)
+            self._metrics_server.start()
+        # state before job queue: resubmitted persisted reset jobs store their resets
+        if self.__state_enable and self._state_store is None:
+            self._load_state()
+        if self.__jobs_enable and self._jobqueue is None:
+            self._start_jobqueue()
+        if self.__eventapi_enable and self._event_api is None:
+            self._event_api = helper_lazy_import("EventApiServer")(self.__eventapi_host, self.__eventapi_port, now_function = lambda: helper_time_now())
+            self._event_api.start()
 
     def run(self):
         #if enabled, run pokemon reset check every cycle to ensure pokemon rescan just after spawn event change
@@ -574,19 +1301,177 @@ class EventManager():
 
         # check for new events on event website only with configurated event check time
         # check after reset actions to avoid removing events before event end is detected.
-        if (helper_time_now() - self._last_event_update) >= timedelta(seconds=self.__sleep):
+        if (helper_time_now() - self._last_event_update) >= timedelta(seconds=self.__sleep) and not self._is_event_update_running():
             self._get_events()
-            self._update_spawn_events_in_scanner()
+            self._update_spawn_events()
+            self._last_event_update = helper_time_now()
+
+        # wait until next event boundary or next event update, whichever comes first
+        sleep_in_s = self._get_sleep_time()
+        log.debug(f"sleep {sleep_in_s} seconds...")
+        helper_sleep(sleep_in_s)
+
+    async def run_async(self):
+        # asyncio engine: pokemon and quest resets and their I/O (scanner, madmin, notifications) overlap
+        import asyncio
+        tasks = []
+        if self.__reset_pokemon_enable:
+            tasks.append(self._check_pokemon_resets_async())
+        if self.__reset_quests_enable:
+            tasks.append(self._check_quest_resets_async())
+        await asyncio.gather(*tasks)
+
+        # check after reset actions to avoid removing events before event end is detected.
+        if (helper_time_now() - self._last_event_update) >= timedelta(seconds=self.__sleep) and not self._is_event_update_running():
+            await self._get_events_async()
+            if self._jobqueue is not None and self._scanner_sync_pending:
+                self._jobqueue.submit("update_spawn_events")
+            else:
+                await self._update_spawn_events_in_scanner_async()
             self._last_event_update = helper_time_now()
 
-        # wait mainloop time
-        log.debug(f"sleep {self.__sleep_mainloop_in_s} seconds...")
-        time.sleep(self.__sleep_mainloop_in_s)
+        sleep_in_s = self._get_sleep_time()
+        log.debug(f"sleep {sleep_in_s} seconds...")
+        await asyncio.sleep(sleep_in_s)
+
+    def _get_sleep_time(self):
+        now = helper_time_now()
+        next_wakeup = self._last_event_update + timedelta(seconds=self.__sleep)
+        with self._event_lock:
+            next_boundary = self._scheduler.get_next_boundary(now)
+        if next_boundary is not None:
+            next_wakeup = min(next_wakeup, next_boundary + timedelta(seconds=SCHEDULER_WAKEUP_DELAY_S))
+        return max((next_wakeup - now).total_seconds(), SCHEDULER_MIN_SLEEP_S)
 
 '''
 ****************************************
 * Module functions
 ****************************************
 '''
+def set_clock(clock):
+    # replace time source, returns previous clock
+    global _clock
+    previous_clock = _clock
+    _clock = clock
+    return previous_clock
+
 def helper_time_now():
-    return datetime.now()
+    return _clock.now()
+
+def helper_sleep(seconds):
+    _clock.sleep(seconds)
+
+@lru_cache(maxsize=POGOINFO_TIME_CACHE_SIZE)
+def helper_parse_pogoinfo_time(time_str):
+    # fast path for fixed format 'YYYY-MM-DD HH:MM', strptime for everything else (raises ValueError for invalid timestamps)
+    if len(time_str) == 16 and time_str[4] == "-" and time_str[7] == "-" and time_str[10] == " " and time_str[13] == ":":
+        try:
+            return datetime(int(time_str[0:4]), int(time_str[5:7]), int(time_str[8:10]), int(time_str[11:13]), int(time_str[14:16]))
+        except ValueError:
+            pass
+    return datetime.strptime(time_str, POGOINFO_TIME_FORMAT)
+
+def helper_is_reset_successful(result):
+    # connector reset result: False or report with success False -> failed. No result -> successful
+    if isinstance(result, dict):
+        return result.get("success", False)
+    return result is not False
+
+def helper_get_reset_keys(crossings):
+    # JSON serializable keys of reset boundaries (state file, job kwargs)
+    return [[boundary_time.isoformat(), event.name, kind] for boundary_time, event, kind in crossings]
+
+def helper_iter_chunks(text, chunk_size = FEED_CHUNK_SIZE):
+    for position in range(0, len(text), chunk_size):
+        yield text[position:position + chunk_size]
+
+def helper_iter_json_array(chunks):
+    # incremental reader for a JSON array: yields array items, while text chunks are read. Only one item is kept in memory
+    decoder = json.JSONDecoder()
+    whitespace = " \t\n\r"
+    buffer = ""
+    # states: "start" (expect '['), "first" (item or ']'), "item", "separator" (',' or ']'), "end"
+    state = "start"
+    chunks = iter(chunks)
+    eof = False
+    while True:
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in whitespace:
+                position += 1
+            if position >= len(buffer):
+                break
+            if state == "start":
+                if buffer[position] != "[":
+                    raise ValueError(f"event feed: expected '[' at start of JSON array")
+                position += 1
+                state = "first"
+            elif state == "separator" or (state == "first" and buffer[position] == "]"):
+                if buffer[position] == "]":
+                    position += 1
+                    state = "end"
+                elif buffer[position] == ",":
+                    position += 1
+                    state = "item"
+                else:
+                    raise ValueError(f"event feed: expected ',' or ']' in JSON array")
+            elif state in ["first", "item"]:
+                try:
+                    item, item_end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    # incomplete item -> read next chunk
+                    break
+                # a number at end of buffer could continue in next chunk (e.g. '2' of '2.5')
+                if not eof and (item_end == len(buffer) or (isinstance(item, (int, float)) and buffer[item_end] not in whitespace + ",]")):
+                    break
+                position = item_end
+                state = "separator"
+                yield item
+            else:
+                raise ValueError(f"event feed: unexpected data after JSON array")
+        buffer = buffer[position:]
+        if eof:
+            break
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buffer += chunk
+    if state != "end":
+        raise ValueError(f"event feed: incomplete JSON array")
+
+def helper_iter_json_array_file(filepath):
+    # raw events of an archived event feed (JSON array, optional gzip compressed)
+    open_function = gzip.open if filepath.endswith(".gz") else open
+    with open_function(filepath, "rt", encoding="utf8") as f:
+        yield from helper_iter_json_array(iter(partial(f.read, FEED_CHUNK_SIZE), ""))
+
+def helper_write_file_atomic(filepath, data):
+    # write to temporary file and replace afterwards to never leave a half written file
+    tmp_filepath = filepath + ".tmp"
+    with open(tmp_filepath, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filepath, filepath)
+
+def helper_lazy_import(name):
+    # import module of LAZY_IMPORTS entry on first use
+    module_name = LAZY_IMPORTS[name]
+    if module_name not in sys.modules:
+        with get_startup_timer().phase(f"import {module_name}"):
+            importlib.import_module(module_name)
+    value = getattr(sys.modules[module_name], name)
+    globals()[name] = value
+    return value
+
+def __getattr__(name):
+    # module attribute access (e.g. eventmanager.MadConnector) of lazy imported classes
+    if name not in LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return helper_lazy_import(name)
+
+_clock = SystemClock()
+get_startup_timer().add("import eventmanager", time.perf_counter() - _import_start_time)
@@ -0,0 +1,92 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+****************************************
+* Import
+****************************************
+'''
+# priority queue and sorted index
+import bisect
+import heapq
+import itertools
+# logging
+import logging
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger(__name__)
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+# Priority queue of upcoming event boundaries (start/end). Used by EventManager to sleep exactly until the next
+# boundary instead of polling. Boundaries of removed or changed events are dropped lazily from the queue.
+class EventScheduler():
+    def __init__(self):
+        # heap entries: (boundary_datetime, sequence number, boundary key)
+        self._queue = []
+        # set of valid boundary keys: (boundary_datetime, kind, event name, event type)
+        self._boundaries = set()
+        self._sequence = itertools.count()
+
+    def _get_boundary_keys(self, events):
+        boundary_keys = set()
+        for event in events:
+            # handle unknown eventstart
+            if event.start is not None:
+                boundary_keys.add((event.start, "start", event.name, event.etype))
+            boundary_keys.add((event.end, "end", event.name, event.etype))
+        return boundary_keys
+
+    def update(self, events):
+        new_boundaries = self._get_boundary_keys(events)
+        added_boundaries = new_boundaries - self._boundaries
+        removed_boundaries = self._boundaries - new_boundaries
+        for boundary_key in added_boundaries:
+            heapq.heappush(self._queue, (boundary_key[0], next(self._sequence), boundary_key))
+        self._boundaries = new_boundaries
+        # compact queue, if too many removed boundaries are waiting for lazy removal
+        if len(self._queue) > 2 * len(self._boundaries) + 16:
+            self._queue = [entry for entry in self._queue if entry[2] in self._boundaries]
+            heapq.heapify(self._queue)
+        log.debug(f"EventScheduler: update boundaries added:{len(added_boundaries)} removed:{len(removed_boundaries)} queued:{len(self._queue)}")
+        return len(added_boundaries), len(removed_boundaries)
+
+    def get_next_boundary(self, now):
+        # drop removed and already passed boundaries, return the next upcoming boundary or None
+        while self._queue:
+            boundary_time, _, boundary_key = self._queue[0]
+            if boundary_key not in self._boundaries or boundary_time <= now:
+                heapq.heappop(self._queue)
+                continue
+            return boundary_time
+        return None
+
+# Sorted index of event boundaries (start/end) for range queries. Returns all boundaries inside a timewindow with
+# one lookup, so several events changing in the same timewindow are handled together.
+class EventBoundaryIndex():
+    def __init__(self, events = []):
+        boundaries = []
+        for event in events:
+            # handle unknown eventstart
+            if event.start is not None:
+                boundaries.append((event.start, event, "start"))
+            boundaries.append((event.end, event, "end"))
+        boundaries.sort(key=lambda boundary: boundary[0])
+        self._boundaries = boundaries
+        self._boundary_times = [boundary[0] for boundary in boundaries]
+
+    def __len__(self):
+        return len(self._boundaries)
+
+    def get_crossings(self, timewindow_start, timewindow_end):
+        # return list of (boundary_datetime, event, kind) with timewindow_start < boundary_datetime <= timewindow_end
+        first = bisect.bisect_right(self._boundary_times, timewindow_start)
+        last = bisect.bisect_right(self._boundary_times, timewindow_end)
+        return self._boundaries[first:last]
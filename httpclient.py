@@ -0,0 +1,135 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+****************************************
+* Import
+****************************************
+'''
+import threading
+import time
+# url handling
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+# logging
+import logging
+
+'''
+****************************************
+* Constants
+****************************************
+'''
+DEFAULT_CONNECT_TIMEOUT_S = 5
+DEFAULT_READ_TIMEOUT_S = 30
+DEFAULT_POOL_MAXSIZE = 10
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger(__name__)
+_http_client = None
+_http_client_lock = threading.Lock()
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+# HTTP client with one keep-alive session per host, default timeouts for every request and latency accounting per endpoint
+class HttpClient():
+    def __init__(self, connect_timeout = DEFAULT_CONNECT_TIMEOUT_S, read_timeout = DEFAULT_READ_TIMEOUT_S, pool_maxsize = DEFAULT_POOL_MAXSIZE):
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._pool_maxsize = pool_maxsize
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        # latency statistic per endpoint: {endpoint: {"count", "errors", "total_s", "max_s", "last_s"}}
+        self._latency_stats = {}
+        self._latency_stats_lock = threading.Lock()
+
+    def set_timeouts(self, connect_timeout, read_timeout):
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+
+    def _get_session(self, url):
+        url_parts = urlsplit(url)
+        host = f"{url_parts.scheme}://{url_parts.netloc}"
+        with self._sessions_lock:
+            session = self._sessions.get(host, None)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_maxsize)
+                session.mount(host, adapter)
+                self._sessions[host] = session
+                log.debug(f"HttpClient: new session for host {host}")
+        return session
+
+    def _get_endpoint_name(self, url):
+        # without query parameters
+        url_parts = urlsplit(url)
+        return f"{url_parts.scheme}://{url_parts.netloc}{url_parts.path}"
+
+    def _add_latency(self, endpoint, elapsed_s, error):
+        with self._latency_stats_lock:
+            stats = self._latency_stats.get(endpoint, None)
+            if stats is None:
+                stats = {"count": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0, "last_s": 0.0}
+                self._latency_stats[endpoint] = stats
+            stats["count"] += 1
+            if error:
+                stats["errors"] += 1
+            stats["total_s"] += elapsed_s
+            stats["max_s"] = max(stats["max_s"], elapsed_s)
+            stats["last_s"] = elapsed_s
+
+    def get_latency_stats(self):
+        with self._latency_stats_lock:
+            return {endpoint: dict(stats) for endpoint, stats in self._latency_stats.items()}
+
+    def request(self, method, url, endpoint = None, **kwargs):
+        # endpoint: name for latency accounting. Shall be set, if url contains secrets (e.g. API token)
+        if endpoint is None:
+            endpoint = self._get_endpoint_name(url)
+        kwargs.setdefault("timeout", (self._connect_timeout, self._read_timeout))
+        session = self._get_session(url)
+        start_time = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self._add_latency(endpoint, time.monotonic() - start_time, error=True)
+            raise
+        elapsed_s = time.monotonic() - start_time
+        self._add_latency(endpoint, elapsed_s, error=(response.status_code >= 400))
+        log.debug(f"HttpClient: {method} {endpoint} status-code:{response.status_code} in {elapsed_s:.3f}s")
+        return response
+
+    def get(self, url, endpoint = None, **kwargs):
+        return self.request("GET", url, endpoint = endpoint, **kwargs)
+
+    def post(self, url, endpoint = None, **kwargs):
+        return self.request("POST", url, endpoint = endpoint, **kwargs)
+
+    def close(self):
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+'''
+****************************************
+* Module functions
+****************************************
+'''
+def get_http_client():
+    # shared HttpClient instance for all connectors and notifiers
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient()
+        return _http_client
+
+def configure_http_client(connect_timeout, read_timeout):
+    get_http_client().set_timeouts(connect_timeout, read_timeout)
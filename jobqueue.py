@@ -0,0 +1,217 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+****************************************
+* Import
+****************************************
+'''
+import os
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+# logging
+import logging
+
+'''
+****************************************
+* Constants
+****************************************
+'''
+DEFAULT_MAX_WORKERS = 2
+# 0: no timeout
+DEFAULT_JOB_TIMEOUT_S = 900
+# number of finished jobs kept for status
+JOB_HISTORY_SIZE = 50
+JOB_STATES = ["pending", "running", "done", "failed", "timeout"]
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger(__name__)
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+# One queued call of a registered job handler. kwargs need to be JSON serializable (persisted queue)
+class Job():
+    def __init__(self, job_id, name, kwargs, created = None):
+        self.job_id = job_id
+        self.name = name
+        self.kwargs = kwargs
+        self.key = helper_job_key(name, kwargs)
+        self.status = "pending"
+        self.created = created if created is not None else time.time()
+        self.started = None
+        self.finished = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "id": self.job_id,
+            "name": self.name,
+            "kwargs": self.kwargs,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error
+        }
+
+# Runs long running jobs (e.g. scanner DB deletes) in a bounded worker pool, so the caller only detects and enqueues.
+# Pending and running jobs are persisted to a JSON file and resubmitted after restart. An identical job (same name and
+# kwargs) is not queued twice, as long as it is pending. A job exceeding the timeout is reported as 'timeout' and its
+# worker slot is released. The handler thread can't be stopped and finishes in background.
+class JobQueue():
+    def __init__(self, max_workers = DEFAULT_MAX_WORKERS, timeout_s = DEFAULT_JOB_TIMEOUT_S, persist_path = None):
+        self._timeout_s = timeout_s
+        self._persist_path = persist_path
+        self._handlers = {}
+        # {job id: Job} of pending and running jobs, in order of submit
+        self._jobs = {}
+        self._history = deque(maxlen = JOB_HISTORY_SIZE)
+        self._counts = {status: 0 for status in JOB_STATES if status not in ["pending", "running"]}
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = "job")
+
+    def register(self, name, handler):
+        # handler: function called with job kwargs
+        self._handlers[name] = handler
+
+    def start(self):
+        # resubmit persisted jobs of last run (running jobs were interrupted)
+        for job_dict in helper_load_jobs(self._persist_path):
+            if job_dict.get("name", None) not in self._handlers:
+                log.warning(f"JobQueue: drop persisted job with unknown name: {job_dict}")
+                continue
+            log.info(f"JobQueue: resubmit persisted job {job_dict['name']} {job_dict['kwargs']} ({job_dict['status']} on shutdown)")
+            self.submit(job_dict["name"], created = job_dict.get("created", None), **job_dict["kwargs"])
+
+    def submit(self, name, created = None, **kwargs):
+        # returns queued Job, or pending identical Job
+        if name not in self._handlers:
+            raise ValueError(f"JobQueue: no handler registered for job {name}")
+        with self._lock:
+            job_key = helper_job_key(name, kwargs)
+            for job in self._jobs.values():
+                if job.key == job_key and job.status == "pending":
+                    log.info(f"JobQueue: identical job {name} {kwargs} already pending -> skip")
+                    return job
+            job = Job(f"{int(time.time())}-{self._next_id}", name, kwargs, created = created)
+            self._next_id += 1
+            self._jobs[job.job_id] = job
+            self._save()
+        log.info(f"JobQueue: job {job.job_id} {name} {kwargs} queued")
+        self._executor.submit(self._run_job, job)
+        return job
+
+    def _run_job(self, job):
+        with self._lock:
+            job.status = "running"
+            job.started = time.time()
+            self._save()
+        result = {}
+        def run_handler():
+            try:
+                self._handlers[job.name](**job.kwargs)
+            except Exception as e:
+                log.exception(f"JobQueue: exception in job {job.job_id} {job.name}")
+                result["error"] = f"exception: {e}"
+        handler_thread = threading.Thread(target = run_handler, name = f"job-{job.name}", daemon = True)
+        handler_thread.start()
+        handler_thread.join(self._timeout_s if self._timeout_s > 0 else None)
+        with self._lock:
+            job.finished = time.time()
+            if handler_thread.is_alive():
+                job.status = "timeout"
+                job.error = f"timeout after {self._timeout_s}s"
+            elif "error" in result:
+                job.status = "failed"
+                job.error = result["error"]
+            else:
+                job.status = "done"
+            self._counts[job.status] += 1
+            del self._jobs[job.job_id]
+            self._history.append(job)
+            self._save()
+            self._idle.notify_all()
+        duration_s = job.finished - job.started
+        if job.status == "done":
+            log.info(f"JobQueue: job {job.job_id} {job.name} done in {duration_s:.3f}s (queued {job.started - job.created:.3f}s)")
+        else:
+            log.error(f"JobQueue: job {job.job_id} {job.name} {job.status}: {job.error}")
+
+    def _save(self):
+        if self._persist_path is None:
+            return
+        jobs = [job.to_dict() for job in self._jobs.values()]
+        try:
+            helper_write_json_atomic(self._persist_path, jobs)
+        except Exception:
+            log.exception(f"JobQueue: failed to persist job queue to {self._persist_path}")
+
+    def get_status(self):
+        # number of pending and running jobs and number of finished jobs per result since start
+        with self._lock:
+            status = {state: 0 for state in ["pending", "running"]}
+            for job in self._jobs.values():
+                status[job.status] += 1
+            status.update(self._counts)
+            return status
+
+    def get_jobs(self):
+        # pending and running jobs and last finished jobs as dicts
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()] + [job.to_dict() for job in self._history]
+
+    def wait_idle(self, timeout_s = None):
+        # wait until all jobs are finished. returns False on timeout
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._jobs, timeout_s)
+
+    def get_prometheus_lines(self):
+        status = self.get_status()
+        lines = [
+            "# HELP eventmanager_jobs Number of pending/running jobs and finished jobs per result",
+            "# TYPE eventmanager_jobs gauge"
+        ]
+        lines += [f'eventmanager_jobs{{status="{state}"}} {count}' for state, count in status.items()]
+        return lines
+
+    def shutdown(self, wait = True):
+        self._executor.shutdown(wait = wait)
+
+'''
+****************************************
+* Module functions
+****************************************
+'''
+def helper_job_key(name, kwargs):
+    return name + json.dumps(kwargs, sort_keys = True)
+
+def helper_load_jobs(filepath):
+    if filepath is None or not os.path.isfile(filepath):
+        return []
+    try:
+        with open(filepath, encoding = "utf-8") as job_file:
+            return json.load(job_file)
+    except (OSError, ValueError):
+        log.exception(f"JobQueue: failed to load persisted job queue {filepath} -> ignore")
+        return []
+
+def helper_write_json_atomic(filepath, data):
+    # write temporary file and replace target, so the file is never partly written
+    tmp_filepath = filepath + ".tmp"
+    with open(tmp_filepath, "w", encoding = "utf-8") as tmp_file:
+        json.dump(data, tmp_file, indent = 2)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.replace(tmp_filepath, filepath)
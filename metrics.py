@@ -0,0 +1,233 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+****************************************
+* Import
+****************************************
+'''
+import threading
+import time
+from contextlib import contextmanager
+# logging
+import logging
+
+'''
+****************************************
+* Constants
+****************************************
+'''
+# histogram buckets in seconds
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+METRIC_PREFIX = "eventmanager_"
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger(__name__)
+_registry = None
+_registry_lock = threading.Lock()
+_startup_timer = None
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+class Counter():
+    def __init__(self, name, description, label_names = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value = 1, **labels):
+        label_values = tuple(str(labels.get(label_name, "")) for label_name in self.label_names)
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + value
+
+    def get(self, **labels):
+        label_values = tuple(str(labels.get(label_name, "")) for label_name in self.label_names)
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def get_prometheus_lines(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{helper_label_str(self.label_names, label_values)} {value}")
+        return lines
+
+class Histogram():
+    def __init__(self, name, description, label_names = (), buckets = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # per label values: {"buckets": [bucket counts], "count", "sum"}
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        label_values = tuple(str(labels.get(label_name, "")) for label_name in self.label_names)
+        with self._lock:
+            values = self._values.get(label_values, None)
+            if values is None:
+                values = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+                self._values[label_values] = values
+            for index, bucket in enumerate(self.buckets):
+                if value <= bucket:
+                    values["buckets"][index] += 1
+            values["count"] += 1
+            values["sum"] += value
+
+    def get_count(self, **labels):
+        label_values = tuple(str(labels.get(label_name, "")) for label_name in self.label_names)
+        with self._lock:
+            values = self._values.get(label_values, None)
+            return 0 if values is None else values["count"]
+
+    def get_prometheus_lines(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, values in sorted(self._values.items()):
+                for bucket, bucket_count in zip(self.buckets, values["buckets"]):
+                    label_str = helper_label_str(self.label_names + ("le",), label_values + (f"{bucket}",))
+                    lines.append(f"{self.name}_bucket{label_str} {bucket_count}")
+                label_str = helper_label_str(self.label_names + ("le",), label_values + ("+Inf",))
+                lines.append(f"{self.name}_bucket{label_str} {values['count']}")
+                label_str = helper_label_str(self.label_names, label_values)
+                lines.append(f"{self.name}_count{label_str} {values['count']}")
+                lines.append(f"{self.name}_sum{label_str} {values['sum']}")
+        return lines
+
+# Counters and histograms of EventManager stages, scanner connector calls, reset lag and notifications.
+# Rendered in Prometheus text format by MetricsServer.
+class MetricsRegistry():
+    def __init__(self):
+        self.stage_duration = Histogram(METRIC_PREFIX + "stage_duration_seconds", "Duration of EventManager stages", ("stage",))
+        self.stage_errors = Counter(METRIC_PREFIX + "stage_errors_total", "Number of failed EventManager stages", ("stage",))
+        self.connector_call_duration = Histogram(METRIC_PREFIX + "connector_call_duration_seconds", "Duration of scanner connector calls", ("connector", "call"))
+        self.reset_lag = Histogram(METRIC_PREFIX + "reset_lag_seconds", "Time from event boundary to completed reset", ("reset",))
+        self.resets = Counter(METRIC_PREFIX + "resets_total", "Number of performed resets", ("reset", "result"))
+        self.notifications = Counter(METRIC_PREFIX + "notifications_total", "Number of sent notifications", ("result",))
+        # additional line providers by name (e.g. HTTP latency of HttpClient)
+        self._collectors = {}
+
+    def set_collector(self, name, collector):
+        # collector: function without parameters, which returns a list of prometheus text lines
+        self._collectors[name] = collector
+
+    @contextmanager
+    def time_stage(self, stage):
+        start_time = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.stage_errors.inc(stage=stage)
+            raise
+        finally:
+            self.stage_duration.observe(time.monotonic() - start_time, stage=stage)
+
+    @contextmanager
+    def time_connector_call(self, connector, call):
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.connector_call_duration.observe(time.monotonic() - start_time, connector=connector, call=call)
+
+    def get_prometheus_text(self):
+        lines = []
+        for metric in [self.stage_duration, self.stage_errors, self.connector_call_duration, self.reset_lag, self.resets, self.notifications]:
+            lines += metric.get_prometheus_lines()
+        for collector in list(self._collectors.values()):
+            try:
+                lines += collector()
+            except Exception:
+                log.exception("MetricsRegistry: exception in metrics collector")
+        return "\n".join(lines) + "\n"
+
+# Durations of startup phases (module imports, init, connect) in order of completion. Phases can be nested
+# (e.g. driver import during connector init), so durations are not summed up.
+class StartupTimer():
+    def __init__(self):
+        self._phases = []
+        self._lock = threading.Lock()
+
+    def add(self, phase, duration_s):
+        with self._lock:
+            self._phases.append((phase, duration_s))
+
+    @contextmanager
+    def phase(self, phase):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start_time)
+
+    def get_phases(self):
+        with self._lock:
+            return list(self._phases)
+
+    def get_report(self):
+        return ", ".join(f"{phase}: {duration_s * 1000:.1f}ms" for phase, duration_s in self.get_phases())
+
+    def get_prometheus_lines(self):
+        lines = [f"# HELP {METRIC_PREFIX}startup_phase_seconds Duration of startup phases", f"# TYPE {METRIC_PREFIX}startup_phase_seconds gauge"]
+        lines += [f"{METRIC_PREFIX}startup_phase_seconds{helper_label_str(('phase',), (phase,))} {duration_s}" for phase, duration_s in self.get_phases()]
+        return lines
+
+'''
+****************************************
+* Module functions
+****************************************
+'''
+def get_metrics_registry():
+    # shared MetricsRegistry instance
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
+
+def get_startup_timer():
+    # shared StartupTimer instance
+    global _startup_timer
+    with _registry_lock:
+        if _startup_timer is None:
+            _startup_timer = StartupTimer()
+        return _startup_timer
+
+def helper_escape_label_value(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def helper_label_str(label_names, label_values):
+    if not label_names:
+        return ""
+    labels = ",".join(f'{label_name}="{helper_escape_label_value(label_value)}"' for label_name, label_value in zip(label_names, label_values))
+    return "{" + labels + "}"
+
+def get_http_latency_lines(http_client):
+    # prometheus lines for latency statistic of HttpClient
+    stats = http_client.get_latency_stats()
+    lines = [
+        f"# HELP {METRIC_PREFIX}http_requests_total Number of HTTP requests per endpoint",
+        f"# TYPE {METRIC_PREFIX}http_requests_total counter"
+    ]
+    lines += [f"{METRIC_PREFIX}http_requests_total{helper_label_str(('endpoint',), (endpoint,))} {endpoint_stats['count']}" for endpoint, endpoint_stats in sorted(stats.items())]
+    lines += [
+        f"# HELP {METRIC_PREFIX}http_request_errors_total Number of failed HTTP requests per endpoint",
+        f"# TYPE {METRIC_PREFIX}http_request_errors_total counter"
+    ]
+    lines += [f"{METRIC_PREFIX}http_request_errors_total{helper_label_str(('endpoint',), (endpoint,))} {endpoint_stats['errors']}" for endpoint, endpoint_stats in sorted(stats.items())]
+    lines += [
+        f"# HELP {METRIC_PREFIX}http_request_duration_seconds_sum Total duration of HTTP requests per endpoint",
+        f"# TYPE {METRIC_PREFIX}http_request_duration_seconds_sum counter"
+    ]
+    lines += [f"{METRIC_PREFIX}http_request_duration_seconds_sum{helper_label_str(('endpoint',), (endpoint,))} {endpoint_stats['total_s']}" for endpoint, endpoint_stats in sorted(stats.items())]
+    return lines
@@ -0,0 +1,55 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+****************************************
+* Import
+****************************************
+'''
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+# EventManager modules
+from metrics import get_metrics_registry
+# logging
+import logging
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger(__name__)
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ["/metrics", "/"]:
+            self.send_error(404)
+            return
+        body = get_metrics_registry().get_prometheus_text().encode("utf8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(f"MetricsServer: {self.address_string()} {format % args}")
+
+# Optional local HTTP endpoint (GET /metrics) running in a daemon thread
+class MetricsServer():
+    def __init__(self, host, port):
+        self._httpd = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        log.info(f"MetricsServer: serve prometheus metrics on http://{self._httpd.server_address[0]}:{self._httpd.server_address[1]}/metrics")
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
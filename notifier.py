@@ -0,0 +1,110 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+****************************************
+* Import
+****************************************
+'''
+import time
+from concurrent.futures import ThreadPoolExecutor
+# url handling
+import requests
+# logging
+import logging
+
+'''
+****************************************
+* Constants
+****************************************
+'''
+DEFAULT_MAX_PARALLEL = 5
+DEFAULT_MAX_RETRIES = 2
+# upper limit for rate limit waiting time requested by Telegram or Discord
+MAX_RETRY_AFTER_S = 60
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger(__name__)
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+class NotificationResult():
+    def __init__(self, target, delivered, attempts, info):
+        self.target = target
+        self.delivered = delivered
+        self.attempts = attempts
+        self.info = info
+
+# Sends notifications to all targets in parallel (bounded thread pool) and retries rate limited messages.
+# A notification is a tuple (target description, send function). The send function returns (delivered, retry_after_s, info).
+class NotificationDispatcher():
+    def __init__(self, max_parallel = DEFAULT_MAX_PARALLEL, max_retries = DEFAULT_MAX_RETRIES):
+        self._max_retries = max_retries
+        self._executor = ThreadPoolExecutor(max_workers = max_parallel, thread_name_prefix = "notifier")
+
+    def _send_with_retry(self, target, send_function):
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                delivered, retry_after_s, info = send_function()
+            except Exception as e:
+                log.exception(f"NotificationDispatcher: exception while sending notification to {target}")
+                return NotificationResult(target, False, attempt, f"exception: {e}")
+            if delivered or retry_after_s is None or attempt > self._max_retries:
+                return NotificationResult(target, delivered, attempt, info)
+            retry_after_s = min(retry_after_s, MAX_RETRY_AFTER_S)
+            log.warning(f"NotificationDispatcher: rate limit for {target} -> retry after {retry_after_s}s")
+            time.sleep(retry_after_s)
+
+    def dispatch(self, notifications):
+        # send all notifications in parallel and wait for all results. Results are in order of notifications
+        futures = [self._executor.submit(self._send_with_retry, target, send_function) for target, send_function in notifications]
+        return [future.result() for future in futures]
+
+    async def dispatch_async(self, notifications):
+        # async variant of dispatch() for asyncio engine
+        import asyncio
+        loop = asyncio.get_event_loop()
+        futures = [loop.run_in_executor(self._executor, self._send_with_retry, target, send_function) for target, send_function in notifications]
+        return list(await asyncio.gather(*futures))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+'''
+****************************************
+* Module functions
+****************************************
+'''
+def send_telegram_message(telegram_api, chat_id, text):
+    result = telegram_api.send_message(chat_id, text)
+    if result.get("ok", False):
+        return True, None, result
+    # rate limit: {"ok": false, "error_code": 429, "parameters": {"retry_after": 5}}
+    retry_after_s = result.get("parameters", {}).get("retry_after", None)
+    return False, retry_after_s, result
+
+def send_discord_webhook(http_client, url, data):
+    response = http_client.post(url, json = data, endpoint = "discord/webhook")
+    if response.status_code == 429:
+        # rate limit: Retry-After header or retry_after in body (both in seconds)
+        retry_after_s = response.headers.get("Retry-After", None)
+        if retry_after_s is None:
+            try:
+                retry_after_s = response.json().get("retry_after", None)
+            except ValueError:
+                retry_after_s = None
+        return False, float(retry_after_s) if retry_after_s is not None else None, response.status_code
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError:
+        return False, None, response.status_code
+    return True, None, response.status_code
@@ -20,6 +20,7 @@ import eventmanager
 '''
 VALID_LOGLEVEL = ["ERROR", "WARNING", "INFO", "DEBUG"]
 VALID_LOGLEVEL_FILE = ["ERROR", "WARNING", "INFO", "DEBUG", "NONE"]
+VALID_ENGINE = ["sync", "async"]
 
 '''
 ****************************************
@@ -66,10 +67,16 @@ def config_logging(logger, console_loglevel = logging.INFO, file_loglevel = None
 def is_valid_loglevel(loglevel):
     return any(loglevel in sub for sub in VALID_LOGLEVEL)
 
+async def run_async(event_manager):
+    # cyclic runable (asyncio engine)
+    while(True):
+        await event_manager.run_async()
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('-lc', '--log-level-console', default='INFO', choices=VALID_LOGLEVEL, required=False, help='set log level for console. Default:INFO')
     parser.add_argument('-lf', '--log-level-file', default='NONE', choices=VALID_LOGLEVEL_FILE, required=False, help='set log level for logfile. Default:NONE')
+    parser.add_argument('-e', '--engine', default='sync', choices=VALID_ENGINE, required=False, help='set engine. async: overlap independent scanner, madmin and notification requests. Default:sync')
     args = parser.parse_args()
     file_loglevel = args.log_level_file
     console_loglevel = args.log_level_console
@@ -87,9 +94,14 @@ def main():
     except Exception:
         log.exception(f"Error in startup of EventManager (__init__ or connect()). Check configuration.")
     else:
-        # cyclic runable
-        while(True):
-            event_manager.run()
+        if args.engine == "async":
+            log.info(f"Start asyncio engine")
+            import asyncio
+            asyncio.run(run_async(event_manager))
+        else:
+            # cyclic runable
+            while(True):
+                event_manager.run()
 
 '''
 ****************************************
@@ -8,21 +8,51 @@
 '''
 import os
 import abc
-# MYSQL database connection
-import mysql.connector
-from mysql.connector import Error
+import math
+import time
+import threading
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
 # url handling
 import requests
 from requests.auth import HTTPBasicAuth
+from httpclient import get_http_client
+from metrics import get_startup_timer
 # logging
 import logging
 
+'''
+****************************************
+* Constants
+****************************************
+'''
+DEFAULT_DELETE_CHUNK_SIZE = 1000
+DEFAULT_DELETE_CHUNK_PAUSE_S = 0.5
+# maximum number of additional pauses per chunk, if DB server is busy
+MAX_DELETE_THROTTLE_PAUSES = 20
+# chunked delete: log progress every N chunks
+DELETE_PROGRESS_LOG_CHUNKS = 10
+DEFAULT_DB_POOL_SIZE = 2
+# maximum time to wait for a free connection of connection pool
+DB_POOL_WAIT_TIMEOUT_S = 30
+# maximum number of prepared statements per DB connection
+DB_STATEMENT_CACHE_SIZE = 32
+# MAD quest table swap: temporary table names
+QUEST_SWAP_NEW_TABLE = "trs_quest_eventmanager_new"
+QUEST_SWAP_OLD_TABLE_PREFIX = "trs_quest_eventmanager_old_"
+
 '''
 ****************************************
 * Global variables
 ****************************************
 '''
 log = logging.getLogger(__name__)
+# MYSQL database connection: driver is imported by first DbConnector (only needed for MAD), see helper_import_mysql()
+mysql = None
+Error = None
+PoolError = None
 
 '''
 ****************************************
@@ -30,76 +60,268 @@ log = logging.getLogger(__name__)
 ****************************************
 '''
 class DbConnector():
-    def __init__(self, host, db_name, username, password, port=3306):
-        self._db_connection = None
+    def __init__(self, host, db_name, username, password, port=3306, pool_size=DEFAULT_DB_POOL_SIZE):
+        helper_import_mysql()
+        self._db_pool = None
+        self._pool_size = pool_size
         self._host = host
         self._port = port
         self._db_name = db_name
         self._username = username
         self._password = password
-
-    def __del__(self):
-        self._disconnect()
-
-    def _connect(self):
-        try:
-            # only create new connection, if not already a connection was created before
-            if self._db_connection is None:
-                self._db_connection = mysql.connector.connect(
+        self._pool_lock = threading.Lock()
+        # server-side prepared statements per DB connection: {connection_id: OrderedDict(query: (query, cursor))}
+        self._statement_cache = OrderedDict()
+        self._statement_cache_lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            # only create new connection pool, if not already a pool was created before
+            if self._db_pool is None:
+                self._db_pool = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name = f"eventmanager_{id(self)}",
+                    pool_size = self._pool_size,
+                    # keep session on connection reuse, otherwise prepared statements are dropped
+                    pool_reset_session = False,
+                    # single queries are committed directly, transactions are started explicitly
+                    autocommit = True,
                     host = self._host,
                     port = self._port,
                     user = self._username,
                     passwd = self._password,
                     database = self._db_name
                 )
-                log.debug(f"DbConnector: SQL db connected successfully")
-        except Error as e:
-            log.error("DbConnector: SQL connection error.")
-            log.exception("Exception info:")
-        return self._db_connection
+                log.debug(f"DbConnector: SQL connection pool with {self._pool_size} connections created")
+        return self._db_pool
 
-    def _disconnect(self):
-        if self._db_connection is not None:
-            self._db_connection.close()
-            self._db_connection = None
-
-    def execute_query(self, query, commit=False, disconnect=True):
+    def _acquire_connection(self):
+        # connection is health checked (ping) and reconnected by pool, if needed
+        wait_until = time.monotonic() + DB_POOL_WAIT_TIMEOUT_S
+        while True:
+            try:
+                return self._get_pool().get_connection()
+            except PoolError:
+                if time.monotonic() > wait_until:
+                    raise
+                time.sleep(0.05)
+
+    def _get_prepared_cursor(self, connection, query):
+        with self._statement_cache_lock:
+            connection_cache = self._statement_cache.get(connection.connection_id, None)
+            if connection_cache is None:
+                connection_cache = OrderedDict()
+                self._statement_cache[connection.connection_id] = connection_cache
+                # forget prepared statements of closed or reconnected connections
+                while len(self._statement_cache) > self._pool_size:
+                    self._statement_cache.popitem(last=False)
+            self._statement_cache.move_to_end(connection.connection_id)
+            cached_statement = connection_cache.get(query, None)
+            if cached_statement is not None:
+                connection_cache.move_to_end(query)
+                return cached_statement
+            # prepared cursor only reuses statement for identical query object -> store query together with cursor
+            cached_statement = (query, connection.cursor(prepared=True))
+            connection_cache[query] = cached_statement
+            if len(connection_cache) > DB_STATEMENT_CACHE_SIZE:
+                _, (_, old_cursor) = connection_cache.popitem(last=False)
+                old_cursor.close()
+            return cached_statement
+
+    def _get_rows_as_dict(self, cursor):
+        rows = []
+        column_names = cursor.column_names
+        for row in cursor.fetchall():
+            # binary protocol of prepared statements returns strings as bytes
+            values = [value.decode("utf8") if isinstance(value, (bytes, bytearray)) else value for value in row]
+            rows.append(dict(zip(column_names, values)))
+        return rows
+
+    def execute(self, query, params=(), commit=False, prepared=True):
+        # prepared=False for statements, which can't be prepared by MySQL (e.g. SHOW STATUS)
         result = None
+        connection = None
         try:
-            connection = self._connect()
-            cursor = connection.cursor(dictionary=True)
-            log.debug(f"DbConnector: SQL query '{query}'...")
-            cursor.execute(query)
+            connection = self._acquire_connection()
+            log.debug(f"DbConnector: SQL query '{query}' params:{params}...")
+            if prepared:
+                query, cursor = self._get_prepared_cursor(connection, query)
+                cursor.execute(query, tuple(params))
+            else:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(query, tuple(params) if params else None)
             if commit:
-                result = connection.commit()
+                connection.commit()
+                result = cursor.rowcount
+            elif prepared:
+                result = self._get_rows_as_dict(cursor)
             else:
                 result = cursor.fetchall()
-            if disconnect:
-                self._disconnect()
+            if not prepared:
+                cursor.close()
             log.debug(f"DbConnector: SQL query successfully executed")
             log.debug(f"DbConnector: SQL query result: {result}")
         except Error as e:
             log.error("DbConnector: SQL query error.")
             log.exception("Exception info:")
-            self._disconnect()
-            return None
+            result = None
+        finally:
+            # give connection back to pool
+            if connection is not None:
+                connection.close()
+        return result
 
+    def execute_transaction(self, statements):
+        # execute list of (query, params) in one transaction. Return sum of affected rows or None on error (rollback)
+        result = None
+        connection = None
+        try:
+            connection = self._acquire_connection()
+            connection.start_transaction()
+            rowcount = 0
+            for query, params in statements:
+                log.debug(f"DbConnector: SQL transaction query '{query}' params:{params}...")
+                query, cursor = self._get_prepared_cursor(connection, query)
+                cursor.execute(query, tuple(params))
+                rowcount += max(cursor.rowcount, 0)
+            connection.commit()
+            result = rowcount
+            log.debug(f"DbConnector: SQL transaction with {len(statements)} queries successfully executed. Affected rows: {result}")
+        except Error as e:
+            log.error("DbConnector: SQL transaction error -> rollback.")
+            log.exception("Exception info:")
+            result = None
+            if connection is not None:
+                try:
+                    connection.rollback()
+                except Error:
+                    pass
+        finally:
+            # give connection back to pool
+            if connection is not None:
+                connection.close()
         return result
 
+    def has_unique_key(self, table, column):
+        result = self.execute(f"SHOW INDEX FROM {table} WHERE Column_name = %s AND Non_unique = 0", (column,), prepared=False)
+        if result is None:
+            return None
+        return len(result) > 0
 
+    def estimate_rows(self, table, key_column, where, where_params=()):
+        # row estimate of optimizer (EXPLAIN rows * filtered, rounded up), no table scan. None: no estimate available
+        rows = self.execute(f"EXPLAIN SELECT {key_column} FROM {table} WHERE {where}", where_params, prepared=False)
+        if not rows:
+            log.warning(f"DbConnector: no row estimate for {table} WHERE {where}")
+            return None
+        row = rows[0]
+        if row.get("rows", None) is None:
+            # e.g. 'Impossible WHERE' or empty table
+            return 0
+        # round up: any matching row keeps the estimate above 0 (no skip of adaptive reset)
+        return math.ceil(row["rows"] * float(row.get("filtered", None) or 100.0) / 100)
+
+    def _get_threads_running(self):
+        result = self.execute("SHOW GLOBAL STATUS LIKE 'Threads_running'", prepared=False)
+        if not result:
+            return None
+        return int(result[0]["Value"])
+
+    def _throttle(self, chunk_pause_s, max_threads_running):
+        time.sleep(chunk_pause_s)
+        if not max_threads_running:
+            return
+        # pause longer, as long as DB server is busy
+        for pause in range(MAX_DELETE_THROTTLE_PAUSES):
+            threads_running = self._get_threads_running()
+            if threads_running is None or threads_running <= max_threads_running:
+                return
+            log.debug(f"DbConnector: DB server busy (Threads_running:{threads_running}) -> pause delete")
+            time.sleep(chunk_pause_s)
+
+    def delete_chunked(self, table, key_column, where, where_params=(), chunk_size=DEFAULT_DELETE_CHUNK_SIZE, chunk_pause_s=DEFAULT_DELETE_CHUNK_PAUSE_S, max_threads_running=None, progress_log_chunks=DELETE_PROGRESS_LOG_CHUNKS):
+        # delete rows in primary key ordered chunks to avoid long locks on big tables
+        report = {"success": True, "rows_deleted": 0, "chunks": 0, "elapsed_s": 0.0}
+        start_time = time.monotonic()
+        first_select_query = f"SELECT {key_column} FROM {table} WHERE {where} ORDER BY {key_column} LIMIT {chunk_size}"
+        next_select_query = f"SELECT {key_column} FROM {table} WHERE {where} AND {key_column} > %s ORDER BY {key_column} LIMIT {chunk_size}"
+        last_key = None
+        while True:
+            if last_key is None:
+                rows = self.execute(first_select_query, where_params)
+            else:
+                rows = self.execute(next_select_query, tuple(where_params) + (last_key,))
+            if rows is None:
+                report["success"] = False
+                break
+            if not rows:
+                break
+            keys = [row[key_column] for row in rows]
+            key_placeholder_str = ",".join(["%s"] * len(keys))
+            # check condition again, rows could be updated in the meantime
+            delete_query = f"DELETE FROM {table} WHERE {key_column} IN ({key_placeholder_str}) AND {where}"
+            rowcount = self.execute(delete_query, tuple(keys) + tuple(where_params), commit=True)
+            if rowcount is None:
+                report["success"] = False
+                break
+            report["rows_deleted"] += rowcount
+            report["chunks"] += 1
+            if progress_log_chunks and report["chunks"] % progress_log_chunks == 0:
+                log.info(f'DbConnector: delete from {table} in progress: {report["rows_deleted"]} rows in {report["chunks"]} chunks, {round(time.monotonic() - start_time, 3)}s')
+            last_key = keys[-1]
+            if len(keys) < chunk_size:
+                break
+            self._throttle(chunk_pause_s, max_threads_running)
+        report["elapsed_s"] = round(time.monotonic() - start_time, 3)
+        return report
+
+
+# Reset methods return False (or a report with success False) on failure
 class ScannerConnector(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def reset_all_quests(self):
         pass
 
+    @abc.abstractmethod
+    def reset_filtered_quests(self, eventchange_datetime_UTC):
+        # only reset quests, which are scanned before eventchange
+        pass
+
     @abc.abstractmethod
     def reset_all_pokemon(self):
         pass
 
     @abc.abstractmethod
-    def reset_filtered_pokemon(self, eventchange_datetime_UTC):
+    def reset_filtered_pokemon(self, eventchange_datetime_UTC, pokemon_ids=None):
+        # pokemon_ids: only reset these species. None: all species
         pass
 
+    def estimate_filtered_pokemon(self, eventchange_datetime_UTC, pokemon_ids=None):
+        # estimated number of pokemon, which would be deleted by reset_filtered_pokemon. None: no estimate available
+        return None
+
+    def reset_adaptive_pokemon(self, eventchange_datetime_UTC, pokemon_ids=None, truncate_min_rows=0, skip_max_rows=0):
+        # choose fastest reset by estimated affected rows: skip (<= skip_max_rows), truncate (>= truncate_min_rows, 0: disabled) or chunked delete
+        # returns report of performed reset with chosen reset as "decision"
+        estimate = self.estimate_filtered_pokemon(eventchange_datetime_UTC, pokemon_ids=pokemon_ids)
+        if estimate is None:
+            decision = "filtered"
+        elif estimate <= skip_max_rows:
+            decision = "skip"
+        elif truncate_min_rows > 0 and estimate >= truncate_min_rows:
+            decision = "all"
+        else:
+            decision = "filtered"
+        log.info(f"{self.__class__.__name__}: adaptive pokemon reset: estimated rows:{estimate} (skip <= {skip_max_rows}, truncate >= {truncate_min_rows if truncate_min_rows > 0 else 'disabled'}) -> {decision}")
+        if decision == "filtered":
+            result = self.reset_filtered_pokemon(eventchange_datetime_UTC, pokemon_ids=pokemon_ids)
+        elif decision == "all":
+            result = self.reset_all_pokemon()
+        else:
+            result = True
+        report = dict(result) if isinstance(result, dict) else {"success": result is not False}
+        report["decision"] = decision
+        return report
+
     @abc.abstractmethod
     def get_events(self):
         pass
@@ -116,94 +338,306 @@ class ScannerConnector(metaclass=abc.ABCMeta):
     def delete_event(self, event_type_name):
         pass
 
+    @abc.abstractmethod
+    def sync_events(self, events, default_events, delete_others=False):
+        pass
+
     @abc.abstractmethod
     def trigger_rescan(self):
         pass
 
-class MadConnector(ScannerConnector):
-    def __init__(self, db_host, db_port, db_name, db_username, db_password, reload_port_list = None, rescan_trigger_command = None):
-        self._dbconnector = DbConnector(host=db_host, port=db_port, db_name=db_name, username=db_username, password=db_password)
+    # async API for asyncio engine. Default: run blocking method in executor, connectors can overlap independent calls
+    async def reset_all_quests_async(self):
+        return await run_in_executor(self.reset_all_quests)
+
+    async def reset_filtered_quests_async(self, eventchange_datetime_UTC):
+        return await run_in_executor(self.reset_filtered_quests, eventchange_datetime_UTC)
+
+    async def reset_all_pokemon_async(self):
+        return await run_in_executor(self.reset_all_pokemon)
+
+    async def reset_filtered_pokemon_async(self, eventchange_datetime_UTC, pokemon_ids=None):
+        return await run_in_executor(self.reset_filtered_pokemon, eventchange_datetime_UTC, pokemon_ids=pokemon_ids)
+
+    async def reset_adaptive_pokemon_async(self, eventchange_datetime_UTC, pokemon_ids=None, truncate_min_rows=0, skip_max_rows=0):
+        return await run_in_executor(self.reset_adaptive_pokemon, eventchange_datetime_UTC, pokemon_ids=pokemon_ids, truncate_min_rows=truncate_min_rows, skip_max_rows=skip_max_rows)
+
+    async def sync_events_async(self, events, default_events, delete_others=False):
+        return await run_in_executor(self.sync_events, events, default_events, delete_others=delete_others)
+
+    async def trigger_rescan_async(self):
+        return await run_in_executor(self.trigger_rescan)
+
+# Filtered pokemon reset by chunked delete in pokemon table of scanner database. Connector sets POKEMON_DB_COLUMNS
+# (key, last scan, despawn column), implements _get_pokemon_db_timestamp() and sets database and delete settings in __init__
+class DbPokemonResetMixin(metaclass=abc.ABCMeta):
+    POKEMON_DB_COLUMNS = None
+    # DbConnector of scanner database, None: no database configured
+    _dbconnector = None
+    _delete_chunk_size = DEFAULT_DELETE_CHUNK_SIZE
+    _delete_chunk_pause_s = DEFAULT_DELETE_CHUNK_PAUSE_S
+    _delete_max_threads_running = None
+
+    @abc.abstractmethod
+    def _get_pokemon_db_timestamp(self, eventchange_datetime_UTC):
+        # eventchange in format of last scan and despawn column
+        pass
+
+    def _get_filtered_pokemon_where(self, eventchange_datetime_UTC, pokemon_ids=None):
+        # SQL condition of pokemon scanned before eventchange and still active
+        _, updated_column, expire_column = self.POKEMON_DB_COLUMNS
+        eventchange_timestamp = self._get_pokemon_db_timestamp(eventchange_datetime_UTC)
+        sql_where = f"{updated_column} < %s AND {expire_column} > %s"
+        sql_params = (eventchange_timestamp, eventchange_timestamp)
+        if pokemon_ids is not None:
+            # only species of changed spawn pool
+            sql_where += f" AND pokemon_id IN ({','.join(['%s'] * len(pokemon_ids))})"
+            sql_params += tuple(pokemon_ids)
+        return sql_where, sql_params
+
+    def estimate_filtered_pokemon(self, eventchange_datetime_UTC, pokemon_ids=None):
+        if self._dbconnector is None:
+            return None
+        if pokemon_ids is not None and not pokemon_ids:
+            return 0
+        sql_where, sql_params = self._get_filtered_pokemon_where(eventchange_datetime_UTC, pokemon_ids)
+        return self._dbconnector.estimate_rows("pokemon", self.POKEMON_DB_COLUMNS[0], sql_where, sql_params)
+
+    def reset_filtered_pokemon(self, eventchange_datetime_UTC, pokemon_ids=None):
+        # SQL query: delete mon in chunks
+        connector_name = type(self).__name__
+        if self._dbconnector is None:
+            log.info(f"{connector_name}: reset_filtered_pokemon needs scanner database (db_name) -> skip")
+            return {"success": False, "rows_deleted": 0, "chunks": 0, "elapsed_s": 0.0}
+        if pokemon_ids is not None and not pokemon_ids:
+            log.info(f'{connector_name}: no species for filtered pokemon delete (eventchange:{eventchange_datetime_UTC} UTC) -> skip')
+            return {"success": True, "rows_deleted": 0, "chunks": 0, "elapsed_s": 0.0}
+        sql_where, sql_params = self._get_filtered_pokemon_where(eventchange_datetime_UTC, pokemon_ids)
+        report = self._dbconnector.delete_chunked("pokemon", self.POKEMON_DB_COLUMNS[0], sql_where, sql_params, chunk_size=self._delete_chunk_size, chunk_pause_s=self._delete_chunk_pause_s, max_threads_running=self._delete_max_threads_running)
+        species_str = "all" if pokemon_ids is None else ",".join(str(pokemon_id) for pokemon_id in pokemon_ids)
+        if report["success"]:
+            log.info(f'{connector_name}: filtered pokemon deleted (eventchange:{eventchange_datetime_UTC} UTC, species:{species_str}): {report["rows_deleted"]} rows in {report["chunks"]} chunks, {report["elapsed_s"]}s')
+        else:
+            log.error(f'{connector_name}: filtered pokemon delete (eventchange:{eventchange_datetime_UTC} UTC, species:{species_str}) failed after {report["rows_deleted"]} rows in {report["chunks"]} chunks, {report["elapsed_s"]}s')
+        return report
+
+class MadConnector(DbPokemonResetMixin, ScannerConnector):
+    POKEMON_DB_COLUMNS = ("encounter_id", "last_modified", "disappear_time")
+
+    def __init__(self, db_host, db_port, db_name, db_username, db_password, reload_port_list = None, rescan_trigger_command = None, delete_chunk_size = DEFAULT_DELETE_CHUNK_SIZE, delete_chunk_pause_s = DEFAULT_DELETE_CHUNK_PAUSE_S, delete_max_threads_running = None, db_pool_size = DEFAULT_DB_POOL_SIZE, http_client = None, quest_reset_strategy = "all"):
+        self._dbconnector = DbConnector(host=db_host, port=db_port, db_name=db_name, username=db_username, password=db_password, pool_size=db_pool_size)
         self._reload_port_list = reload_port_list
         self._rescan_trigger_command = rescan_trigger_command
-
-    def reset_all_quests(self):
+        self._http_client = http_client if http_client is not None else get_http_client()
+        self._delete_chunk_size = delete_chunk_size
+        self._delete_chunk_pause_s = delete_chunk_pause_s
+        self._delete_max_threads_running = delete_max_threads_running
+        # unique key on trs_event.event_name needed for INSERT ... ON DUPLICATE KEY UPDATE (checked on first sync)
+        self._event_name_unique = None
+        self._quest_reset_strategy = quest_reset_strategy
+        # background worker for expensive cleanup (e.g. drop old quest table after swap)
+        self._background_executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "mad-background")
+
+    def _truncate_quests(self):
         sql_query = "TRUNCATE trs_quest"
-        dbreturn = self._dbconnector.execute_query(sql_query, commit=True)
+        dbreturn = self._dbconnector.execute(sql_query, commit=True)
         log.info(f'MadConnector: quests deleted by SQL query: {sql_query} return: {dbreturn}')
+        return dbreturn is not None
+
+    def _drop_table(self, table):
+        start_time = time.monotonic()
+        dbreturn = self._dbconnector.execute(f"DROP TABLE IF EXISTS {table}", commit=True, prepared=False)
+        if dbreturn is None:
+            log.error(f"MadConnector: drop of old quest table {table} failed")
+        else:
+            log.info(f"MadConnector: old quest table {table} dropped in {time.monotonic() - start_time:.3f}s")
+
+    def _swap_quests(self):
+        # replace trs_quest by an empty copy with one atomic RENAME. Old table is dropped in background
+        start_time = time.monotonic()
+        old_table = f"{QUEST_SWAP_OLD_TABLE_PREFIX}{int(time.time() * 1000)}"
+        # leftover of an interrupted swap
+        if self._dbconnector.execute(f"DROP TABLE IF EXISTS {QUEST_SWAP_NEW_TABLE}", commit=True, prepared=False) is None:
+            return False
+        if self._dbconnector.execute(f"CREATE TABLE {QUEST_SWAP_NEW_TABLE} LIKE trs_quest", commit=True, prepared=False) is None:
+            return False
+        if self._dbconnector.execute(f"RENAME TABLE trs_quest TO {old_table}, {QUEST_SWAP_NEW_TABLE} TO trs_quest", commit=True, prepared=False) is None:
+            self._dbconnector.execute(f"DROP TABLE IF EXISTS {QUEST_SWAP_NEW_TABLE}", commit=True, prepared=False)
+            return False
+        log.info(f"MadConnector: quests deleted by table swap in {time.monotonic() - start_time:.3f}s")
+        # drop old table and old tables of interrupted earlier runs off the critical path
+        old_tables = [old_table]
+        old_table_pattern = QUEST_SWAP_OLD_TABLE_PREFIX.replace("_", "\\_") + "%"
+        leftover_tables = self._dbconnector.execute(f"SHOW TABLES LIKE '{old_table_pattern}'", prepared=False)
+        if leftover_tables:
+            old_tables += [list(row.values())[0] for row in leftover_tables if list(row.values())[0] != old_table]
+        for table in old_tables:
+            self._background_executor.submit(self._drop_table, table)
+        return True
+
+    def reset_all_quests(self):
+        if self._quest_reset_strategy == "swap":
+            if self._swap_quests():
+                return True
+            log.error(f"MadConnector: quest reset by table swap failed (needs CREATE, DROP and ALTER privileges) -> fallback to TRUNCATE")
+        return self._truncate_quests()
+
+    def reset_filtered_quests(self, eventchange_datetime_UTC):
+        # SQL query: delete quests in chunks, which are scanned before eventchange (quest_timestamp: unix timestamp)
+        eventchange_timestamp = int(eventchange_datetime_UTC.replace(tzinfo=timezone.utc).timestamp())
+        report = self._dbconnector.delete_chunked("trs_quest", "GUID", "quest_timestamp < %s", (eventchange_timestamp,), chunk_size=self._delete_chunk_size, chunk_pause_s=self._delete_chunk_pause_s, max_threads_running=self._delete_max_threads_running)
+        if report["success"]:
+            log.info(f'MadConnector: filtered quests deleted (eventchange:{eventchange_datetime_UTC} UTC): {report["rows_deleted"]} rows in {report["chunks"]} chunks, {report["elapsed_s"]}s')
+        else:
+            log.error(f'MadConnector: filtered quests delete (eventchange:{eventchange_datetime_UTC} UTC) failed after {report["rows_deleted"]} rows in {report["chunks"]} chunks, {report["elapsed_s"]}s')
+        return report
 
     def reset_all_pokemon(self):
         sql_query = "TRUNCATE pokemon"
-        dbreturn = self._dbconnector.execute_query(sql_query, commit=True)
+        dbreturn = self._dbconnector.execute(sql_query, commit=True)
         log.info(f'MadConnector: all pokemon deleted by SQL query: {sql_query} return: {dbreturn}')
+        return dbreturn is not None
 
-    def reset_filtered_pokemon(self, eventchange_datetime_UTC):
-        # SQL query: delete mon
-        eventchange_timestamp = eventchange_datetime_UTC.strftime("%Y-%m-%d %H:%M:%S")
-        sql_query = f"DELETE FROM pokemon WHERE last_modified < '{eventchange_timestamp}' AND disappear_time > '{eventchange_timestamp}'"
-        dbreturn = self._dbconnector.execute_query(sql_query, commit=True)
-        log.info(f'MadConnector: filtered pokemon deleted by SQL query: {sql_query} return: {dbreturn}')
+    def _get_pokemon_db_timestamp(self, eventchange_datetime_UTC):
+        # last_modified, disappear_time: datetime
+        return eventchange_datetime_UTC.strftime("%Y-%m-%d %H:%M:%S")
 
     def get_events(self):
         log.info(f"MadConnector: get event")
-        sql_query = "SELECT event_name, event_start, event_end FROM trs_event;"
-        db_events = self._dbconnector.execute_query(sql_query)
+        sql_query = "SELECT event_name, event_start, event_end FROM trs_event"
+        db_events = self._dbconnector.execute(sql_query)
         return db_events
 
     def insert_event(self, event_type_name, event_start, event_end, event_lure_duration):
         log.info(f"MadConnector: insert event {event_type_name} with start:{event_start}, end:{event_end}, lure_duration:{event_lure_duration}")
-        sql_query = f"INSERT INTO trs_event (event_name, event_start, event_end, event_lure_duration) VALUES('{event_type_name}', '{event_start}', '{event_end}', {event_lure_duration});"
-        self._dbconnector.execute_query(sql_query, commit=True)
+        sql_query = "INSERT INTO trs_event (event_name, event_start, event_end, event_lure_duration) VALUES(%s, %s, %s, %s)"
+        self._dbconnector.execute(sql_query, (event_type_name, event_start, event_end, event_lure_duration), commit=True)
 
     def update_event(self, event_type_name, event_start, event_end, event_lure_duration):
         log.info(f"MadConnector: updated event {event_type_name} with start:{event_start}, end:{event_end}, lure_duration:{event_lure_duration}")
-        sql_query = f"UPDATE trs_event SET event_start='{event_start}', event_end='{event_end}', event_lure_duration={event_lure_duration} WHERE event_name = '{event_type_name}';"
-        self._dbconnector.execute_query(sql_query, commit=True)
+        sql_query = "UPDATE trs_event SET event_start=%s, event_end=%s, event_lure_duration=%s WHERE event_name = %s"
+        self._dbconnector.execute(sql_query, (event_start, event_end, event_lure_duration, event_type_name), commit=True)
 
     def delete_event(self, event_type_name):
         log.info(f"MadConnector: deleted event {event_type_name}")
-        sql_query = f"DELETE FROM trs_event WHERE event_name='{event_type_name}';"
-        self._dbconnector.execute_query(sql_query, commit=True)
+        sql_query = "DELETE FROM trs_event WHERE event_name = %s"
+        self._dbconnector.execute(sql_query, (event_type_name,), commit=True)
+
+    def _get_sync_events_statements(self, events, default_events, delete_others):
+        statements = []
+        if self._event_name_unique:
+            # write events: insert or overwrite existing entries
+            if events:
+                values_str = ",".join(["(%s, %s, %s, %s)"] * len(events))
+                sql_query = f"INSERT INTO trs_event (event_name, event_start, event_end, event_lure_duration) VALUES {values_str} ON DUPLICATE KEY UPDATE event_start=VALUES(event_start), event_end=VALUES(event_end), event_lure_duration=VALUES(event_lure_duration)"
+                statements.append((sql_query, [value for event in events for value in event]))
+            # default events: only insert missing entries, keep existing entries
+            if default_events:
+                values_str = ",".join(["(%s, %s, %s, %s)"] * len(default_events))
+                sql_query = f"INSERT INTO trs_event (event_name, event_start, event_end, event_lure_duration) VALUES {values_str} ON DUPLICATE KEY UPDATE event_name=event_name"
+                statements.append((sql_query, [value for event in default_events for value in event]))
+        else:
+            # fallback without unique key: one statement per entry, but still in one transaction
+            for event in events:
+                event_name, event_start, event_end, event_lure_duration = event
+                statements.append(("UPDATE trs_event SET event_start=%s, event_end=%s, event_lure_duration=%s WHERE event_name = %s", (event_start, event_end, event_lure_duration, event_name)))
+            for event in events + default_events:
+                statements.append(("INSERT INTO trs_event (event_name, event_start, event_end, event_lure_duration) SELECT %s, %s, %s, %s FROM DUAL WHERE NOT EXISTS (SELECT 1 FROM trs_event WHERE event_name = %s)", tuple(event) + (event[0],)))
+        # just deletes all events that aren't part of EventManager
+        if delete_others:
+            event_names = [event[0] for event in events + default_events]
+            names_str = ",".join(["%s"] * len(event_names))
+            statements.append((f"DELETE FROM trs_event WHERE event_name NOT IN ({names_str})", event_names))
+        return statements
+
+    def sync_events(self, events, default_events, delete_others=False):
+        # events, default_events: list of (event_name, event_start, event_end, event_lure_duration)
+        # events are written, default_events are only inserted if missing. Everything is applied in one transaction.
+        if self._event_name_unique is None:
+            self._event_name_unique = self._dbconnector.has_unique_key("trs_event", "event_name")
+            if self._event_name_unique is None:
+                log.error(f"MadConnector: sync events failed. Unable to read trs_event table")
+                return False
+            if not self._event_name_unique:
+                log.warning(f"MadConnector: no unique key for trs_event.event_name -> sync events with single queries")
+        statements = self._get_sync_events_statements(list(events), list(default_events), delete_others)
+        if not statements:
+            return True
+        dbreturn = self._dbconnector.execute_transaction(statements)
+        if dbreturn is None:
+            log.error(f"MadConnector: sync events failed")
+            return False
+        log.info(f"MadConnector: synced {len(events)} events and {len(default_events)} default events. Affected rows: {dbreturn}")
+        return True
+
+    def _trigger_madmin_reload(self, trigger_port):
+        try:
+            reload_url = f"http://localhost:{trigger_port}/reload"
+            result = self._http_client.get(reload_url)
+            if (result.status_code != 200) and (result.status_code != 302):
+                log.error(f"MadConnector: trigger madmin reload ('apply_settings') for configurated port: '{trigger_port}' failed with status-code {result.status_code}")
+            else:
+                log.info(f"MadConnector: triggered madmin reload ('apply_settings') for configurated port '{trigger_port}' successful")
+        except requests.ConnectionError:
+            log.error(f"MadConnector: connection error for reload url '{reload_url}'. Please check your 'rescan_trigger_madmin_ports' settings or availability of madmin.")
+        except requests.Timeout:
+            log.error(f"MadConnector: timeout for reload url '{reload_url}'. Please check availability of madmin.")
+        except Exception:
+            log.error(f"MadConnector: exception while trigger madmin reload ('apply_settings') for configurated port: '{trigger_port}'")
+            log.exception("Exception info:")
+
+    def _run_rescan_trigger_command(self):
+        try:
+            exit_code = os.system(self._rescan_trigger_command)
+            if exit_code != 0:
+                log.error(f"run rescan trigger command '{self._rescan_trigger_command}' failed with exit code:{exit_code}")
+            else:
+                log.info(f"run rescan trigger command '{self._rescan_trigger_command}' successfully")
+        except Exception:
+            log.error(f"MadConnector: exception while running rescan trigger command '{self._rescan_trigger_command}'")
+            log.exception("Exception info:")
 
     def trigger_rescan(self):
         # call apply_settings, if trigger ports are set
         if self._reload_port_list is not None:
             for trigger_port in self._reload_port_list:
-                try:
-                    reload_url = f"http://localhost:{trigger_port}/reload"
-                    result = requests.get(reload_url)
-                    if (result.status_code != 200) and (result.status_code != 302):
-                        log.error(f"MadConnector: trigger madmin reload ('apply_settings') for configurated port: '{trigger_port}' failed with status-code {result.status_code}")
-                    else:
-                        log.info(f"MadConnector: triggered madmin reload ('apply_settings') for configurated port '{trigger_port}' successful")
-                except requests.ConnectionError:
-                    log.error(f"MadConnector: connection error for reload url '{reload_url}'. Please check your 'rescan_trigger_madmin_ports' settings or availability of madmin.")
-                except Exception:
-                    log.error(f"MadConnector: exception while trigger madmin reload ('apply_settings') for configurated port: '{trigger_port}'")
-                    log.exception("Exception info:")
+                self._trigger_madmin_reload(trigger_port)
         # call usercommand/userscript, if configurated
         if self._rescan_trigger_command is not None:
-            try:
-                exit_code = os.system(self._rescan_trigger_command)
-                if exit_code != 0:
-                    log.error(f"run rescan trigger command '{self._rescan_trigger_command}' failed with exit code:{exit_code}")
-                else:
-                    log.info(f"run rescan trigger command '{self._rescan_trigger_command}' successfully")
-            except Exception:
-                log.error(f"MadConnector: exception while running rescan trigger command '{self._rescan_trigger_command}'")
-                log.exception("Exception info:")
+            self._run_rescan_trigger_command()
+
+    async def trigger_rescan_async(self):
+        # reload all madmin instances in parallel
+        import asyncio
+        if self._reload_port_list is not None:
+            await asyncio.gather(*[run_in_executor(self._trigger_madmin_reload, trigger_port) for trigger_port in self._reload_port_list])
+        if self._rescan_trigger_command is not None:
+            await run_in_executor(self._run_rescan_trigger_command)
+
+# RDM API for quests and rescan. Pokemon reset needs the optional scanner database (db_name), which contains the
+# pokemon table (RDM schema, also used by Golbat). Without database pokemon resets are skipped.
+class RdmConnector(DbPokemonResetMixin, ScannerConnector):
+    POKEMON_DB_COLUMNS = ("id", "updated", "expire_timestamp")
 
-class RdmConnector(ScannerConnector):
-    def __init__(self, api_url, api_username, api_password, assignment_group, rescan_trigger_command = None):
+    def __init__(self, api_url, api_username, api_password, assignment_group, rescan_trigger_command = None, http_client = None, db_host = "localhost", db_port = 3306, db_name = None, db_username = None, db_password = None, db_pool_size = DEFAULT_DB_POOL_SIZE, delete_chunk_size = DEFAULT_DELETE_CHUNK_SIZE, delete_chunk_pause_s = DEFAULT_DELETE_CHUNK_PAUSE_S, delete_max_threads_running = None):
         self._api_url = api_url
         self._api_auth = HTTPBasicAuth(api_username, api_password)
         self._assignment_group = assignment_group
         self._rescan_trigger_command = rescan_trigger_command
+        self._http_client = http_client if http_client is not None else get_http_client()
+        if db_name:
+            self._dbconnector = DbConnector(host=db_host, port=db_port, db_name=db_name, username=db_username, password=db_password, pool_size=db_pool_size)
+        else:
+            self._dbconnector = None
+        self._delete_chunk_size = delete_chunk_size
+        self._delete_chunk_pause_s = delete_chunk_pause_s
+        self._delete_max_threads_running = delete_max_threads_running
 
     def _api_set_request(self, api_parameter_str):
         result = False
         try:
             url = self._api_url + "/api/set_data?" + api_parameter_str
-            result = requests.get(url, auth=self._api_auth)
+            result = self._http_client.get(url, auth=self._api_auth)
             if (result.status_code != 200):
                 log.error(f"RdmConnector: _api_set_request '{url}' failed with status-code {result.status_code}")
             else:
@@ -211,6 +645,8 @@ class RdmConnector(ScannerConnector):
                 result = True;
         except requests.ConnectionError:
             log.error(f"RdmConnector: connection error for _api_set_request '{url}'. Please check your 'rdm_api_url', 'rdm_api_username' and 'rdm_api_password' settings or availability of RDM.")
+        except requests.Timeout:
+            log.error(f"RdmConnector: timeout for _api_set_request '{url}'. Please check availability of RDM.")
         except Exception:
             log.error(f"RdmConnector: exception while _api_set_request '{url}'")
             log.exception("Exception info:")
@@ -220,14 +656,26 @@ class RdmConnector(ScannerConnector):
         request_parameter = "clear_all_quests=true"
         if self._api_set_request(request_parameter):
             log.info(f'RdmConnector: quests deleted by API successful')
-        else:
-            log.error(f'RdmConnector: quests deleted by API failed')
+            return True
+        log.error(f'RdmConnector: quests deleted by API failed')
+        return False
+
+    def reset_filtered_quests(self, eventchange_datetime_UTC):
+        log.info(f"RdmConnector: reset_filtered_quests not supported -> reset all quests")
+        return self.reset_all_quests()
 
     def reset_all_pokemon(self):
-        log.info(f"RdmConnector: reset_all_pokemon not supported yet -> skip")
+        if self._dbconnector is None:
+            log.info(f"RdmConnector: reset_all_pokemon needs scanner database (db_name) -> skip")
+            return False
+        sql_query = "TRUNCATE pokemon"
+        dbreturn = self._dbconnector.execute(sql_query, commit=True)
+        log.info(f'RdmConnector: all pokemon deleted by SQL query: {sql_query} return: {dbreturn}')
+        return dbreturn is not None
 
-    def reset_filtered_pokemon(self, eventchange_datetime_UTC):
-        log.info(f"RdmConnector: reset_filtered_pokemon not supported yet -> skip")
+    def _get_pokemon_db_timestamp(self, eventchange_datetime_UTC):
+        # updated, expire_timestamp: unix timestamp
+        return int(eventchange_datetime_UTC.replace(tzinfo=timezone.utc).timestamp())
 
     def get_events(self):
         log.debug(f"RdmConnector: get_events not supported -> skip")
@@ -242,6 +690,10 @@ class RdmConnector(ScannerConnector):
     def delete_event(self, event_type_name):
         log.debug(f"RdmConnector: delete_event not supported -> skip")
 
+    def sync_events(self, events, default_events, delete_others=False):
+        log.debug(f"RdmConnector: sync_events not supported -> skip")
+        return True
+
     def trigger_rescan(self):
         # start re-quest assigment group
         request_parameter = f"assignmentgroup_start=true&assignmentgroup_name={self._assignment_group}"
@@ -261,18 +713,20 @@ class RdmConnector(ScannerConnector):
                 log.error(f"RdmConnector: exception while running rescan trigger command '{self._rescan_trigger_command}'")
                 log.exception("Exception info:")
 
+# Golbat API for quests, RDM for rescan. Pokemon reset uses the optional Golbat database (same pokemon schema as RDM)
 class GolbathybridConnector(ScannerConnector):
-    def __init__(self, rdm_api_url, rdm_api_username, rdm_api_password, rdm_assignment_group, golbat_api_url, golbat_api_secret, rescan_trigger_command = None):
+    def __init__(self, rdm_api_url, rdm_api_username, rdm_api_password, rdm_assignment_group, golbat_api_url, golbat_api_secret, rescan_trigger_command = None, http_client = None, db_host = "localhost", db_port = 3306, db_name = None, db_username = None, db_password = None, db_pool_size = DEFAULT_DB_POOL_SIZE, delete_chunk_size = DEFAULT_DELETE_CHUNK_SIZE, delete_chunk_pause_s = DEFAULT_DELETE_CHUNK_PAUSE_S, delete_max_threads_running = None):
         self._golbat_api_url = golbat_api_url
         self._golbat_api_secret = golbat_api_secret
-        self._rdmConnector = RdmConnector(rdm_api_url, rdm_api_username, rdm_api_password, rdm_assignment_group, rescan_trigger_command)
+        self._http_client = http_client if http_client is not None else get_http_client()
+        self._rdmConnector = RdmConnector(rdm_api_url, rdm_api_username, rdm_api_password, rdm_assignment_group, rescan_trigger_command, http_client = self._http_client, db_host = db_host, db_port = db_port, db_name = db_name, db_username = db_username, db_password = db_password, db_pool_size = db_pool_size, delete_chunk_size = delete_chunk_size, delete_chunk_pause_s = delete_chunk_pause_s, delete_max_threads_running = delete_max_threads_running)
 
     def _api_post(self, api_url_substring, json_data):
         result = False
         try:
             url = self._golbat_api_url + api_url_substring
             html_secret_header = {"X-Golbat-Secret": f"{self._golbat_api_secret}"}
-            result = requests.post(url, headers=html_secret_header, json=json_data)
+            result = self._http_client.post(url, headers=html_secret_header, json=json_data)
             if (result.status_code != 200 and result.status_code != 202):
                 log.error(f"GolbathybridConnector: _api_post '{url}' failed with status-code {result.status_code}")
             else:
@@ -280,23 +734,46 @@ class GolbathybridConnector(ScannerConnector):
                 result = True;
         except requests.ConnectionError:
             log.error(f"GolbathybridConnector: connection error for _api_post '{url}'. Please check your 'golbat_api_url' and 'golbat_api_secret' settings or availability of Golbat.")
+        except requests.Timeout:
+            log.error(f"GolbathybridConnector: timeout for _api_post '{url}'. Please check availability of Golbat.")
         except Exception:
             log.error(f"GolbathybridConnector: exception while _api_post '{url}'")
             log.exception("Exception info:")
         return result
 
-    def reset_all_quests(self):
+    def _reset_golbat_quests(self):
         world_geofence = {"fence":[{"lat": -90.0,"lon": -180.0},{"lat": 90.0,"lon": -180.0},{"lat": 90.0,"lon": 180.0},{"lat": -90.0,"lon": 180.0},{"lat": -90.0,"lon": -180.0}]}
         result = self._api_post("/api/clear-quests", world_geofence)
         log.info(f'GolbathybridConnector: quests deleted by Golbat API: {result}')
-        self._rdmConnector.reset_all_quests()
+        return result
+
+    def reset_all_quests(self):
+        golbat_result = self._reset_golbat_quests()
+        rdm_result = self._rdmConnector.reset_all_quests()
+        return golbat_result and rdm_result
+
+    async def reset_all_quests_async(self):
+        # clear quests in Golbat and RDM in parallel
+        import asyncio
+        golbat_result, rdm_result = await asyncio.gather(run_in_executor(self._reset_golbat_quests), self._rdmConnector.reset_all_quests_async())
+        return golbat_result and rdm_result
+
+    def reset_filtered_quests(self, eventchange_datetime_UTC):
+        log.info(f"GolbathybridConnector: reset_filtered_quests not supported -> reset all quests")
+        return self.reset_all_quests()
+
+    async def reset_filtered_quests_async(self, eventchange_datetime_UTC):
+        log.info(f"GolbathybridConnector: reset_filtered_quests not supported -> reset all quests")
+        return await self.reset_all_quests_async()
 
     def reset_all_pokemon(self):
-        log.info(f"GolbathybridConnector: reset_all_pokemon not supported yet -> skip")
-        self._rdmConnector.reset_all_pokemon()
+        return self._rdmConnector.reset_all_pokemon()
+
+    def estimate_filtered_pokemon(self, eventchange_datetime_UTC, pokemon_ids=None):
+        return self._rdmConnector.estimate_filtered_pokemon(eventchange_datetime_UTC, pokemon_ids=pokemon_ids)
 
-    def reset_filtered_pokemon(self, eventchange_datetime_UTC):
-        log.info(f"GolbathybridConnector: reset_filtered_pokemon not supported yet -> skip")
+    def reset_filtered_pokemon(self, eventchange_datetime_UTC, pokemon_ids=None):
+        return self._rdmConnector.reset_filtered_pokemon(eventchange_datetime_UTC, pokemon_ids=pokemon_ids)
 
     def get_events(self):
         log.debug(f"GolbathybridConnector: get_events not supported -> skip")
@@ -311,5 +788,31 @@ class GolbathybridConnector(ScannerConnector):
     def delete_event(self, event_type_name):
         log.debug(f"GolbathybridConnector: delete_event not supported -> skip")
 
+    def sync_events(self, events, default_events, delete_others=False):
+        log.debug(f"GolbathybridConnector: sync_events not supported -> skip")
+        return True
+
     def trigger_rescan(self):
         self._rdmConnector.trigger_rescan()
+
+'''
+****************************************
+* Module functions
+****************************************
+'''
+def helper_import_mysql():
+    # import mysql driver on first use
+    global mysql, Error, PoolError
+    if mysql is not None:
+        return
+    with get_startup_timer().phase("import mysql.connector"):
+        import mysql.connector
+        import mysql.connector.pooling
+        from mysql.connector import Error
+        from mysql.connector.errors import PoolError
+
+async def run_in_executor(function, *args, **kwargs):
+    # run blocking function in default executor of running event loop (asyncio is only imported by asyncio engine)
+    import asyncio
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, partial(function, *args, **kwargs))
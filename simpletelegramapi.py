@@ -9,7 +9,7 @@
 import json
 # url handling
 import urllib
-import requests
+from httpclient import get_http_client
 # logging
 import logging
 
@@ -26,15 +26,18 @@ log = logging.getLogger(__name__)
 ****************************************
 '''
 class SimpleTelegramApi:
-    def __init__(self, api_token):
+    def __init__(self, api_token, http_client = None):
         self._base_url = self._get_base_url(api_token)
+        self._http_client = http_client if http_client is not None else get_http_client()
 
     def _get_base_url(self, api_token):
         return "https://api.telegram.org/bot{}/".format(api_token)
 
     def _send_request(self, command):
         request_url = self._base_url + command
-        response = requests.get(request_url)
+        # endpoint name without bot token for latency statistic
+        endpoint = "telegram/" + command.split("?")[0]
+        response = self._http_client.get(request_url, endpoint = endpoint)
         decoded_response = response.content.decode("utf8")
         return decoded_response
 
@@ -0,0 +1,274 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+Replay simulator: drives EventManager with a virtual clock through recorded pogoinfo event feeds.
+Scanner, Telegram and Discord are replaced by recording stubs, every reset, scanner sync and notification
+is written to a timeline.
+
+Snapshots directory: pogoinfo events.json files (JSON array, optional .gz). A file name starting with a timestamp
+(YYYYMMDD-HHMM, e.g. 20240101-0600_events.json) is used as event feed from this time on, a file without timestamp
+from simulation start.
+
+run from repository root:
+    python simulator.py --snapshots feeds/ --start 2024-01-01T00:00 --end 2024-02-01T00:00 --output timeline.json
+'''
+
+'''
+****************************************
+* Import
+****************************************
+'''
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+# logging
+import logging
+
+# EventManager modules
+import eventmanager
+from scannerconnector import ScannerConnector
+from notifier import NotificationDispatcher
+
+'''
+****************************************
+* Constants
+****************************************
+'''
+SNAPSHOT_FILENAME_PATTERN = re.compile(r"^(\d{8})[-_T]?(\d{4})")
+SNAPSHOT_FILENAME_TIME_FORMAT = "%Y%m%d%H%M"
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger("simulator")
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+# Virtual time source for eventmanager.set_clock(). sleep() advances the virtual time immediately,
+# speed > 0 additionally waits the virtual duration / speed in real time.
+class VirtualClock():
+    def __init__(self, start, speed = 0):
+        self._now = start
+        self._speed = speed
+        self.real_sleep_s = 0.0
+
+    def now(self):
+        return self._now
+
+    def sleep(self, seconds):
+        if self._speed > 0:
+            real_sleep_s = seconds / self._speed
+            time.sleep(real_sleep_s)
+            self.real_sleep_s += real_sleep_s
+        self._now += eventmanager.timedelta(seconds=seconds)
+
+class Timeline():
+    def __init__(self, clock):
+        self._clock = clock
+        self.entries = []
+
+    def add(self, source, action, **details):
+        self.entries.append({"time": f"{self._clock.now()}", "source": source, "action": action, **details})
+
+    def get_lines(self):
+        return [f"{entry['time']} {entry['source']:8} {entry['action']:24} " + " ".join(f"{name}={value}" for name, value in entry.items() if name not in ["time", "source", "action"]) for entry in self.entries]
+
+    def get_summary(self):
+        # number of entries per source and action
+        summary = {}
+        for entry in self.entries:
+            key = f"{entry['source']}.{entry['action']}"
+            summary[key] = summary.get(key, 0) + 1
+        return summary
+
+# Replaces PogoInfoEventList: delivers the recorded feed, which is valid at the current virtual time
+class ReplayEventList():
+    def __init__(self, snapshots, clock, timeline):
+        # snapshots: list of (valid from datetime, filepath), sorted by time
+        self._snapshots = snapshots
+        self._clock = clock
+        self._timeline = timeline
+        self._delivered_filepath = None
+        self._modified = True
+
+    def get_json(self):
+        now = self._clock.now()
+        filepath = None
+        for valid_from, snapshot_filepath in self._snapshots:
+            if valid_from > now:
+                break
+            filepath = snapshot_filepath
+        self._modified = filepath is not None and filepath != self._delivered_filepath
+        if not self._modified:
+            return []
+        self._delivered_filepath = filepath
+        self._timeline.add("feed", "snapshot", file = os.path.basename(filepath))
+        return eventmanager.helper_iter_json_array_file(filepath)
+
+    async def get_json_async(self):
+        return self.get_json()
+
+    def get_cached_json(self):
+        return None
+
+    def is_modified(self):
+        return self._modified
+
+class RecordingConnector(ScannerConnector):
+    def __init__(self, timeline):
+        self._timeline = timeline
+
+    def reset_all_quests(self):
+        self._timeline.add("scanner", "reset_all_quests")
+
+    def reset_filtered_quests(self, eventchange_datetime_UTC):
+        self._timeline.add("scanner", "reset_filtered_quests", eventchange_utc = f"{eventchange_datetime_UTC}")
+
+    def reset_all_pokemon(self):
+        self._timeline.add("scanner", "reset_all_pokemon")
+
+    def reset_filtered_pokemon(self, eventchange_datetime_UTC, pokemon_ids=None):
+        self._timeline.add("scanner", "reset_filtered_pokemon", eventchange_utc = f"{eventchange_datetime_UTC}", species = "all" if pokemon_ids is None else ",".join(str(pokemon_id) for pokemon_id in pokemon_ids))
+        return {"success": True, "rows_deleted": 0, "chunks": 0, "elapsed_s": 0.0}
+
+    def get_events(self):
+        return {}
+
+    def insert_event(self, event_type_name, event_start, event_end, event_lure_duration):
+        self._timeline.add("scanner", "insert_event", event = event_type_name)
+
+    def update_event(self, event_type_name, event_start, event_end, event_lure_duration):
+        self._timeline.add("scanner", "update_event", event = event_type_name)
+
+    def delete_event(self, event_type_name):
+        self._timeline.add("scanner", "delete_event", event = event_type_name)
+
+    def sync_events(self, events, default_events, delete_others=False):
+        self._timeline.add("scanner", "sync_events", events = ";".join(f"{event[0]}:{event[1]}-{event[2]}" for event in events))
+        return True
+
+    def trigger_rescan(self):
+        self._timeline.add("scanner", "trigger_rescan")
+
+class RecordingTelegramApi():
+    def __init__(self, timeline):
+        self._timeline = timeline
+
+    def send_message(self, chat_id, text):
+        self._timeline.add("telegram", "send_message", chat = chat_id, text = text)
+        return {"ok": True}
+
+class RecordingResponse():
+    status_code = 204
+    headers = {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {}
+
+# Replaces HttpClient of EventManager (Discord webhooks)
+class RecordingHttpClient():
+    def __init__(self, timeline):
+        self._timeline = timeline
+
+    def post(self, url, json = None, endpoint = None, **kwargs):
+        description = ""
+        if json is not None and json.get("embeds", None):
+            description = json["embeds"][0].get("description", "")
+        self._timeline.add("discord", "webhook", text = description)
+        return RecordingResponse()
+
+    def get_latency_stats(self):
+        return {}
+
+'''
+****************************************
+* Module functions
+****************************************
+'''
+def load_snapshots(snapshot_dir):
+    # returns list of (valid from datetime, filepath) sorted by time. Files without timestamp are valid from start
+    snapshots = []
+    for filename in sorted(os.listdir(snapshot_dir)):
+        if not (filename.endswith(".json") or filename.endswith(".json.gz")):
+            continue
+        match = SNAPSHOT_FILENAME_PATTERN.match(filename)
+        valid_from = datetime.strptime(match.group(1) + match.group(2), SNAPSHOT_FILENAME_TIME_FORMAT) if match else datetime.min
+        snapshots.append((valid_from, os.path.join(snapshot_dir, filename)))
+    snapshots.sort(key=lambda snapshot: snapshot[0])
+    return snapshots
+
+def run_simulation(snapshot_dir, start, end, config_file_name = "/config/config.ini", speed = 0):
+    # returns (Timeline, statistic dict)
+    clock = VirtualClock(start, speed)
+    timeline = Timeline(clock)
+    previous_clock = eventmanager.set_clock(clock)
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            event_manager = eventmanager.EventManager(config_file_name)
+            # don't touch .eventcache of a running instance
+            event_manager._config.read_dict({"general": {"custom_eventcache_path": tmpdir + "/"}})
+            event_manager._load_config_parameter()
+            event_manager._pogo_info_event_list = ReplayEventList(load_snapshots(snapshot_dir), clock, timeline)
+            event_manager._scannerconnector = RecordingConnector(timeline)
+            event_manager._api = RecordingTelegramApi(timeline)
+            event_manager._http_client = RecordingHttpClient(timeline)
+            # one notification at a time: timeline in order of notifications
+            event_manager._notification_dispatcher = NotificationDispatcher(max_parallel = 1)
+            # connect() without network and optional services
+            event_manager._get_events()
+            event_manager._update_spawn_events_in_scanner()
+            event_manager._last_event_update = clock.now()
+            runs = 0
+            start_time = time.perf_counter()
+            while clock.now() < end:
+                event_manager.run()
+                runs += 1
+            run_time_s = time.perf_counter() - start_time - clock.real_sleep_s
+            event_manager._notification_dispatcher.shutdown()
+    finally:
+        eventmanager.set_clock(previous_clock)
+    statistic = {
+        "start": f"{start}",
+        "end": f"{clock.now()}",
+        "runs": runs,
+        "run_time_s": round(run_time_s, 6),
+        "run_time_per_cycle_ms": round(run_time_s / runs * 1000, 3) if runs else 0.0,
+        "timeline": timeline.get_summary()
+    }
+    return timeline, statistic
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d', '--snapshots', required=True, help='directory with recorded pogoinfo event feeds')
+    parser.add_argument('-s', '--start', required=True, type=datetime.fromisoformat, help='simulation start (local time), e.g. 2024-01-01T00:00')
+    parser.add_argument('-e', '--end', required=True, type=datetime.fromisoformat, help='simulation end (local time)')
+    parser.add_argument('-c', '--config', default='/config/config.ini', help='EventManager config, relative to repository root. Default:/config/config.ini')
+    parser.add_argument('-x', '--speed', type=float, default=0, help='virtual seconds per real second. 0: as fast as possible (default)')
+    parser.add_argument('-o', '--output', default=None, help='write timeline and statistic as JSON to file. Default: timeline as text to stdout')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='[%(asctime)s] [%(name)12s] [%(levelname)7s] %(message)s')
+    timeline, statistic = run_simulation(args.snapshots, args.start, args.end, config_file_name = args.config, speed = args.speed)
+    if args.output is None:
+        print("\n".join(timeline.get_lines()))
+    else:
+        with open(args.output, "w") as output_file:
+            json.dump({"statistic": statistic, "timeline": timeline.entries}, output_file, indent=2)
+    print(json.dumps(statistic, indent=2), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+****************************************
+* Import
+****************************************
+'''
+import json
+import threading
+from datetime import datetime
+# EventManager modules
+from jobqueue import helper_write_json_atomic
+# logging
+import logging
+
+'''
+****************************************
+* Constants
+****************************************
+'''
+STATE_VERSION = 1
+# number of performed resets kept in state file
+STATE_RESET_HISTORY_SIZE = 100
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger(__name__)
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+# Durable EventManager state in a small JSON file: last reset check times and performed resets.
+# File is written atomically, so a restart (e.g. pm2 max_memory_restart) always finds the last complete state.
+class StateStore():
+    def __init__(self, filepath):
+        self._filepath = filepath
+        self._lock = threading.Lock()
+        self._state = {"version": STATE_VERSION, "times": {}, "resets": []}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._filepath, encoding = "utf-8") as state_file:
+                state = json.load(state_file)
+            if state.get("version", None) != STATE_VERSION:
+                log.warning(f"StateStore: unknown version of state file {self._filepath} -> ignore")
+                return
+            self._state = state
+            log.info(f"StateStore: state loaded from {self._filepath}")
+        except FileNotFoundError:
+            log.info(f"StateStore: no state file {self._filepath} -> cold start")
+        except (OSError, ValueError, AttributeError):
+            log.exception(f"StateStore: failed loading state file {self._filepath} -> ignore")
+
+    def get_datetime(self, key):
+        with self._lock:
+            value = self._state["times"].get(key, None)
+        return datetime.fromisoformat(value) if value is not None else None
+
+    def set_datetime(self, key, value):
+        with self._lock:
+            self._state["times"][key] = value.isoformat()
+
+    def add_reset(self, reset, boundary_time, event_name, kind):
+        with self._lock:
+            self._state["resets"].append({"reset": reset, "boundary": boundary_time.isoformat(), "event": event_name, "kind": kind})
+            del self._state["resets"][:-STATE_RESET_HISTORY_SIZE]
+
+    def is_reset_performed(self, reset, boundary_time, event_name, kind):
+        boundary = boundary_time.isoformat()
+        with self._lock:
+            return any(entry["reset"] == reset and entry["boundary"] == boundary and entry["event"] == event_name and entry["kind"] == kind for entry in self._state["resets"])
+
+    def get_resets(self):
+        with self._lock:
+            return list(self._state["resets"])
+
+    def save(self):
+        with self._lock:
+            try:
+                helper_write_json_atomic(self._filepath, self._state)
+                return True
+            except OSError:
+                log.exception(f"StateStore: failed writing state file {self._filepath}")
+                return False
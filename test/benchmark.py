@@ -0,0 +1,404 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark suite for event feed processing, reset checks and scanner connectors.
+Scanner APIs, madmin, Telegram, Discord and the event feed are served by a local stub HTTP server,
+the MAD database is replaced by an in-memory SQLite stand-in. Results are written as JSON.
+
+run from repository root:
+    python -m test.benchmark --sizes 10 1000 10000 100000 --repeat 3 --output benchmark.json
+compare with results of another version:
+    python -m test.benchmark --compare benchmark_old.json
+'''
+
+'''
+****************************************
+* Import
+****************************************
+'''
+import argparse
+import json
+import os
+import platform
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+# logging
+import logging
+
+#benchmark objects
+import eventmanager
+import scannerconnector
+from httpclient import HttpClient
+from notifier import NotificationDispatcher
+from eventdiff import EventSnapshot
+from simpletelegramapi import SimpleTelegramApi
+from test.test import helper_generate_raw_eventdata, TESTDATA_SPAWNS_DUMMYPOKEMON
+
+'''
+****************************************
+* Constants
+****************************************
+'''
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+DEFAULT_REPEAT = 3
+DEFAULT_POKEMON_ROWS = 20000
+# feed events are spread over this timerange around now
+FEED_TIMERANGE_DAYS = 60
+FEED_EVENT_TYPES = ["event", "community-day", "spotlight-hour", "raid-hour"]
+# time since last reset check (one EventManager cycle with scheduler wakeup)
+CHECK_TIMEWINDOW_S = 60
+BENCHMARK_TG_TOKEN = "123:benchmark"
+BENCHMARK_CONFIG = {
+    "general": {
+        "sleep": "3600",
+        "reset_pokemon_enable": "true",
+        "reset_pokemon_strategy": "filtered",
+        "reset_pokemon_chunk_pause": "0",
+        "reset_quests_enable": "true",
+        "reset_quests_event_type": "event community-day spotlight-hour",
+        "quest_rescan_timewindow": "0-23",
+    },
+    "scanner": {
+        "scanner": "mad",
+        "db_name": "benchmark",
+        "db_user": "benchmark",
+        "db_password": "benchmark",
+    },
+    "telegram": {
+        "tg_info_enable": "true",
+        "tg_bot_token": BENCHMARK_TG_TOKEN,
+        "tg_chat_id": "1",
+    },
+    "discord": {
+        "dc_info_enable": "true",
+    },
+}
+
+'''
+****************************************
+* Global variables
+****************************************
+'''
+log = logging.getLogger("benchmark")
+
+'''
+****************************************
+* Classes
+****************************************
+'''
+# Local stub for event feed, madmin, RDM, Golbat, Telegram and Discord
+class StubRequestHandler(BaseHTTPRequestHandler):
+    # keep-alive like the real services
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _send(self, status_code, body = b"", headers = {}):
+        self.send_response(status_code)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/events.json":
+            feed, etag = self.server.feed
+            if self.headers.get("If-None-Match", None) == etag:
+                self._send(304, headers = {"ETag": etag})
+            else:
+                self._send(200, feed, headers = {"ETag": etag, "Content-Type": "application/json"})
+        elif path == "/reload":
+            self._send(200, b"ok")
+        elif path == "/api/set_data":
+            self._send(200, b'{"status": "ok"}', headers = {"Content-Type": "application/json"})
+        elif path.endswith("/sendMessage"):
+            self._send(200, b'{"ok": true, "result": {}}', headers = {"Content-Type": "application/json"})
+        else:
+            self._send(404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?")[0]
+        if path == "/api/clear-quests":
+            self._send(202)
+        elif path == "/webhook":
+            self._send(204)
+        else:
+            self._send(404)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubHttpServer():
+    def __init__(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.feed = (b"[]", '"0"')
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="benchmark-stub", daemon=True)
+        self._thread.start()
+        self.port = self._httpd.server_address[1]
+        self.url = f"http://localhost:{self.port}"
+
+    def set_feed(self, raw_events):
+        feed = json.dumps(raw_events).encode("utf8")
+        self._httpd.feed = (feed, f'"{len(raw_events)}-{hash(feed)}"')
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+# In-memory SQLite stand-in for the MAD database. Translates the MySQL specific queries of MadConnector.
+class BenchmarkDbConnector(scannerconnector.DbConnector):
+    def __init__(self):
+        super().__init__(host="localhost", db_name="benchmark", username="benchmark", password="benchmark")
+        self._sqlite = sqlite3.connect(":memory:", check_same_thread=False)
+        self._sqlite_lock = threading.Lock()
+        self._sqlite.executescript("""
+            CREATE TABLE trs_event (event_name TEXT PRIMARY KEY, event_start TEXT, event_end TEXT, event_lure_duration INTEGER);
+            CREATE TABLE trs_quest (GUID TEXT PRIMARY KEY, quest_timestamp INTEGER);
+            CREATE TABLE pokemon (encounter_id INTEGER PRIMARY KEY, last_modified TEXT, disappear_time TEXT);
+        """)
+
+    def _get_sqlite_query(self, query):
+        query = re.sub(r"^TRUNCATE (\w+)", r"DELETE FROM \1", query)
+        query = query.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT(event_name) DO UPDATE SET")
+        query = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", query)
+        query = query.replace(" FROM DUAL", "")
+        return query.replace("%s", "?")
+
+    def _get_sqlite_params(self, params):
+        return tuple(param.strftime("%Y-%m-%d %H:%M:%S") if isinstance(param, datetime) else param for param in params)
+
+    def execute(self, query, params=(), commit=False, prepared=True):
+        with self._sqlite_lock:
+            cursor = self._sqlite.execute(self._get_sqlite_query(query), self._get_sqlite_params(params))
+            if commit:
+                self._sqlite.commit()
+                return cursor.rowcount
+            column_names = [column[0] for column in cursor.description]
+            return [dict(zip(column_names, row)) for row in cursor.fetchall()]
+
+    def execute_transaction(self, statements):
+        with self._sqlite_lock:
+            try:
+                rowcount = 0
+                for query, params in statements:
+                    rowcount += max(self._sqlite.execute(self._get_sqlite_query(query), self._get_sqlite_params(params)).rowcount, 0)
+                self._sqlite.commit()
+                return rowcount
+            except sqlite3.Error:
+                self._sqlite.rollback()
+                log.exception("BenchmarkDbConnector: transaction failed")
+                return None
+
+    def has_unique_key(self, table, column):
+        return True
+
+    def _get_threads_running(self):
+        return 1
+
+    def fill_pokemon(self, num_rows, eventchange_datetime_UTC):
+        # half of the pokemon scanned before event change
+        with self._sqlite_lock:
+            self._sqlite.execute("DELETE FROM pokemon")
+            rows = []
+            for encounter_id in range(num_rows):
+                last_modified = eventchange_datetime_UTC + timedelta(minutes=(-10 if encounter_id % 2 else 10))
+                disappear_time = eventchange_datetime_UTC + timedelta(minutes=30)
+                rows.append((encounter_id, last_modified.strftime("%Y-%m-%d %H:%M:%S"), disappear_time.strftime("%Y-%m-%d %H:%M:%S")))
+            self._sqlite.executemany("INSERT INTO pokemon VALUES (?, ?, ?)", rows)
+            self._sqlite.commit()
+
+'''
+****************************************
+* Module functions
+****************************************
+'''
+def benchmark_generate_feed(num_events, now):
+    # synthetic pogoinfo feed: events spread over FEED_TIMERANGE_DAYS around now, mixed types and changes
+    raw_events = []
+    first_start = now - timedelta(days=FEED_TIMERANGE_DAYS / 2)
+    step = timedelta(days=FEED_TIMERANGE_DAYS) / max(num_events, 1)
+    for index in range(num_events):
+        start = first_start + index * step
+        end = start + timedelta(hours=1 + (index % 7) * 24)
+        raw_events.append(helper_generate_raw_eventdata(
+            event_type = FEED_EVENT_TYPES[index % len(FEED_EVENT_TYPES)],
+            event_name = f"benchmark event {index}",
+            start = start,
+            end = end,
+            has_spawnpoints = (index % 3 == 0),
+            has_quests = (index % 2 == 0),
+            bonus_lure_duration = (180 if index % 5 == 0 else None),
+            spawns = (TESTDATA_SPAWNS_DUMMYPOKEMON if index % 4 == 0 else [])))
+    return raw_events
+
+def benchmark_create_event_manager(stub, http_client, tmpdir):
+    # EventManager with benchmark config, connected to stub server and SQLite stand-in DB
+    event_manager = eventmanager.EventManager("/config/config_benchmark_missing.ini")
+    config = dict(BENCHMARK_CONFIG)
+    config["general"] = dict(config["general"], custom_eventcache_path = tmpdir + "/")
+    config["scanner"] = dict(config["scanner"], rescan_trigger_madmin_ports = str(stub.port))
+    config["discord"] = dict(config["discord"], dc_webhook_url = stub.url + "/webhook")
+    event_manager._config.read_dict(config)
+    event_manager._load_config_parameter()
+    event_manager._http_client = http_client
+    event_manager._pogo_info_event_list = eventmanager.PogoInfoEventList(source_url = stub.url + "/events.json", http_client = http_client)
+    event_manager._scannerconnector = scannerconnector.MadConnector("localhost", 3306, "benchmark", "benchmark", "benchmark", reload_port_list = [str(stub.port)], delete_chunk_pause_s = 0, http_client = http_client)
+    event_manager._scannerconnector._dbconnector = BenchmarkDbConnector()
+    event_manager._api = SimpleTelegramApi(BENCHMARK_TG_TOKEN, http_client = http_client)
+    event_manager._api._base_url = f"{stub.url}/bot{BENCHMARK_TG_TOKEN}/"
+    event_manager._notification_dispatcher = NotificationDispatcher()
+    return event_manager
+
+def benchmark_measure(function, repeat, setup = None):
+    # return timing statistic of repeated function call. setup is called before each run and not measured
+    durations = []
+    for run in range(repeat):
+        if setup is not None:
+            setup()
+        start_time = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start_time)
+    return {"repeat": repeat, "min_s": round(min(durations), 6), "mean_s": round(sum(durations) / len(durations), 6), "max_s": round(max(durations), 6)}
+
+def benchmark_feed(stub, http_client, tmpdir, num_events, repeat):
+    results = []
+    now = datetime.now()
+    raw_events = benchmark_generate_feed(num_events, now)
+    stub.set_feed(raw_events)
+    event_manager = benchmark_create_event_manager(stub, http_client, tmpdir)
+
+    def from_pogoinfo():
+        for raw_event in raw_events:
+            eventmanager.PoGoEvent.fromPogoinfo(raw_event)
+    results.append(dict(name = "PoGoEvent.fromPogoinfo", size = num_events, **benchmark_measure(from_pogoinfo, repeat)))
+
+    def new_event_list():
+        # full download and processing for each run (no ETag and event list from previous run)
+        event_manager._pogo_info_event_list = eventmanager.PogoInfoEventList(source_url = stub.url + "/events.json", http_client = http_client)
+        event_manager._event_snapshot = EventSnapshot()
+    results.append(dict(name = "EventManager._get_events", size = num_events, **benchmark_measure(event_manager._get_events, repeat, setup = new_event_list)))
+    results.append(dict(name = "EventManager._get_events (not modified)", size = num_events, **benchmark_measure(event_manager._get_events, repeat)))
+
+    def reset_eventcache_hash():
+        event_manager._eventcache_hash = None
+    results.append(dict(name = "EventManager._update_event_cache", size = num_events, **benchmark_measure(event_manager._update_event_cache, repeat, setup = reset_eventcache_hash)))
+    results.append(dict(name = "EventManager._update_event_cache (unchanged)", size = num_events, **benchmark_measure(event_manager._update_event_cache, repeat)))
+
+    def reset_quest_check():
+        event_manager._last_quest_reset_check = datetime.now() - timedelta(seconds=CHECK_TIMEWINDOW_S)
+    results.append(dict(name = "EventManager._check_quest_resets", size = num_events, **benchmark_measure(event_manager._check_quest_resets, repeat, setup = reset_quest_check)))
+
+    def reset_pokemon_check():
+        event_manager._last_pokemon_reset_check = datetime.now() - timedelta(seconds=CHECK_TIMEWINDOW_S)
+    results.append(dict(name = "EventManager._check_pokemon_resets", size = num_events, **benchmark_measure(event_manager._check_pokemon_resets, repeat, setup = reset_pokemon_check)))
+    return results
+
+def benchmark_connectors(stub, http_client, num_pokemon_rows, repeat):
+    results = []
+    eventchange_datetime_UTC = datetime(2030, 1, 1, 12, 0, 0)
+    mad_connector = scannerconnector.MadConnector("localhost", 3306, "benchmark", "benchmark", "benchmark", reload_port_list = [str(stub.port), str(stub.port)], delete_chunk_pause_s = 0, http_client = http_client)
+    mad_connector._dbconnector = BenchmarkDbConnector()
+    events = [("Regular Events", "2030-01-01 10:00:00", "2030-01-01 12:00:00", 30), ("Community Days", "2030-01-02 10:00:00", "2030-01-02 12:00:00", 180)]
+    default_events = [("DEFAULT", eventmanager.DEFAULT_TIME, eventmanager.DEFAULT_TIME, eventmanager.DEFAULT_LURE_DURATION), ("Others", eventmanager.DEFAULT_TIME, eventmanager.DEFAULT_TIME, eventmanager.DEFAULT_LURE_DURATION)]
+    results.append(dict(name = "MadConnector.sync_events", size = len(events) + len(default_events), **benchmark_measure(lambda: mad_connector.sync_events(events, default_events, delete_others=True), repeat)))
+    results.append(dict(name = "MadConnector.reset_filtered_pokemon", size = num_pokemon_rows, **benchmark_measure(lambda: mad_connector.reset_filtered_pokemon(eventchange_datetime_UTC), repeat, setup = lambda: mad_connector._dbconnector.fill_pokemon(num_pokemon_rows, eventchange_datetime_UTC))))
+    results.append(dict(name = "MadConnector.reset_all_quests", size = 1, **benchmark_measure(mad_connector.reset_all_quests, repeat)))
+    results.append(dict(name = "MadConnector.trigger_rescan", size = 2, **benchmark_measure(mad_connector.trigger_rescan, repeat)))
+
+    rdm_connector = scannerconnector.RdmConnector(stub.url, "benchmark", "benchmark", "benchmark", http_client = http_client)
+    results.append(dict(name = "RdmConnector.reset_all_quests", size = 1, **benchmark_measure(rdm_connector.reset_all_quests, repeat)))
+    results.append(dict(name = "RdmConnector.trigger_rescan", size = 1, **benchmark_measure(rdm_connector.trigger_rescan, repeat)))
+
+    golbat_connector = scannerconnector.GolbathybridConnector(stub.url, "benchmark", "benchmark", "benchmark", stub.url, "benchmark", http_client = http_client)
+    results.append(dict(name = "GolbathybridConnector.reset_all_quests", size = 1, **benchmark_measure(golbat_connector.reset_all_quests, repeat)))
+    return results
+
+def benchmark_get_git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(eventmanager.__file__)), capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmarks(sizes = DEFAULT_SIZES, repeat = DEFAULT_REPEAT, num_pokemon_rows = DEFAULT_POKEMON_ROWS):
+    # run all benchmarks and return result dict
+    stub = StubHttpServer()
+    http_client = HttpClient()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for num_events in sizes:
+                log.info(f"benchmark: feed with {num_events} events...")
+                results += benchmark_feed(stub, http_client, tmpdir, num_events, repeat)
+            log.info(f"benchmark: connectors...")
+            results += benchmark_connectors(stub, http_client, num_pokemon_rows, repeat)
+    finally:
+        http_client.close()
+        stub.stop()
+    return {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "git_revision": benchmark_get_git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+            "repeat": repeat,
+            "pokemon_rows": num_pokemon_rows
+        },
+        "results": results
+    }
+
+def compare_results(old_result, new_result):
+    # return list of (name, size, old mean, new mean, ratio) for all benchmarks in both results
+    old_means = {(result["name"], result["size"]): result["mean_s"] for result in old_result["results"]}
+    comparison = []
+    for result in new_result["results"]:
+        old_mean = old_means.get((result["name"], result["size"]), None)
+        if old_mean is None:
+            continue
+        ratio = result["mean_s"] / old_mean if old_mean > 0 else None
+        comparison.append((result["name"], result["size"], old_mean, result["mean_s"], ratio))
+    return comparison
+
+'''
+****************************************
+* main functions
+****************************************
+'''
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help=f'number of events in synthetic feeds. Default:{DEFAULT_SIZES}')
+    parser.add_argument('-r', '--repeat', type=int, default=DEFAULT_REPEAT, help=f'number of runs per benchmark. Default:{DEFAULT_REPEAT}')
+    parser.add_argument('-p', '--pokemon-rows', type=int, default=DEFAULT_POKEMON_ROWS, help=f'number of pokemon rows for reset benchmarks. Default:{DEFAULT_POKEMON_ROWS}')
+    parser.add_argument('-o', '--output', default=None, help='write JSON result to file. Default: stdout')
+    parser.add_argument('-c', '--compare', default=None, help='JSON result of a previous run. Mean time ratio (new/old) is printed to stderr')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='[%(asctime)s] [%(name)12s] [%(levelname)7s] %(message)s')
+    log.setLevel(logging.INFO)
+    result = run_benchmarks(sizes = args.sizes, repeat = args.repeat, num_pokemon_rows = args.pokemon_rows)
+    result_str = json.dumps(result, indent=2)
+    if args.output is None:
+        print(result_str)
+    else:
+        with open(args.output, "w") as output_file:
+            output_file.write(result_str)
+    if args.compare is not None:
+        with open(args.compare) as compare_file:
+            old_result = json.load(compare_file)
+        for name, size, old_mean, new_mean, ratio in compare_results(old_result, result):
+            ratio_str = f"{ratio:.2f}x" if ratio is not None else "n/a"
+            print(f"{name:45} {size:>7} {old_mean:>10.6f}s -> {new_mean:>10.6f}s {ratio_str}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
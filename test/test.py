@@ -12,6 +12,15 @@ Links:
 * Import
 ****************************************
 '''
+# os functions (path, ...)
+import os
+import sys
+import subprocess
+import tempfile
+import urllib.request
+import urllib.error
+import json
+import gzip
 # unit testing
 import unittest
 from unittest.mock import patch, MagicMock
@@ -20,10 +29,19 @@ import logging
 from logging.handlers import RotatingFileHandler
 # time handling
 import time
+import threading
+import asyncio
 from datetime import datetime, timedelta
+from functools import partial
 
 #test objects
 import eventmanager
+import scannerconnector
+import httpclient
+import notifier
+import metrics
+import jobqueue
+import simulator
 import mysql.connector
 import requests
 
@@ -65,8 +83,8 @@ class TestEventManager(unittest.TestCase):
         self.addCleanup(patcher.stop)
         self.mock_tg_send.return_value = {"ok": True}
         
-        # mock request.post function, used by discord send (used to avoid flooding Discord API)
-        patcher = patch('requests.post', autospec=True)
+        # mock HttpClient.post function, used by discord send (used to avoid flooding Discord API)
+        patcher = patch('httpclient.HttpClient.post', autospec=True)
         self.mock_requests_post = patcher.start()
         self.addCleanup(patcher.stop)
         self.request_response = requests.Response()
@@ -100,6 +118,9 @@ class TestEventManager(unittest.TestCase):
         patcher = patch('eventmanager.MadConnector.reset_all_quests', autospec=True)
         self.mock_mad_reset_all_quests = patcher.start()
         self.addCleanup(patcher.stop)
+        patcher = patch('eventmanager.MadConnector.reset_filtered_quests', autospec=True)
+        self.mock_mad_reset_filtered_quests = patcher.start()
+        self.addCleanup(patcher.stop)
         patcher = patch('eventmanager.MadConnector.reset_all_pokemon', autospec=True)
         self.mock_mad_reset_all_pokemon = patcher.start()
         self.addCleanup(patcher.stop)
@@ -109,6 +130,10 @@ class TestEventManager(unittest.TestCase):
         patcher = patch('eventmanager.MadConnector.trigger_rescan', autospec=True)
         self.mock_mad_trigger_rescan = patcher.start()
         self.addCleanup(patcher.stop)
+        patcher = patch('eventmanager.MadConnector.sync_events', autospec=True)
+        self.mock_mad_sync_events = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_mad_sync_events.return_value = True
 
     @patch('eventmanager.PogoInfoEventList.get_json')
     def test_get_events_pokemon_event_by_spawns(self, mock_get_json):
@@ -172,6 +197,56 @@ class TestEventManager(unittest.TestCase):
         raw_event_list = [testevent1]
         testhelper_get_events(self, mock_get_json, raw_event_list, num_all=1, num_pokemon=0, num_quest=0, num_spawn=1)
 
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_spawn_event_sync(self, mock_get_json):
+        testevent1 = helper_generate_raw_eventdata(event_type = "event", event_name="testevent", start = TESTDATA_DEFAULT_START_TIME, end = TESTDATA_DEFAULT_END_TIME, has_spawnpoints=True, has_quests=False)
+        testhelper_get_events(self, mock_get_json, [testevent1], num_all=1, num_pokemon=0, num_quest=0, num_spawn=1)
+        self.mock_mad_sync_events.assert_called_once()
+        call_args = self.mock_mad_sync_events.call_args
+        events = call_args.args[1]
+        default_events = call_args.args[2]
+        self.assertEqual(events, [("Regular Events", "2010-01-01 10:00:00", "2010-01-01 12:00:00", eventmanager.DEFAULT_LURE_DURATION)])
+        self.assertEqual(sorted(event[0] for event in default_events), sorted(name for name in self._event_manager.type_to_name.values() if name != "Regular Events"))
+        self.assertFalse(call_args.kwargs["delete_others"])
+
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_event_diff_scanner_sync(self, mock_get_json):
+        testevent_1 = helper_generate_raw_eventdata_spawn("testevent1", TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME)
+        testevent_2 = helper_generate_raw_eventdata_quest("testevent2", TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME)
+        testhelper_get_events(self, mock_get_json, [testevent_1, testevent_2], num_all=2, num_pokemon=0, num_quest=1, num_spawn=1)
+        self.mock_mad_sync_events.assert_called_once()
+        self.assertEqual(len(self._event_manager.get_last_event_diff().added), 2)
+
+        log_teststep(1, "unchanged event list -> no scanner sync")
+        self.mock_mad_sync_events.reset_mock()
+        self._event_manager._get_events()
+        self._event_manager._update_spawn_events_in_scanner()
+        self.assertTrue(self._event_manager.get_last_event_diff().is_empty())
+        self.mock_mad_sync_events.assert_not_called()
+
+        log_teststep(2, "changed quest event -> no scanner sync")
+        testevent_2["end"] = (TESTDATA_DEFAULT_END_TIME + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M")
+        self._event_manager._get_events()
+        self._event_manager._update_spawn_events_in_scanner()
+        self.assertEqual(len(self._event_manager.get_last_event_diff().changed), 1)
+        self.mock_mad_sync_events.assert_not_called()
+
+        log_teststep(3, "changed spawn event -> scanner sync, failed sync is repeated")
+        testevent_1["end"] = (TESTDATA_DEFAULT_END_TIME + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M")
+        self.mock_mad_sync_events.return_value = False
+        self._event_manager._get_events()
+        self.assertFalse(self._event_manager._update_spawn_events_in_scanner())
+        self.mock_mad_sync_events.return_value = True
+        self._event_manager._get_events()
+        self.assertTrue(self._event_manager._update_spawn_events_in_scanner())
+        self.assertEqual(self.mock_mad_sync_events.call_count, 2)
+
+        log_teststep(4, "removed event")
+        mock_get_json.return_value = [testevent_1]
+        self._event_manager._get_events()
+        self.assertEqual([event.name for event in self._event_manager.get_last_event_diff().removed], ["testevent2"])
+        self.assertEqual(len(self._event_manager._quest_events), 0)
+
     @patch('eventmanager.PogoInfoEventList.get_json')
     def test_quest_reset(self, mock_get_json):
         test_step = 1
@@ -220,6 +295,30 @@ class TestEventManager(unittest.TestCase):
         self._event_manager.run()
         testhelper_check_questevent_not_triggered(self)
 
+    @patch('asyncio.sleep')
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_quest_reset_async(self, mock_get_json, mock_asyncio_sleep):
+        # use mocked trigger_rescan also for asyncio engine (parallel madmin reload is tested in TestConnectors)
+        patcher = patch('eventmanager.MadConnector.trigger_rescan_async', new=lambda connector: scannerconnector.run_in_executor(connector.trigger_rescan))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        start = datetime(2010, 1, 1, hour=10, minute=0)
+        end = datetime(2010, 1, 1, hour=12, minute=0)
+        mock_get_json.return_value = [helper_generate_raw_eventdata_quest("testevent", start, end)]
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=9, minute=59, second=59)
+        self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+        self.assertTrue(helper_eventmanager_connect(self))
+
+        log_teststep(1, "event_manager.run_async() t='2010-01-01 09:59:59'")
+        asyncio.run(self._event_manager.run_async())
+        testhelper_check_questevent_not_triggered(self)
+
+        log_teststep(2, "event_manager.run_async() t='2010-01-01 10:00:00' -> event start triggered")
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=10, minute=0, second=0)
+        asyncio.run(self._event_manager.run_async())
+        testhelper_check_questevent_triggered(self)
+        mock_asyncio_sleep.assert_called_with(60*60 - 1)
+
     @patch('eventmanager.PogoInfoEventList.get_json')
     def test_pokemon_reset_filtered(self, mock_get_json):
         test_step = 1
@@ -234,6 +333,7 @@ class TestEventManager(unittest.TestCase):
         self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
         self._event_manager._EventManager__reset_pokemon_enable = True
         self._event_manager._EventManager__reset_pokemon_strategy = "filtered"
+        self._event_manager._EventManager__reset_pokemon_species_filter = True
         
         test_step = log_teststep(test_step, "event_manager.connect() t='2010-01-01 09:59:59'")
         self.mock_now.return_value = datetime(2010, 1, 1, hour=9, minute=59, second=59)
@@ -249,6 +349,8 @@ class TestEventManager(unittest.TestCase):
         self.mock_now.return_value = datetime(2010, 1, 1, hour=10, minute=0, second=0)
         self._event_manager.run()
         self.mock_mad_reset_filtered_pokemon.assert_called()
+        # event start: all species
+        self.assertIsNone(self.mock_mad_reset_filtered_pokemon.call_args.kwargs["pokemon_ids"])
         self.mock_mad_reset_filtered_pokemon.reset_mock()
         
         test_step = log_teststep(test_step, "event_manager.run() t='2010-01-01 10:00:01'")
@@ -265,6 +367,8 @@ class TestEventManager(unittest.TestCase):
         self.mock_now.return_value = datetime(2010, 1, 1, hour=12, minute=0, second=0)
         self._event_manager.run()
         self.mock_mad_reset_filtered_pokemon.assert_called()
+        # event end: only species of event spawn list
+        self.assertEqual(self.mock_mad_reset_filtered_pokemon.call_args.kwargs["pokemon_ids"], [123])
         self.mock_mad_reset_filtered_pokemon.reset_mock()
         
         test_step = log_teststep(test_step, "event_manager.run() t='2010-01-01 12:00:01'")
@@ -325,6 +429,749 @@ class TestEventManager(unittest.TestCase):
         self._event_manager.run()
         self.mock_mad_reset_all_pokemon.assert_not_called()
 
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_quest_reset_multiple_events(self, mock_get_json):
+        # two quest events with same start and one event with end at same time
+        start = datetime(2010, 1, 1, hour=10, minute=0)
+        end = datetime(2010, 1, 1, hour=12, minute=0)
+        testevent_1 = helper_generate_raw_eventdata_quest("testevent1", start, end)
+        testevent_2 = helper_generate_raw_eventdata_quest("testevent2", start, end)
+        testevent_3 = helper_generate_raw_eventdata_quest("testevent3", start - timedelta(hours=1), start)
+        mock_get_json.return_value = [testevent_1, testevent_2, testevent_3]
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=8, minute=0, second=0)
+        self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+        self.assertTrue(helper_eventmanager_connect(self))
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=9, minute=59, second=0)
+        self._event_manager.run()
+        testhelper_check_questevent_triggered(self)
+
+        log_teststep(1, "event_manager.run() t='2010-01-01 10:00:00' -> all events handled with one quest reset")
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=10, minute=0, second=0)
+        self._event_manager.run()
+        self.mock_mad_reset_all_quests.assert_called_once()
+        self.mock_mad_trigger_rescan.assert_called_once()
+        self.assertEqual(self.mock_tg_send.call_count, 3)
+        testhelper_check_questevent_triggered(self)
+
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_quest_reset_filtered(self, mock_get_json):
+        start = datetime(2010, 1, 1, hour=10, minute=0)
+        end = datetime(2010, 1, 1, hour=12, minute=0)
+        mock_get_json.return_value = [helper_generate_raw_eventdata_quest("testevent1", start, end)]
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=8, minute=0, second=0)
+        self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+        self._event_manager._EventManager__reset_quests_strategy = "filtered"
+        self.assertTrue(helper_eventmanager_connect(self))
+        log_teststep(1, "event_manager.run() t='2010-01-01 10:00:00' -> quests scanned before event start deleted")
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=10, minute=0, second=0)
+        self._event_manager.run()
+        self.mock_mad_reset_all_quests.assert_not_called()
+        self.mock_mad_reset_filtered_quests.assert_called_once()
+        self.assertEqual(self.mock_mad_reset_filtered_quests.call_args.args[1], start - timedelta(hours=self._event_manager.tz_offset))
+        self.mock_mad_trigger_rescan.assert_called_once()
+
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_quest_reset_jobqueue(self, mock_get_json):
+        start = datetime(2010, 1, 1, hour=10, minute=0)
+        end = datetime(2010, 1, 1, hour=12, minute=0)
+        mock_get_json.return_value = [helper_generate_raw_eventdata_quest("testevent1", start, end)]
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=8, minute=0, second=0)
+        self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+        self._event_manager._EventManager__jobs_enable = True
+        self._event_manager._EventManager__jobs_queue_path = None
+        self.assertTrue(helper_eventmanager_connect(self))
+        log_teststep(1, "event_manager.run() t='2010-01-01 10:00:00' -> quest reset and rescan queued, notification sent")
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=10, minute=0, second=0)
+        self._event_manager.run()
+        self.assertTrue(self._event_manager._jobqueue.wait_idle(5))
+        self._event_manager._jobqueue.shutdown()
+        self.mock_mad_reset_all_quests.assert_called_once()
+        self.mock_mad_trigger_rescan.assert_called_once()
+        self.assertEqual(self.mock_tg_send.call_count, 1)
+        self.assertEqual(self._event_manager.get_job_status()["done"], 1)
+
+    @patch('eventmanager.PogoInfoEventList.get_cached_json')
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_state_restart_across_boundary(self, mock_get_json, mock_get_cached_json):
+        start = datetime(2010, 1, 1, hour=10, minute=0)
+        end = datetime(2010, 1, 1, hour=12, minute=0)
+        mock_get_json.return_value = [helper_generate_raw_eventdata_quest("testevent1", start, end)]
+        # first start without cached event list
+        mock_get_cached_json.return_value = None
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_path = os.path.join(tmpdir, ".eventmanagerstate")
+            def start_event_manager():
+                self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+                self._event_manager._EventManager__state_enable = True
+                self._event_manager._EventManager__state_path = state_path
+                self.assertTrue(helper_eventmanager_connect(self))
+            self.mock_now.return_value = datetime(2010, 1, 1, hour=9, minute=0, second=0)
+            start_event_manager()
+            self.assertIsNone(self._event_manager._background_event_update)
+            self._event_manager.run()
+            log_teststep(1, "restart at t='2010-01-01 10:30:00' -> warm start, missed event start caught up")
+            self.mock_now.return_value = datetime(2010, 1, 1, hour=10, minute=30, second=0)
+            mock_get_cached_json.return_value = [helper_generate_raw_eventdata_quest("testevent1", start, end)]
+            start_event_manager()
+            self._event_manager._background_event_update.join(5)
+            self._event_manager.run()
+            self.mock_mad_reset_all_quests.assert_called_once()
+            log_teststep(2, "restart again -> no second reset")
+            self.mock_now.return_value = datetime(2010, 1, 1, hour=10, minute=31, second=0)
+            start_event_manager()
+            self._event_manager._background_event_update.join(5)
+            self._event_manager.run()
+            self.mock_mad_reset_all_quests.assert_called_once()
+
+    @patch('eventmanager.PogoInfoEventList.get_cached_json')
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_state_restart_across_end_boundary(self, mock_get_json, mock_get_cached_json):
+        start = datetime(2010, 1, 1, hour=10, minute=0)
+        raw_events = [helper_generate_raw_eventdata_quest("testevent1", start, datetime(2010, 1, 1, hour=12, minute=0)), helper_generate_raw_eventdata_quest("testevent2", start, datetime(2010, 1, 1, hour=13, minute=0))]
+        mock_get_json.return_value = raw_events
+        mock_get_cached_json.return_value = None
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_path = os.path.join(tmpdir, ".eventmanagerstate")
+            def start_event_manager():
+                self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+                self._event_manager._EventManager__state_enable = True
+                self._event_manager._EventManager__state_path = state_path
+                self.assertTrue(helper_eventmanager_connect(self))
+            self.mock_now.return_value = datetime(2010, 1, 1, hour=11, minute=59, second=0)
+            start_event_manager()
+            self._event_manager.run()
+            self.mock_mad_reset_all_quests.assert_not_called()
+            log_teststep(1, "restart at t='2010-01-01 12:05:00' -> ended event kept, missed event end caught up")
+            self.mock_now.return_value = datetime(2010, 1, 1, hour=12, minute=5, second=0)
+            mock_get_cached_json.return_value = raw_events
+            start_event_manager()
+            self._event_manager._background_event_update.join(5)
+            self.assertEqual([event.name for event in self._event_manager._quest_events], ["testevent1", "testevent2"])
+            self._event_manager.run()
+            self.mock_mad_reset_all_quests.assert_called_once()
+            self.assertEqual(self._event_manager._state_store.get_resets(), [{"reset": "quests", "boundary": "2010-01-01T12:00:00", "event": "testevent1", "kind": "end"}])
+            log_teststep(2, "failed reset at t='2010-01-01 13:00:00' -> not stored as performed")
+            self.mock_mad_reset_all_quests.return_value = False
+            self.mock_now.return_value = datetime(2010, 1, 1, hour=13, minute=0, second=0)
+            self._event_manager.run()
+            self.assertEqual(self.mock_mad_reset_all_quests.call_count, 2)
+            self.assertEqual(len(self._event_manager._state_store.get_resets()), 1)
+            self.assertLess(self._event_manager._state_store.get_datetime("last_quest_reset_check"), datetime(2010, 1, 1, hour=13, minute=0))
+            log_teststep(3, "restart at t='2010-01-01 13:05:00' -> failed reset caught up")
+            self.mock_mad_reset_all_quests.return_value = True
+            self.mock_now.return_value = datetime(2010, 1, 1, hour=13, minute=5, second=0)
+            start_event_manager()
+            self._event_manager._background_event_update.join(5)
+            self._event_manager.run()
+            self.assertEqual(self.mock_mad_reset_all_quests.call_count, 3)
+            self.assertEqual(self._event_manager._state_store.get_resets()[-1], {"reset": "quests", "boundary": "2010-01-01T13:00:00", "event": "testevent2", "kind": "end"})
+            self.assertEqual(self._event_manager._state_store.get_datetime("last_quest_reset_check"), datetime(2010, 1, 1, hour=13, minute=5))
+
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_state_persisted_reset_job(self, mock_get_json):
+        mock_get_json.return_value = []
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=10, minute=5, second=0)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            jobs_path = os.path.join(tmpdir, ".jobqueue")
+            with open(jobs_path, "w") as jobs_file:
+                json.dump([{"id": "1-1", "name": "reset_quests", "kwargs": {"eventchange": "2010-01-01T09:00:00", "boundary": "2010-01-01T10:00:00", "trigger_rescan": False, "resets": [["2010-01-01T10:00:00", "testevent1", "start"]]}, "status": "running", "created": 1.0}], jobs_file)
+            self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+            self._event_manager._EventManager__jobs_enable = True
+            self._event_manager._EventManager__jobs_queue_path = jobs_path
+            self._event_manager._EventManager__state_enable = True
+            self._event_manager._EventManager__state_path = os.path.join(tmpdir, ".eventmanagerstate")
+            log_teststep(1, "restart with persisted reset job -> state loaded before job resubmit, reset stored as performed")
+            state_loaded_on_start = []
+            jobqueue_start = jobqueue.JobQueue.start
+            def start_jobqueue(queue):
+                state_loaded_on_start.append(self._event_manager._state_store is not None)
+                jobqueue_start(queue)
+            with patch.object(jobqueue.JobQueue, "start", start_jobqueue):
+                self.assertTrue(helper_eventmanager_connect(self))
+            self.assertEqual(state_loaded_on_start, [True])
+            self.assertTrue(self._event_manager._jobqueue.wait_idle(5))
+            self._event_manager._jobqueue.shutdown()
+            self.mock_mad_reset_all_quests.assert_called_once()
+            self.assertEqual(self._event_manager._state_store.get_resets(), [{"reset": "quests", "boundary": "2010-01-01T10:00:00", "event": "testevent1", "kind": "start"}])
+
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_event_api(self, mock_get_json):
+        start = datetime(2010, 1, 1, hour=10, minute=0)
+        end = datetime(2010, 1, 1, hour=12, minute=0)
+        mock_get_json.return_value = [helper_generate_raw_eventdata_quest("testevent1", start, end), helper_generate_raw_eventdata_spawn("testevent2", start + timedelta(days=1), end + timedelta(days=1))]
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=8, minute=0, second=0)
+        self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+        self._event_manager._EventManager__eventapi_enable = True
+        self._event_manager._EventManager__eventapi_port = 0
+        self.assertTrue(helper_eventmanager_connect(self))
+        self.addCleanup(self._event_manager._event_api.stop)
+        base_url = f"http://127.0.0.1:{self._event_manager._event_api.get_address()[1]}"
+        with urllib.request.urlopen(base_url + "/events?category=quests") as response:
+            events = json.loads(response.read())["events"]
+            etag = response.headers["ETag"]
+        self.assertEqual([event["name"] for event in events], ["testevent1"])
+        # unfiltered response serialized on event update, not on request
+        self.assertEqual(self._event_manager._event_api.get_snapshot()._responses, {})
+        log_teststep(1, "conditional request -> 304")
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(urllib.request.Request(base_url + "/events?category=quests", headers = {"If-None-Match": etag}))
+        self.assertEqual(context.exception.code, 304)
+        log_teststep(2, "time range filter and upcoming boundaries")
+        with urllib.request.urlopen(base_url + "/events?from=2010-01-02T00:00") as response:
+            self.assertEqual([event["name"] for event in json.loads(response.read())["events"]], ["testevent2"])
+        with urllib.request.urlopen(base_url + "/boundaries?to=2010-01-01T23:00") as response:
+            boundaries = json.loads(response.read())["boundaries"]
+        self.assertEqual([(boundary["name"], boundary["kind"], boundary["time"]) for boundary in boundaries], [("testevent1", "start", "2010-01-01 10:00:00"), ("testevent1", "end", "2010-01-01 12:00:00")])
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(base_url + "/events?category=unknown")
+        self.assertEqual(context.exception.code, 400)
+        log_teststep(3, "time with time zone -> 400")
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(base_url + "/events?from=2010-01-01T10:00%2B02:00")
+        self.assertEqual(context.exception.code, 400)
+        self.assertIn("time zone", json.loads(context.exception.read())["error"])
+
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_sleep_until_next_boundary(self, mock_get_json):
+        start = datetime(2010, 1, 1, hour=10, minute=0)
+        end = datetime(2010, 1, 1, hour=12, minute=0)
+        mock_get_json.return_value = [helper_generate_raw_eventdata_quest("testevent", start, end)]
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=9, minute=30, second=0)
+        self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+        self.assertTrue(helper_eventmanager_connect(self))
+
+        log_teststep(1, "event_manager.run() t='2010-01-01 09:30:00' -> sleep until event start")
+        self._event_manager.run()
+        self.mock_sleep.assert_called_with(30*60 + eventmanager.SCHEDULER_WAKEUP_DELAY_S)
+
+        log_teststep(2, "event_manager.run() t='2010-01-01 10:00:01' -> sleep until next event update (before event end)")
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=10, minute=0, second=1)
+        self._event_manager.run()
+        self.mock_sleep.assert_called_with(30*60 - 1)
+
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_metrics_reset_lag(self, mock_get_json):
+        start = datetime(2010, 1, 1, hour=10, minute=0)
+        end = datetime(2010, 1, 1, hour=12, minute=0)
+        mock_get_json.return_value = [helper_generate_raw_eventdata_quest("testevent", start, end)]
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=9, minute=59, second=0)
+        self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+        self.assertTrue(helper_eventmanager_connect(self))
+        registry = self._event_manager._metrics
+        num_quest_resets = registry.resets.get(reset="quests", result="successful")
+        num_failed_quest_resets = registry.resets.get(reset="quests", result="failed")
+        num_lag_observations = registry.reset_lag.get_count(reset="quests")
+        num_stage_errors = registry.stage_errors.get(stage="reset_quests")
+
+        log_teststep(1, "event_manager.run() t='2010-01-01 10:00:30' -> quest reset with 30s lag")
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=10, minute=0, second=30)
+        self._event_manager.run()
+        self.assertEqual(registry.resets.get(reset="quests", result="successful"), num_quest_resets + 1)
+        self.assertEqual(registry.reset_lag.get_count(reset="quests"), num_lag_observations + 1)
+        self.assertEqual(registry.stage_errors.get(stage="reset_quests"), num_stage_errors)
+        self.assertGreaterEqual(registry.connector_call_duration.get_count(connector="mad", call="reset_all_quests"), 1)
+        self.assertGreaterEqual(registry.stage_duration.get_count(stage="reset_quests"), 1)
+        self.assertGreaterEqual(registry.stage_duration.get_count(stage="get_events"), 1)
+
+        log_teststep(2, "event_manager.run() t='2010-01-01 12:00:30' -> failed quest reset: stage error, no lag")
+        self.mock_mad_reset_all_quests.return_value = False
+        self.mock_now.return_value = datetime(2010, 1, 1, hour=12, minute=0, second=30)
+        self._event_manager.run()
+        self.assertEqual(registry.resets.get(reset="quests", result="successful"), num_quest_resets + 1)
+        self.assertEqual(registry.resets.get(reset="quests", result="failed"), num_failed_quest_resets + 1)
+        self.assertEqual(registry.reset_lag.get_count(reset="quests"), num_lag_observations + 1)
+        self.assertEqual(registry.stage_errors.get(stage="reset_quests"), num_stage_errors + 1)
+
+        log_teststep(3, "prometheus text format")
+        test_registry = metrics.MetricsRegistry()
+        test_registry.reset_lag.observe(30, reset="quests")
+        test_registry.set_collector("test", lambda: ["test_metric 1"])
+        text = test_registry.get_prometheus_text()
+        self.assertIn('eventmanager_reset_lag_seconds_bucket{reset="quests",le="10"} 0', text)
+        self.assertIn('eventmanager_reset_lag_seconds_bucket{reset="quests",le="30"} 1', text)
+        self.assertIn('eventmanager_reset_lag_seconds_bucket{reset="quests",le="+Inf"} 1', text)
+        self.assertIn('eventmanager_reset_lag_seconds_sum{reset="quests"} 30', text)
+        self.assertIn("test_metric 1\n", text)
+
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_event_cache_unchanged(self, mock_get_json):
+        mock_get_json.return_value = [helper_generate_raw_eventdata_quest("testevent", TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME)]
+        self.mock_now.return_value = TESTDATA_DEFAULT_NOW_TIME
+        self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._event_manager._EventManager__eventcache_path = tmpdir + "/"
+            self._event_manager._EventManager__eventcache_gzip = True
+            self.assertTrue(helper_eventmanager_connect(self))
+            filepath = os.path.join(tmpdir, ".eventcache")
+            with open(filepath) as f:
+                eventcache = json.load(f)
+            self.assertEqual(eventcache["events"][1]["quests"][0]["name"], "testevent")
+            with gzip.open(filepath + ".gz") as f:
+                self.assertEqual(json.load(f), eventcache)
+            self.assertFalse(os.path.isfile(filepath + ".tmp"))
+
+            log_teststep(1, "unchanged events -> no write")
+            self.mock_now.return_value = TESTDATA_DEFAULT_NOW_TIME + timedelta(minutes=1)
+            self.assertFalse(self._event_manager._update_event_cache())
+
+            log_teststep(2, "changed events -> write")
+            self._event_manager._quest_events = []
+            self.assertTrue(self._event_manager._update_event_cache())
+            with open(filepath) as f:
+                self.assertEqual(json.load(f)["events"][1]["quests"], [])
+
+    def test_pogoinfo_time_parser(self):
+        self.assertEqual(eventmanager.helper_parse_pogoinfo_time("2010-01-01 10:05"), datetime(2010, 1, 1, 10, 5))
+        self.assertIs(eventmanager.helper_parse_pogoinfo_time("2010-01-01 10:05"), eventmanager.helper_parse_pogoinfo_time("2010-01-01 10:05"))
+        with self.assertRaises(ValueError):
+            eventmanager.helper_parse_pogoinfo_time("2010-13-01 10:05")
+        with self.assertRaises(ValueError):
+            eventmanager.helper_parse_pogoinfo_time("2010-01-01")
+        event = eventmanager.PoGoEvent.fromPogoinfo(helper_generate_raw_eventdata_quest("testevent", TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME))
+        self.assertEqual(event.start, TESTDATA_DEFAULT_START_TIME)
+        self.assertFalse(hasattr(event, "__dict__"))
+
+    @patch('eventmanager.PogoInfoEventList.get_json')
+    def test_get_events_views_sorted(self, mock_get_json):
+        testevent_1 = helper_generate_raw_eventdata_quest("testevent1", TESTDATA_DEFAULT_START_TIME + timedelta(hours=1), TESTDATA_DEFAULT_END_TIME)
+        testevent_2 = helper_generate_raw_eventdata_spawn("testevent2", TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME)
+        testevent_3 = helper_generate_raw_eventdata_quest("testevent3", TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME)
+        testhelper_get_events(self, mock_get_json, [testevent_1, testevent_2, testevent_3], num_all=3, num_pokemon=0, num_quest=2, num_spawn=1)
+        self.assertEqual([event.name for event in self._event_manager._quest_events], ["testevent3", "testevent1"])
+        # views share event objects of master list
+        self.assertIs(self._event_manager._spawn_events[0], self._event_manager._all_events[0])
+        self.assertEqual([event.name for event in self._event_manager._quest_events[0:1]], ["testevent3"])
+
+    def test_get_events_from_archived_feed(self):
+        testevent_1 = helper_generate_raw_eventdata_quest("testevent", TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME)
+        testevent_2 = helper_generate_raw_eventdata_quest("GO Battle Day: test", TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME)
+        testevent_3 = helper_generate_raw_eventdata_quest("expired", TESTDATA_DEFAULT_START_TIME - timedelta(days=2), TESTDATA_DEFAULT_START_TIME - timedelta(days=1))
+        self.mock_now.return_value = TESTDATA_DEFAULT_NOW_TIME
+        self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+        self._event_manager._config.set("general", "reset_quests_exclude_events", "go battle, test2")
+        self._event_manager._load_config_parameter()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._event_manager._EventManager__eventcache_path = tmpdir + "/"
+            filepath = os.path.join(tmpdir, "events.json.gz")
+            with gzip.open(filepath, "wt", encoding="utf8") as f:
+                json.dump([testevent_1, testevent_2, testevent_3], f, indent=2)
+            self._event_manager.load_events_from_file(filepath)
+        self.assertEqual(len(self._event_manager._all_events), 2)
+        # exclude strings are matched case insensitive
+        self.assertEqual([event.name for event in self._event_manager._quest_events], ["testevent"])
+
+    def test_json_array_reader(self):
+        raw_events = [helper_generate_raw_eventdata_quest(f"testevent{index}", TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME) for index in range(20)] + [12.5, None, [1, 2]]
+        feed = json.dumps(raw_events, indent=1)
+        for chunk_size in [1, 7, 1000, len(feed)]:
+            self.assertEqual(list(eventmanager.helper_iter_json_array(eventmanager.helper_iter_chunks(feed, chunk_size))), raw_events)
+        for invalid_feed in ["{}", "[1, 2", "[1 2]"]:
+            with self.assertRaises(ValueError):
+                list(eventmanager.helper_iter_json_array(eventmanager.helper_iter_chunks(invalid_feed, 1)))
+
+    @patch('httpclient.HttpClient.get', autospec=True)
+    def test_pogoinfo_event_list_not_modified(self, mock_requests_get):
+        testevent_1 = helper_generate_raw_eventdata_quest("testevent", TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_filepath = os.path.join(tmpdir, ".pogoinfocache")
+            log_teststep(0, "first request -> full download, stored in cache")
+            response = helper_generate_json_response(200, [testevent_1], headers={"ETag": '"v1"'})
+            mock_requests_get.return_value = response
+            event_list = eventmanager.PogoInfoEventList(cache_filepath = cache_filepath)
+            self.assertEqual(list(event_list.get_json()), [testevent_1])
+            self.assertTrue(event_list.is_modified())
+            self.assertTrue(os.path.isfile(cache_filepath))
+
+            log_teststep(1, "new instance (warm start) revalidates with ETag -> 304, cached event list used")
+            mock_requests_get.return_value = helper_generate_json_response(304, None)
+            event_list = eventmanager.PogoInfoEventList(cache_filepath = cache_filepath)
+            self.assertEqual(list(event_list.get_json()), [testevent_1])
+            self.assertEqual(mock_requests_get.call_args.kwargs["headers"]["If-None-Match"], '"v1"')
+            self.assertTrue(event_list.is_modified())
+
+            log_teststep(2, "second 304 -> not modified")
+            self.assertEqual(list(event_list.get_json()), [testevent_1])
+            self.assertFalse(event_list.is_modified())
+
+            log_teststep(3, "github down -> cached event list used, not modified")
+            mock_requests_get.side_effect = requests.exceptions.ConnectionError()
+            self.assertEqual(list(event_list.get_json()), [testevent_1])
+            self.assertFalse(event_list.is_modified())
+
+            log_teststep(4, "download interrupted while streaming -> cache and validators kept")
+            mock_response = MagicMock(status_code=200, ok=True, headers={"ETag": '"v2"'})
+            def iter_content_interrupted(chunk_size):
+                yield b'[{"name": "new'
+                raise requests.exceptions.ChunkedEncodingError("connection broken")
+            mock_response.iter_content.side_effect = iter_content_interrupted
+            mock_requests_get.side_effect = None
+            mock_requests_get.return_value = mock_response
+            with self.assertRaises(eventmanager.EventFeedInterruptedError):
+                list(event_list.get_json())
+            self.assertFalse(event_list.is_modified())
+            self.assertEqual(list(event_list.get_fallback_json()), [testevent_1])
+            self.assertFalse(event_list.is_modified())
+            self.assertEqual(event_list._etag, '"v1"')
+            with open(cache_filepath) as cache_file:
+                self.assertEqual(json.loads(cache_file.readline())["etag"], '"v1"')
+
+            log_teststep(5, "event manager keeps event list of last update")
+            self.assertTrue(helper_eventmanager_create_and_check(self, config_file_name = "/test/config_test.ini"))
+            self._event_manager._pogo_info_event_list = event_list
+            self._event_manager._all_events = ["last update"]
+            mock_requests_get.return_value = mock_response
+            with self.assertLogs("eventmanager", level="INFO") as logs:
+                self._event_manager._get_events()
+            self.assertIn("cached event list not modified -> skip event update", "\n".join(logs.output))
+            self.assertEqual(self._event_manager._all_events, ["last update"])
+
+
+class TestConnectors(unittest.TestCase):
+    def setUp(self):
+        log_teststep(0, "setUp")
+        # mock time.sleep, otherwise tests tooks too long...
+        patcher = patch('time.sleep', autospec=True)
+        self.mock_sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('scannerconnector.DbConnector.execute', autospec=True)
+    def test_delete_chunked(self, mock_execute):
+        dbconnector = scannerconnector.DbConnector(host="localhost", db_name="test", username="test", password="test")
+        # chunk 1: 2 rows (full chunk), chunk 2: 1 row -> done
+        mock_execute.side_effect = [[{"id": 1}, {"id": 2}], 2, [{"id": 5}], 1]
+        report = dbconnector.delete_chunked("pokemon", "id", "last_modified < %s", (10,), chunk_size=2, chunk_pause_s=0.1)
+        self.assertTrue(report["success"])
+        self.assertEqual(report["rows_deleted"], 3)
+        self.assertEqual(report["chunks"], 2)
+        self.assertEqual(mock_execute.call_count, 4)
+        # second select continues after last key of first chunk
+        self.assertIn("id > %s", mock_execute.call_args_list[2].args[1])
+        self.assertEqual(mock_execute.call_args_list[2].args[2], (10, 2))
+        self.assertEqual(mock_execute.call_args_list[3].args[2], (5, 10))
+        self.mock_sleep.assert_called_once_with(0.1)
+
+    @patch('scannerconnector.DbConnector.execute', autospec=True)
+    def test_delete_chunked_progress(self, mock_execute):
+        dbconnector = scannerconnector.DbConnector(host="localhost", db_name="test", username="test", password="test")
+        # 5 chunks of 1 row, last select empty -> progress after chunk 2 and 4
+        mock_execute.side_effect = [[{"id": 1}], 1, [{"id": 2}], 1, [{"id": 3}], 1, [{"id": 4}], 1, [{"id": 5}], 1, []]
+        with self.assertLogs("scannerconnector", level="INFO") as logs:
+            report = dbconnector.delete_chunked("pokemon", "id", "last_modified < %s", (10,), chunk_size=1, chunk_pause_s=0.1, progress_log_chunks=2)
+        self.assertEqual(report["rows_deleted"], 5)
+        progress_logs = [output for output in logs.output if "in progress" in output]
+        self.assertEqual(len(progress_logs), 2)
+        self.assertIn("2 rows in 2 chunks", progress_logs[0])
+        self.assertIn("4 rows in 4 chunks", progress_logs[1])
+
+    @patch('scannerconnector.DbConnector.execute', autospec=True)
+    def test_delete_chunked_throttle(self, mock_execute):
+        dbconnector = scannerconnector.DbConnector(host="localhost", db_name="test", username="test", password="test")
+        # server busy once after first chunk
+        mock_execute.side_effect = [[{"id": 1}], 1, [{"Value": "20"}], [{"Value": "3"}], [], ]
+        report = dbconnector.delete_chunked("pokemon", "id", "last_modified < %s", (10,), chunk_size=1, chunk_pause_s=0.1, max_threads_running=10)
+        self.assertTrue(report["success"])
+        self.assertEqual(report["rows_deleted"], 1)
+        self.assertEqual(self.mock_sleep.call_count, 2)
+
+    @patch('scannerconnector.MadConnector._trigger_madmin_reload', autospec=True)
+    def test_mad_trigger_rescan_async(self, mock_trigger_madmin_reload):
+        connector = scannerconnector.MadConnector("localhost", 3306, "test", "test", "test", reload_port_list=["5000", "5001"])
+        asyncio.run(connector.trigger_rescan_async())
+        self.assertEqual(sorted(call.args[1] for call in mock_trigger_madmin_reload.call_args_list), ["5000", "5001"])
+
+    @patch('scannerconnector.RdmConnector._api_set_request', autospec=True)
+    @patch('scannerconnector.GolbathybridConnector._api_post', autospec=True)
+    def test_golbathybrid_reset_all_quests_async(self, mock_api_post, mock_api_set_request):
+        connector = scannerconnector.GolbathybridConnector("http://localhost:9001", "user", "password", "group", "http://localhost:9010", "secret")
+        asyncio.run(connector.reset_all_quests_async())
+        mock_api_post.assert_called_once()
+        mock_api_set_request.assert_called_once()
+        self.assertEqual(mock_api_set_request.call_args.args[1], "clear_all_quests=true")
+
+    def test_notification_dispatcher_retry_after(self):
+        dispatcher = notifier.NotificationDispatcher(max_parallel=2, max_retries=1)
+        mock_telegram_api = MagicMock()
+        # first target: rate limited once, second target: always failing
+        mock_telegram_api.send_message.side_effect = lambda chat_id, text: {"ok": False, "error_code": 400} if chat_id == "2" else next(responses_chat_1)
+        responses_chat_1 = iter([{"ok": False, "error_code": 429, "parameters": {"retry_after": 3}}, {"ok": True}])
+        notifications = [(f"chat:{chat_id}", partial(notifier.send_telegram_message, mock_telegram_api, chat_id, "test")) for chat_id in ["1", "2"]]
+        results = dispatcher.dispatch(notifications)
+        dispatcher.shutdown()
+        self.assertTrue(results[0].delivered)
+        self.assertEqual(results[0].attempts, 2)
+        self.assertFalse(results[1].delivered)
+        self.assertEqual(results[1].attempts, 1)
+        self.mock_sleep.assert_called_once_with(3)
+
+    def test_notification_discord_rate_limit(self):
+        mock_http_client = MagicMock()
+        mock_http_client.post.return_value = helper_generate_json_response(429, {"retry_after": 1.5})
+        self.assertEqual(notifier.send_discord_webhook(mock_http_client, "http://localhost/webhook", {}), (False, 1.5, 429))
+        mock_http_client.post.return_value = helper_generate_json_response(429, {}, headers={"Retry-After": "2"})
+        self.assertEqual(notifier.send_discord_webhook(mock_http_client, "http://localhost/webhook", {}), (False, 2.0, 429))
+        mock_http_client.post.return_value = helper_generate_json_response(204, None)
+        self.assertEqual(notifier.send_discord_webhook(mock_http_client, "http://localhost/webhook", {}), (True, None, 204))
+
+    @patch('requests.Session.request', autospec=True)
+    def test_http_client_session_reuse(self, mock_session_request):
+        mock_session_request.return_value = helper_generate_json_response(200, {})
+        http_client = httpclient.HttpClient(connect_timeout=1, read_timeout=2)
+        http_client.get("http://localhost:5000/reload")
+        http_client.get("http://localhost:5000/reload")
+        http_client.post("https://api.telegram.org/bot123:abc/sendMessage", endpoint="telegram/sendMessage")
+        # one session per host, default timeouts
+        self.assertEqual(len(http_client._sessions), 2)
+        self.assertIs(mock_session_request.call_args_list[0].args[0], mock_session_request.call_args_list[1].args[0])
+        self.assertEqual(mock_session_request.call_args_list[0].kwargs["timeout"], (1, 2))
+        stats = http_client.get_latency_stats()
+        self.assertEqual(stats["http://localhost:5000/reload"]["count"], 2)
+        self.assertEqual(stats["telegram/sendMessage"]["count"], 1)
+        log_teststep(1, "connection error -> counted as error")
+        mock_session_request.side_effect = requests.exceptions.ConnectionError()
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            http_client.get("http://localhost:5000/reload")
+        self.assertEqual(http_client.get_latency_stats()["http://localhost:5000/reload"]["errors"], 1)
+
+    @patch('mysql.connector.pooling.MySQLConnectionPool', autospec=True)
+    def test_db_prepared_statement_cache(self, mock_pool_class):
+        mock_connection = mock_pool_class.return_value.get_connection.return_value
+        mock_connection.connection_id = 1
+        mock_cursor = mock_connection.cursor.return_value
+        mock_cursor.rowcount = 1
+        dbconnector = scannerconnector.DbConnector(host="localhost", db_name="test", username="test", password="test")
+        query = "DELETE FROM trs_event WHERE event_name = %s"
+        self.assertEqual(dbconnector.execute(query, ("test1",), commit=True), 1)
+        self.assertEqual(dbconnector.execute("DELETE FROM trs_event WHERE event_name = %s", ("test2",), commit=True), 1)
+        # one pool, one prepared statement, connection is given back to pool after each query
+        mock_pool_class.assert_called_once()
+        mock_connection.cursor.assert_called_once_with(prepared=True)
+        self.assertEqual(mock_cursor.execute.call_count, 2)
+        self.assertIs(mock_cursor.execute.call_args_list[1].args[0], mock_cursor.execute.call_args_list[0].args[0])
+        self.assertEqual(mock_connection.close.call_count, 2)
+        log_teststep(1, "reconnected connection -> statement prepared again")
+        mock_connection.connection_id = 2
+        dbconnector.execute(query, ("test3",), commit=True)
+        self.assertEqual(mock_connection.cursor.call_count, 2)
+
+    @patch('scannerconnector.DbConnector.delete_chunked', autospec=True)
+    def test_mad_reset_filtered_pokemon_species(self, mock_delete_chunked):
+        mock_delete_chunked.return_value = {"success": True, "rows_deleted": 1, "chunks": 1, "elapsed_s": 0.0}
+        connector = scannerconnector.MadConnector("localhost", 3306, "test", "test", "test")
+        eventchange = datetime(2010, 1, 1, hour=10)
+        connector.reset_filtered_pokemon(eventchange, pokemon_ids=[1, 4])
+        self.assertIn("AND pokemon_id IN (%s,%s)", mock_delete_chunked.call_args.args[3])
+        self.assertEqual(mock_delete_chunked.call_args.args[4], ("2010-01-01 10:00:00", "2010-01-01 10:00:00", 1, 4))
+        log_teststep(1, "all species")
+        connector.reset_filtered_pokemon(eventchange)
+        self.assertNotIn("pokemon_id", mock_delete_chunked.call_args.args[3])
+        log_teststep(2, "no species -> no delete")
+        mock_delete_chunked.reset_mock()
+        self.assertEqual(connector.reset_filtered_pokemon(eventchange, pokemon_ids=[])["rows_deleted"], 0)
+        mock_delete_chunked.assert_not_called()
+
+    def test_lazy_imports(self):
+        # fresh interpreter: scanner connectors, mysql driver, notifiers, optional services and asyncio are only imported on first use
+        lazy_modules = ['scannerconnector', 'mysql', 'simpletelegramapi', 'notifier', 'jobqueue', 'statestore', 'eventapi', 'metricsserver', 'http.server', 'asyncio']
+        script = "; ".join([
+            "import sys, eventmanager, metrics",
+            "print(sorted(m for m in " + repr(lazy_modules) + " if m in sys.modules))",
+            "eventmanager.EventManager('/test/config_test.ini')",
+            "print(sorted(m for m in " + repr(lazy_modules) + " if m in sys.modules))",
+            "eventmanager.RdmConnector",
+            "print(sorted(m for m in " + repr(lazy_modules) + " if m in sys.modules))",
+            "print([phase for phase, duration_s in metrics.get_startup_timer().get_phases()])"
+        ])
+        rootdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, "-c", script], cwd = rootdir, capture_output = True, text = True, check = True).stdout.splitlines()
+        self.assertEqual(output, ["[]", "[]", "['scannerconnector']", "['import eventmanager', 'load config', 'import scannerconnector']"])
+
+    def test_db_pokemon_reset_mixin_abstract(self):
+        # connector without DB timestamp format fails on instantiation, not on first reset
+        class IncompleteConnector(scannerconnector.DbPokemonResetMixin, simulator.RecordingConnector):
+            POKEMON_DB_COLUMNS = ("id", "updated", "expire_timestamp")
+        with self.assertRaises(TypeError):
+            IncompleteConnector(None)
+
+    @patch('scannerconnector.DbConnector.delete_chunked', autospec=True)
+    def test_rdm_golbat_reset_filtered_pokemon(self, mock_delete_chunked):
+        mock_delete_chunked.return_value = {"success": True, "rows_deleted": 2, "chunks": 1, "elapsed_s": 0.0}
+        eventchange = datetime(2010, 1, 1, hour=10)
+        log_teststep(1, "RDM without database -> skip")
+        connector = scannerconnector.RdmConnector("http://localhost:9001", "user", "password", "group")
+        self.assertFalse(connector.reset_filtered_pokemon(eventchange)["success"])
+        self.assertIsNone(connector.estimate_filtered_pokemon(eventchange))
+        mock_delete_chunked.assert_not_called()
+        log_teststep(2, "Golbat-hybrid with database: chunked delete on pokemon.id by unix timestamps")
+        connector = scannerconnector.GolbathybridConnector("http://localhost:9001", "user", "password", "group", "http://localhost:9010", "secret", db_name="golbat", db_username="test", db_password="test", delete_chunk_size=500)
+        report = connector.reset_filtered_pokemon(eventchange, pokemon_ids=[1, 4])
+        self.assertEqual(report["rows_deleted"], 2)
+        self.assertEqual(mock_delete_chunked.call_args.args[1:5], ("pokemon", "id", "updated < %s AND expire_timestamp > %s AND pokemon_id IN (%s,%s)", (1262340000, 1262340000, 1, 4)))
+        self.assertEqual(mock_delete_chunked.call_args.kwargs["chunk_size"], 500)
+
+    @patch('scannerconnector.DbConnector.delete_chunked', autospec=True)
+    @patch('scannerconnector.DbConnector.execute', autospec=True)
+    def test_mad_reset_adaptive_pokemon(self, mock_execute, mock_delete_chunked):
+        mock_delete_chunked.return_value = {"success": True, "rows_deleted": 1, "chunks": 1, "elapsed_s": 0.0}
+        mock_execute.return_value = [{"rows": 5000, "filtered": 50.0}]
+        connector = scannerconnector.MadConnector("localhost", 3306, "test", "test", "test")
+        eventchange = datetime(2010, 1, 1, hour=10)
+        self.assertEqual(connector.estimate_filtered_pokemon(eventchange, pokemon_ids=[1]), 2500)
+        self.assertTrue(mock_execute.call_args.args[1].startswith("EXPLAIN SELECT encounter_id FROM pokemon WHERE last_modified < %s"))
+        log_teststep(1, "estimate below truncate threshold -> chunked delete")
+        report = connector.reset_adaptive_pokemon(eventchange, truncate_min_rows=10000)
+        self.assertEqual(report["decision"], "filtered")
+        self.assertTrue(report["success"])
+        self.assertEqual(report["rows_deleted"], 1)
+        mock_delete_chunked.assert_called_once()
+        log_teststep(2, "estimate above truncate threshold -> truncate")
+        mock_execute.reset_mock()
+        report = connector.reset_adaptive_pokemon(eventchange, truncate_min_rows=1000)
+        self.assertEqual(report, {"success": True, "decision": "all"})
+        self.assertEqual(mock_execute.call_args.args[1], "TRUNCATE pokemon")
+        log_teststep(3, "no affected pokemon -> skip")
+        mock_execute.return_value = [{"rows": None, "filtered": None}]
+        mock_delete_chunked.reset_mock()
+        self.assertEqual(connector.reset_adaptive_pokemon(eventchange, truncate_min_rows=1000), {"success": True, "decision": "skip"})
+        mock_delete_chunked.assert_not_called()
+        log_teststep(4, "small estimate is rounded up -> no skip")
+        mock_execute.return_value = [{"rows": 3, "filtered": 10.0}]
+        self.assertEqual(connector.estimate_filtered_pokemon(eventchange), 1)
+        self.assertEqual(connector.reset_adaptive_pokemon(eventchange)["decision"], "filtered")
+        mock_delete_chunked.assert_called_once()
+        log_teststep(5, "failed chunked delete or truncate -> failed reset")
+        mock_delete_chunked.return_value = {"success": False, "rows_deleted": 0, "chunks": 0, "elapsed_s": 0.0}
+        report = connector.reset_adaptive_pokemon(eventchange)
+        self.assertEqual(report["decision"], "filtered")
+        self.assertFalse(eventmanager.helper_is_reset_successful(report))
+        mock_execute.side_effect = [[{"rows": 5000, "filtered": 50.0}], None]
+        report = connector.reset_adaptive_pokemon(eventchange, truncate_min_rows=1000)
+        self.assertEqual(report, {"success": False, "decision": "all"})
+        self.assertFalse(eventmanager.helper_is_reset_successful(report))
+
+    @patch('scannerconnector.DbConnector.delete_chunked', autospec=True)
+    def test_mad_reset_filtered_quests(self, mock_delete_chunked):
+        mock_delete_chunked.return_value = {"success": True, "rows_deleted": 1, "chunks": 1, "elapsed_s": 0.0}
+        connector = scannerconnector.MadConnector("localhost", 3306, "test", "test", "test")
+        connector.reset_filtered_quests(datetime(2010, 1, 1, hour=10))
+        self.assertEqual(mock_delete_chunked.call_args.args[1:5], ("trs_quest", "GUID", "quest_timestamp < %s", (1262340000,)))
+
+    @patch('scannerconnector.DbConnector.execute', autospec=True)
+    def test_mad_reset_quests_swap(self, mock_execute):
+        mock_execute.return_value = []
+        connector = scannerconnector.MadConnector("localhost", 3306, "test", "test", "test", quest_reset_strategy = "swap")
+        connector.reset_all_quests()
+        connector._background_executor.shutdown(wait=True)
+        queries = [call.args[1] for call in mock_execute.call_args_list]
+        self.assertEqual(queries[0], "DROP TABLE IF EXISTS trs_quest_eventmanager_new")
+        self.assertEqual(queries[1], "CREATE TABLE trs_quest_eventmanager_new LIKE trs_quest")
+        self.assertRegex(queries[2], r"^RENAME TABLE trs_quest TO trs_quest_eventmanager_old_\d+, trs_quest_eventmanager_new TO trs_quest$")
+        # old table dropped in background
+        old_table = queries[2].split(" ")[4].rstrip(",")
+        self.assertEqual(queries[-1], f"DROP TABLE IF EXISTS {old_table}")
+        self.assertNotIn("TRUNCATE trs_quest", queries)
+        log_teststep(1, "swap failed -> fallback TRUNCATE")
+        mock_execute.reset_mock()
+        mock_execute.side_effect = lambda dbconnector, query, *args, **kwargs: None if query.startswith("CREATE") else []
+        connector.reset_all_quests()
+        queries = [call.args[1] for call in mock_execute.call_args_list]
+        self.assertEqual(queries[-1], "TRUNCATE trs_quest")
+        self.assertFalse(any(query.startswith("RENAME") for query in queries))
+
+    @patch('scannerconnector.DbConnector.has_unique_key', autospec=True)
+    @patch('scannerconnector.DbConnector.execute_transaction', autospec=True)
+    def test_mad_sync_events(self, mock_execute_transaction, mock_has_unique_key):
+        mock_has_unique_key.return_value = True
+        mock_execute_transaction.return_value = 1
+        connector = scannerconnector.MadConnector("localhost", 3306, "test", "test", "test")
+        events = [("Regular Events", "2010-01-01 10:00:00", "2010-01-01 12:00:00", 30)]
+        default_events = [("DEFAULT", "2030-01-01 00:00:00", "2030-01-01 00:00:00", 30), ("Others", "2030-01-01 00:00:00", "2030-01-01 00:00:00", 30)]
+        self.assertTrue(connector.sync_events(events, default_events, delete_others=True))
+        # one transaction: upsert events, insert missing default events, delete others
+        mock_execute_transaction.assert_called_once()
+        statements = mock_execute_transaction.call_args.args[1]
+        self.assertEqual(len(statements), 3)
+        self.assertIn("ON DUPLICATE KEY UPDATE event_start=VALUES(event_start)", statements[0][0])
+        self.assertEqual(len(statements[0][1]), 4)
+        self.assertIn("ON DUPLICATE KEY UPDATE event_name=event_name", statements[1][0])
+        self.assertEqual(len(statements[1][1]), 8)
+        self.assertIn("NOT IN (%s,%s,%s)", statements[2][0])
+        self.assertEqual(statements[2][1], ["Regular Events", "DEFAULT", "Others"])
+
+    def test_benchmark_smoke(self):
+        # benchmark suite (test/benchmark.py) runs with stub servers and SQLite stand-in DB
+        from test import benchmark
+        result = benchmark.run_benchmarks(sizes = [10], repeat = 1, num_pokemon_rows = 10)
+        json.dumps(result)
+        names = [benchmark_result["name"] for benchmark_result in result["results"]]
+        self.assertIn("EventManager._get_events", names)
+        self.assertIn("MadConnector.reset_filtered_pokemon", names)
+        self.assertEqual(len(benchmark.compare_results(result, result)), len(names))
+
+
+class TestJobQueue(unittest.TestCase):
+    def test_jobqueue_dedupe_and_status(self):
+        release = threading.Event()
+        calls = []
+        queue = jobqueue.JobQueue(max_workers = 1, timeout_s = 0)
+        queue.register("blocking", lambda: release.wait(5))
+        queue.register("reset", lambda value: calls.append(value))
+        queue.submit("blocking")
+        first_job = queue.submit("reset", value = 1)
+        log_teststep(1, "identical pending job is not queued twice")
+        self.assertIs(queue.submit("reset", value = 1), first_job)
+        queue.submit("reset", value = 2)
+        self.assertEqual(queue.get_status()["pending"] + queue.get_status()["running"], 3)
+        release.set()
+        self.assertTrue(queue.wait_idle(5))
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(queue.get_status(), {"pending": 0, "running": 0, "done": 3, "failed": 0, "timeout": 0})
+        queue.shutdown()
+
+    def test_jobqueue_timeout_and_failure(self):
+        release = threading.Event()
+        queue = jobqueue.JobQueue(max_workers = 1, timeout_s = 0.05)
+        queue.register("hanging", lambda: release.wait(5))
+        queue.register("failing", lambda: 1 / 0)
+        queue.submit("hanging")
+        queue.submit("failing")
+        self.assertTrue(queue.wait_idle(5))
+        release.set()
+        self.assertEqual([job["status"] for job in queue.get_jobs()], ["timeout", "failed"])
+        self.assertIn('eventmanager_jobs{status="timeout"} 1', queue.get_prometheus_lines())
+        queue.shutdown()
+
+    def test_jobqueue_persisted(self):
+        calls = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            persist_path = os.path.join(tmpdir, ".jobqueue")
+            with open(persist_path, "w") as persist_file:
+                json.dump([{"id": "1-1", "name": "reset", "kwargs": {"value": 1}, "status": "running", "created": 1.0}, {"id": "1-2", "name": "unknown", "kwargs": {}, "status": "pending"}], persist_file)
+            queue = jobqueue.JobQueue(persist_path = persist_path)
+            queue.register("reset", lambda value: calls.append(value))
+            queue.start()
+            self.assertTrue(queue.wait_idle(5))
+            queue.shutdown()
+            self.assertEqual(calls, [1])
+            with open(persist_path) as persist_file:
+                self.assertEqual(json.load(persist_file), [])
+
+class TestSimulator(unittest.TestCase):
+    def test_replay_quest_event(self):
+        # first snapshot without event, event is announced with second snapshot at 09:00
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "20100101-0800_events.json"), "w") as snapshot_file:
+                json.dump([], snapshot_file)
+            with open(os.path.join(tmpdir, "20100101-0900_events.json"), "w") as snapshot_file:
+                json.dump([helper_generate_raw_eventdata_quest(TESTDATA_DEFAULT_EVENTNAME, TESTDATA_DEFAULT_START_TIME, TESTDATA_DEFAULT_END_TIME)], snapshot_file)
+            timeline, statistic = simulator.run_simulation(tmpdir, datetime(2010, 1, 1, 8, 0), datetime(2010, 1, 2, 0, 0), config_file_name = "/test/config_test.ini")
+        resets = [(entry["time"], entry["action"]) for entry in timeline.entries if entry["source"] == "scanner" and entry["action"].startswith("reset")]
+        self.assertEqual(resets, [("2010-01-01 10:00:00", "reset_all_quests"), ("2010-01-01 12:00:00", "reset_all_quests")])
+        self.assertEqual([entry["time"] for entry in timeline.entries if entry["source"] == "feed"], ["2010-01-01 08:00:00", "2010-01-01 09:00:00"])
+        self.assertEqual(statistic["timeline"]["telegram.send_message"], 2)
+        self.assertEqual(statistic["timeline"]["discord.webhook"], 2)
+        self.assertEqual(statistic["end"], "2010-01-02 00:00:00")
+        # real clock restored
+        self.assertLess(abs((eventmanager.helper_time_now() - datetime.now()).total_seconds()), 60)
 
 @unittest.skip("Remove this line for real testenvironment testing")
 class TestEventManagerWithTestenvironment(unittest.TestCase):
@@ -437,6 +1284,17 @@ def helper_generate_raw_eventdata(event_type, event_name, start, end, has_spawnp
         log.exception("Exception info:")
         return None
 
+def helper_generate_json_response(status_code, json_data, headers = {}):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers)
+    if json_data is not None:
+        response._content = json.dumps(json_data).encode("utf8")
+    else:
+        response._content = b""
+    response._content_consumed = True
+    return response
+
 def config_logging(logger, console_loglevel = logging.INFO):
     # console logging configuration
     formatter_console = logging.Formatter('[%(asctime)s] [%(name)12s] [%(levelname)7s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')